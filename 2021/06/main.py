@@ -1,4 +1,4 @@
-from tqdm import tqdm
+from output import tqdm
 import gc
 
 
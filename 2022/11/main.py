@@ -1,8 +1,8 @@
 import operator
-import re
-from io import TextIOBase
 from typing import Callable
 
+from utils import blocks, ints, read_input
+
 
 class Monkey:
     id_: int
@@ -18,49 +18,32 @@ class Monkey:
         return f"Monkey({self.id_}, {self.items}, /{self.test_divisible_arg}, {self.if_true_target}, {self.if_false_target})"
 
 
-def parse_monkey(indata: TextIOBase) -> tuple[Monkey, bool]:
+OPERATIONS = {
+    "+": operator.add,
+    "*": operator.mul,
+}
+
+
+def parse_monkey(block: bytes) -> Monkey:
+    monkey_line, items_line, operation_line, *test_lines = block.splitlines()
     monkey = Monkey()
-    monkey_id = re.compile(r"Monkey (?P<id>\d+):")
-    items = re.compile(r"Starting items: (?P<items>[\d, ]+)")
-    operation = re.compile(r"Operation: new = old (?P<op>\*|\+|-) (?P<arg>\d+)")
-    operation_same_arg = re.compile(r"Operation: new = old (?P<op>\*) old")
-    test = re.compile(r"Test: divisible by (?P<arg>\d+)")
-    if_true = re.compile(r"If true: throw to monkey (?P<arg>\d+)")
-    if_false = re.compile(r"If false: throw to monkey (?P<arg>\d+)")
-    operations = {
-        "+": operator.add,
-        "*": operator.mul,
-    }
-    for line in indata:
-        line = line.strip()
-        if line == "":
-            return monkey, False
-        if m := monkey_id.search(line):
-            monkey.id_ = int(m["id"])
-        if m := items.search(line):
-            monkey.items = [int(i) for i in m["items"].split(",")]
-        elif m := operation.search(line):
-            monkey.operation_arg = int(m["arg"])
-            monkey.operation = operations[m["op"]]
-        elif m := operation_same_arg.search(line):
-            monkey.operation_arg = Monkey.same_arg_placeholder
-            monkey.operation = operations[m["op"]]
-        elif m := test.search(line):
-            monkey.test_divisible_arg = int(m["arg"])
-        elif m := if_true.search(line):
-            monkey.if_true_target = int(m["arg"])
-        elif m := if_false.search(line):
-            monkey.if_false_target = int(m["arg"])
-    return monkey, True
+    monkey.id_ = ints(monkey_line)[0]
+    monkey.items = list(ints(items_line))
+    # "Operation: new = old OP ARG"
+    *_, op, arg = operation_line.decode().split()
+    monkey.operation = OPERATIONS[op]
+    monkey.operation_arg = Monkey.same_arg_placeholder if arg == "old" else int(arg)
+    # "Test: divisible by N", "If true: throw to monkey N", "If false: throw to monkey N"
+    monkey.test_divisible_arg, monkey.if_true_target, monkey.if_false_target = ints(b" ".join(test_lines))
+    return monkey
+
+
+def load_monkeys() -> list[Monkey]:
+    return [parse_monkey(block) for block in blocks(read_input("input.txt"))]
 
 
 def part_1():
-    monkeys = []
-    end_of_file = False
-    with open("input.txt") as indata:
-        while not end_of_file:
-            monkey, end_of_file = parse_monkey(indata)
-            monkeys.append(monkey)
+    monkeys = load_monkeys()
     print(monkeys)
     num_of_inspections = {monkey.id_: 0 for monkey in monkeys}
     for round in range(20):
@@ -86,12 +69,7 @@ def part_1():
 
 
 def part_2():
-    monkeys = []
-    end_of_file = False
-    with open("input.txt") as indata:
-        while not end_of_file:
-            monkey, end_of_file = parse_monkey(indata)
-            monkeys.append(monkey)
+    monkeys = load_monkeys()
     print(monkeys)
     num_of_inspections = {monkey.id_: 0 for monkey in monkeys}
     divider = 1
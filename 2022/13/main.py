@@ -1,26 +1,18 @@
-from ast import literal_eval
+import json
 from collections import defaultdict
 import heapq
 from functools import cmp_to_key
 from itertools import zip_longest
 from pprint import pprint
 
+from utils import read_input
+
 
 def load_input():
-    pairs = []
-    with open("input.txt") as indata:
-        current_pair = []
-        for line in indata:
-            line = line.strip()
-            if not line:
-                continue
-            print(f"parsing: {line}")
-            parsed = literal_eval(line)
-            current_pair.append(parsed)
-            if len(current_pair) == 2:
-                pairs.append(current_pair)
-                current_pair = []
-    return pairs
+    # the packets are JSON lists, one `json.loads` parses all of them
+    lines = [line for line in read_input("input.txt").splitlines() if line.strip()]
+    packets = json.loads(b"[" + b",".join(lines) + b"]")
+    return [packets[i : i + 2] for i in range(0, len(packets), 2)]
 
 
 sentry = object()
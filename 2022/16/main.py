@@ -1,17 +1,20 @@
-import gc
-import heapq
 import re
 import time
-from collections import defaultdict, deque
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
 from itertools import combinations
-from typing import Iterable, NamedTuple, TypeAlias
+from typing import NamedTuple
 
-from tqdm.rich import tqdm
+from cache import cached_arrays
+from output import tqdm
+from utils import INFINITY, BitSet, Graph, runtime_profile
 
 VERBOSE = 0
 STARTING_VALVE = "AA"
 TEST_DATA = False
+# bump when compute_all_paths changes, the cached distance tables are keyed by it
+DISTANCES_VERSION = 1
 
 
 class Valve(NamedTuple):
@@ -35,88 +38,113 @@ def load_data() -> dict[str, Valve]:
     return valves
 
 
+class PlanStep(NamedTuple):
+    """A decision of the best plan found by `mega_tree`, linked to the decisions that follow it.
+
+    ``cost`` 0 means opening ``valve``, otherwise it's going to ``valve`` through a tunnel. The steps are only made
+    for the branches that win, `explain` turns them into text.
+    """
+
+    minute: int
+    valve: str
+    cost: int
+    rest: "PlanStep | None"
+
+
+def explain(valves: dict[str, Valve], plan: PlanStep | None) -> list[str]:
+    actions = []
+    while plan is not None:
+        if plan.cost == 0:
+            actions.append(f"{plan.minute}: Open {plan.valve} ({valves[plan.valve].flow_rate})")
+        else:
+            actions.append(f"{plan.minute}: go to {plan.valve} (cost {plan.cost})")
+        plan = plan.rest
+    return actions
+
+
 def mega_tree(
     valves: dict[str, Valve],
-    allowed_valves: frozenset[str],
+    bits: BitSet,
+    allowed_valves: int,
     current_valve: str,
-    opened_valves: frozenset[str],
+    opened_valves: int,
+    opened_flow_rate: int,  # the total flow rate of the opened valves
     current_minute: int,
     time_delta: int,  # how many minutes elapsed in this iteration (current_minute - last_minute)
-    pressure_released: defaultdict[str, int],
-    came_from: list[str],  # a list of nodes visited since last time a valve was opened
+    pressure_released: int,
+    came_from: int,  # the nodes visited since last time a valve was opened
     # for avoiding cycles between opening valves.
-    all_actions: list[str],  # all actions taken, used for debugging.
     time_limit: int = 30,
-) -> tuple[int, list[str]]:
-    new_pressure = defaultdict(int)
-    for valve in opened_valves:
-        new_pressure[valve] = pressure_released[valve] + valves[valve].flow_rate * time_delta
+) -> tuple[int, PlanStep | None]:
+    """Return the most pressure that can be released and the plan that does it.
+
+    The sets of valves are masks of `bits`, so a state is a handful of ints.
+    """
+    new_pressure = pressure_released + opened_flow_rate * time_delta
 
-    found_max = sum(new_pressure.values())
-    best_actions = all_actions
+    found_max = new_pressure
+    best_plan = None
     if current_minute >= time_limit:
-        return found_max, all_actions
+        return found_max, None
 
+    current_bit = bits.masks[current_valve]
     if (
         current_minute
-        and current_valve not in opened_valves
-        and current_valve in allowed_valves  # for part2 where operates only on subset of valves
+        and not opened_valves & current_bit
+        and allowed_valves & current_bit  # for part2 where operates only on subset of valves
         and valves[current_valve].flow_rate > 0
     ):
         if VERBOSE > 2:
             print(f"Opening valve {current_valve} ({valves[current_valve].flow_rate})")
-        new_all_actions = [*all_actions, f"{current_minute}: Open {current_valve} ({valves[current_valve].flow_rate})"]
         # we have opened the current valve so we can go back now - use a new empty came_from
         when_opened = mega_tree(
             valves,
+            bits,
             allowed_valves,
             current_valve,
-            opened_valves | {current_valve},
+            opened_valves | current_bit,
+            opened_flow_rate + valves[current_valve].flow_rate,
             current_minute + 1,
             1,
             new_pressure,
-            [],
-            new_all_actions,
+            0,
         )
         if when_opened[0] > found_max:
             found_max = when_opened[0]
-            best_actions = when_opened[1]
+            best_plan = PlanStep(current_minute, current_valve, 0, when_opened[1])
 
+    came_from |= current_bit
     for tunnel in valves[current_valve].tunnels:
-        if tunnel[0] not in came_from:
-            new_came_from = [*came_from, current_valve]
+        if not came_from & bits.masks[tunnel[0]]:
             if VERBOSE > 2:
                 print(f"Going from {current_valve} to {tunnel[0]} ({tunnel[1]} minute(s))")
-            new_all_actions = [*all_actions, f"{current_minute}: go to {tunnel[0]} (cost {tunnel[1]})"]
             when_moved = mega_tree(
                 valves,
+                bits,
                 allowed_valves,
                 tunnel[0],
                 opened_valves,
+                opened_flow_rate,
                 current_minute + tunnel[1],
                 tunnel[1],
                 new_pressure,
-                new_came_from,
-                new_all_actions,
+                came_from,
             )
             if when_moved[0] > found_max:
                 found_max = when_moved[0]
-                best_actions = when_moved[1]
+                best_plan = PlanStep(current_minute, tunnel[0], tunnel[1], when_moved[1])
 
     if current_minute < time_limit:
         if VERBOSE > 2:
             print(f"Nothing to do and still have {time_limit-current_minute} minutes left")
-        total_pressure_released = sum(
-            pressure_released[valve] + valves[valve].flow_rate * (time_limit - current_minute + 1)
-            for valve in opened_valves
-        )
+        total_pressure_released = pressure_released + opened_flow_rate * (time_limit - current_minute + 1)
         if total_pressure_released > found_max:
             found_max = total_pressure_released
-            best_actions = all_actions
+            best_plan = None
 
     if VERBOSE > 0:
-        print(found_max, best_actions)
-    return found_max, best_actions
+        print(found_max, explain(valves, best_plan))
+    return found_max, best_plan
 
 
 def part_1():
@@ -124,23 +152,26 @@ def part_1():
     current_valve = "AA"
     time_left = 30
     current_minute = 1
-    opened_valves: frozenset[str] = frozenset()
-    started = time.monotonic()
-    found_max = mega_tree(
-        valves,
-        frozenset(valves),
-        current_valve,
-        opened_valves,
-        current_minute,
-        1,
-        defaultdict(int, **{v: 0 for v in valves}),
-        [],
-        [],
-    )
-    print("\n".join(found_max[1]))
-    time_took = time.monotonic() - started
-    print(f"Part 1 took {time_took:.2f} seconds ({time_took/60:.2f} minutes)")
-    print(f"part 1 max: {found_max[0]}")
+    bits = BitSet(valves)
+    opened_valves = 0
+    with runtime_profile("search"):
+        started = time.monotonic()
+        found_max = mega_tree(
+            valves,
+            bits,
+            bits.full,
+            current_valve,
+            opened_valves,
+            0,
+            current_minute,
+            1,
+            0,
+            0,
+        )
+        print("\n".join(explain(valves, found_max[1])))
+        time_took = time.monotonic() - started
+        print(f"Part 1 took {time_took:.2f} seconds ({time_took/60:.2f} minutes)")
+        print(f"part 1 max: {found_max[0]}")
 
 
 def prune_broken_valves(valves: dict[str, Valve]) -> dict[str, Valve]:
@@ -183,21 +214,49 @@ def prune_broken_valves(valves: dict[str, Valve]) -> dict[str, Valve]:
     return new_valves
 
 
+OPEN = "open"
+GO_TO = "go to"
+WAIT = "wait"
+
+
 @dataclass
 class WorkerState:
     current_valve: str
     time: int = 1
     opened_vales: list[tuple[str, int]] = field(default_factory=set, repr=False, init=True, compare=False)
-    actions: list[str] = field(default_factory=list, repr=False, init=True, compare=False)
+    # the state this one was reached from and how, `explain_worker` rebuilds the actions from them
+    parent: "WorkerState | None" = field(default=None, repr=False, compare=False)
+    action: str | None = field(default=None, repr=False, compare=False)
+    # the bits of the valves in `opened_vales`
+    opened_mask: int = field(default=0, repr=False, compare=False)
+
+
+def explain_worker(state: WorkerState | None) -> list[str]:
+    """Return the actions that lead to the state."""
+    actions = []
+    while state is not None and state.parent is not None:
+        if state.action == WAIT:
+            actions.append(f"{state.parent.time}: wait")
+        else:
+            actions.append(f"{state.parent.time}: {state.action} {state.current_valve}")
+        state = state.parent
+    return actions[::-1]
 
 
 def part2_worker(
     starting_valve: str,
     valve_distances: dict[str, dict[str, int]],
     valves: dict[str, Valve],
-    allowed_valves: frozenset[str],
+    bits: BitSet,
+    allowed_valves: int,
     time_limit: int,
-):
+) -> tuple[int, WorkerState | None]:
+    """Return the best score and the final state of the best plan (see `explain_worker`).
+
+    :param allowed_valves: the mask (of `bits`) of the valves this worker may open.
+    """
+    # the valves worth moving to, in the order of their bits
+    targets = [(valve, bits.masks[valve]) for valve in bits.names(allowed_valves) if valves[valve].flow_rate > 0]
     # we have 3 options:
     # - open the current valve
     # - move to another valve
@@ -205,7 +264,7 @@ def part2_worker(
     states_to_check = deque()
     states_to_check.append(WorkerState(starting_valve, 1))
     best_score = 0
-    best_actions = []
+    best_state = None
     while states_to_check:
         current_state = states_to_check.popleft()
 
@@ -216,36 +275,37 @@ def part2_worker(
             )
             if presure_released > best_score:
                 best_score = presure_released
-                best_actions = current_state.actions
+                best_state = current_state
             continue
 
         # open the current valve
+        current_bit = bits.masks[current_state.current_valve]
         if (
-            current_state.current_valve not in [v[0] for v in current_state.opened_vales]
-            and current_state.current_valve in allowed_valves
+            not current_state.opened_mask & current_bit
+            and allowed_valves & current_bit
             and valves[current_state.current_valve].flow_rate > 0
         ):
             new_state = WorkerState(
                 current_state.current_valve,
                 current_state.time + 1,
                 [*current_state.opened_vales, (current_state.current_valve, current_state.time)],
-                [*current_state.actions, f"{current_state.time}: open {current_state.current_valve}"],
+                current_state,
+                OPEN,
+                current_state.opened_mask | current_bit,
             )
             states_to_check.append(new_state)
 
         # no point moving to another valve while we just got here - only move after we have opened a valve
         else:
-            for valve in allowed_valves:
-                if (
-                    valve != current_state.current_valve
-                    and valves[valve].flow_rate > 0
-                    and valve not in [v[0] for v in current_state.opened_vales]
-                ):
+            for valve, bit in targets:
+                if bit != current_bit and not current_state.opened_mask & bit:
                     new_state = WorkerState(
                         valve,
                         current_state.time + valve_distances[current_state.current_valve][valve],
                         current_state.opened_vales,
-                        [*current_state.actions, f"{current_state.time}: go to {valve}"],
+                        current_state,
+                        GO_TO,
+                        current_state.opened_mask,
                     )
                     states_to_check.append(new_state)
 
@@ -254,81 +314,36 @@ def part2_worker(
             current_state.current_valve,
             time_limit,
             current_state.opened_vales,
-            [*current_state.actions, f"{current_state.time}: wait"],
+            current_state,
+            WAIT,
+            current_state.opened_mask,
         )
         states_to_check.append(new_state)
-    return best_score, best_actions
-
-
-VALVE_NAME: TypeAlias = str
-
-
-class Edge(NamedTuple):
-    target: VALVE_NAME
-    weight: int
-
-
-@dataclass(order=True)
-class Node:
-    """A graph node class for use with the Dijkstra algorithm."""
+    return best_score, best_state
 
-    coordinates: VALVE_NAME
-    links: list[Edge] = field(default_factory=list, repr=False, init=False, compare=False)
 
-    # def __lt__(self, other):
-    #     if not isinstance(other, Node):
-    #         return NotImplemented
-    #     return self.coordinates < other.coordinates
-
-    def __hash__(self) -> int:
-        return hash(self.coordinates)
-
-
-def dijkstra(
-    nodes: Iterable[Node], start: Node, end_nodes: Iterable[Node]
-) -> tuple[dict[VALVE_NAME, Node], dict[VALVE_NAME, int]]:
-    """Implementation of Dijkstra graph path finding algorithm.
-
-    Actually finds a route from the start node to all reachable nodes.
-
-    :param nodes: an iterable of all the nodes in the graph.
-    :param start: the start node.
-    :param end_nodes: an iterable of end nodes.
-    :returns: a mapping of node to its parent (predecesor on the path).
-    """
-    graph = {node.coordinates: node for node in nodes}
-    distance = defaultdict(lambda: 99_999_999)
-    distance[start.coordinates] = 0
-    parent: dict[VALVE_NAME, Node | None] = {start.coordinates: None}
-    queue: list[tuple[int, Node]] = [(0, start)]
-    for end_node in end_nodes:
-        heapq.heappush(queue, (9999_9999_9999_9999, end_node))
-    while queue:
-        unused_dist, u = heapq.heappop(queue)
-        for link in u.links:
-            if (new_distance := distance[u.coordinates] + link.weight) < distance[link.target]:
-                distance[link.target] = new_distance
-                parent[link.target] = u
-                heapq.heappush(queue, (distance[link.target], graph[link.target]))
-
-    return parent, distance
-
-
-def compute_all_paths(valves: dict[str, Valve]):
-    """Find all paths from one valve to another."""
-    # we need all paths to valves with flow rate > 0
+def compute_all_paths(valves: dict[str, Valve]) -> dict[str, dict[str, int]]:
+    """Find the length of the shortest path from every valve to every other one."""
     # after prune_broken_valves we can assume that all valves have flow rate > 0 (or are the starting valve)
-    nodes = []
-    # first build the datastructures needed for dijkstra
-    for valve in valves.values():
-        edges = [Edge(target=tunnel[0], weight=tunnel[1]) for tunnel in valve.tunnels]
-        nodes.append(Node(coordinates=valve.name))
-        nodes[-1].links = edges
-    # now run dijkstra for each valve
+    names = list(valves)
+    ids = {name: idx for idx, name in enumerate(names)}
+    tunnels = [(ids[valve.name], ids[tunnel], cost) for valve in valves.values() for tunnel, cost in valve.tunnels]
+
+    def distance_table():
+        graph = Graph.from_edges(len(names), tunnels)
+        table = array("q")
+        for idx in range(len(names)):
+            table.extend(graph.dijkstra([idx]).distance)
+        return {"distance": table}
+
+    # row `idx` of the table are the distances from valve `names[idx]`
+    table = cached_arrays("2022/16 distances", DISTANCES_VERSION, (len(names), tunnels), distance_table)["distance"]
     results = {}
-    for node in nodes:
-        parents, distances = dijkstra(nodes, node, nodes)
-        results[node.coordinates] = dict(distances)
+    for idx, name in enumerate(names):
+        distance = table[idx * len(names) : (idx + 1) * len(names)]
+        results[name] = {
+            other: distance[other_id] for other_id, other in enumerate(names) if distance[other_id] != INFINITY
+        }
     return results
 
 
@@ -336,45 +351,48 @@ def part_2():
     valves = load_data()
     valves = prune_broken_valves(valves)
     valves_to_distances = compute_all_paths(valves)
+    bits = BitSet(valves)
+    starting_bit = bits.bit(STARTING_VALVE)
     ##################
     # check with part 1
-    # presure_released, actions = part2_worker(STARTING_VALVE, valves_to_distances, valves, valves.keys(), 30)
-    # print(f"Part 1 result: {presure_released} ({actions})")
+    # presure_released, state = part2_worker(STARTING_VALVE, valves_to_distances, valves, valves.keys(), 30)
+    # print(f"Part 1 result: {presure_released} ({explain_worker(state)})")
     # return
     ##################
-    time_left = 26
-    best_score = 0
-    best_combination = None
-    all_combinations = list(combinations(valves, len(valves) // 2))
-    seen_combinations = set()
-    for combination in tqdm(all_combinations):
-        human_valves = frozenset(combination) | frozenset((STARTING_VALVE,))  # have to have the starting valve
-        if human_valves in seen_combinations:
-            continue
-        elephant_valves = frozenset({v for v in valves if v not in human_valves or v == STARTING_VALVE})
-        # it does not matter which one is human and which one is elephant.
-        seen_combinations.add(human_valves)
-        seen_combinations.add(elephant_valves)
-        if VERBOSE > 0:
-            print(f"Trying combination human: {human_valves}; elephant: {elephant_valves}")
-        iter_start = time.perf_counter()
-        human_score = part2_worker(STARTING_VALVE, valves_to_distances, valves, human_valves, time_left)
-        human_time = time.perf_counter() - iter_start
-        # print(f"Human part took: {human_time:,} seconds")
-        elephant_score = part2_worker(STARTING_VALVE, valves_to_distances, valves, elephant_valves, time_left)
-        # print(f"Total iteration time: {time.perf_counter() - iter_start} seconds")
-        if VERBOSE > 0:
-            print(f"Scores: Human: {human_score}, elephant: {elephant_score}")
-        if (combination_score := human_score[0] + elephant_score[0]) > best_score:
-            best_score = combination_score
-            best_combination = human_valves, elephant_valves
-            print(f"New best found: {best_score}")
-
-    print(best_combination)
-    print(f"Part 2 result: {best_score}")
+    with runtime_profile("search"):
+        time_left = 26
+        best_score = 0
+        best_combination = None
+        all_combinations = list(combinations(valves, len(valves) // 2))
+        seen_combinations = set()
+        for combination in tqdm(all_combinations):
+            human_valves = bits.mask(combination) | starting_bit  # have to have the starting valve
+            if human_valves in seen_combinations:
+                continue
+            elephant_valves = bits.full & ~human_valves | starting_bit
+            # it does not matter which one is human and which one is elephant.
+            seen_combinations.add(human_valves)
+            seen_combinations.add(elephant_valves)
+            if VERBOSE > 0:
+                print(f"Trying combination human: {bits.names(human_valves)}; elephant: {bits.names(elephant_valves)}")
+            iter_start = time.perf_counter()
+            human_score = part2_worker(STARTING_VALVE, valves_to_distances, valves, bits, human_valves, time_left)
+            human_time = time.perf_counter() - iter_start
+            # print(f"Human part took: {human_time:,} seconds")
+            elephant_score = part2_worker(STARTING_VALVE, valves_to_distances, valves, bits, elephant_valves, time_left)
+            # print(f"Total iteration time: {time.perf_counter() - iter_start} seconds")
+            if VERBOSE > 0:
+                print(f"Scores: Human: {human_score[0]}, elephant: {elephant_score[0]}")
+            if (combination_score := human_score[0] + elephant_score[0]) > best_score:
+                best_score = combination_score
+                best_combination = bits.names(human_valves), bits.names(elephant_valves)
+                print(f"New best found: {best_score}")
+                if VERBOSE > 0:
+                    print(f"Human: {explain_worker(human_score[1])}, elephant: {explain_worker(elephant_score[1])}")
+
+        print(best_combination)
+        print(f"Part 2 result: {best_score}")
 
 
 if __name__ == "__main__":
-    print(f"default gc: {gc.get_threshold()}")
-    gc.set_threshold(167_829, 28_342, 6_893)
     part_2()
@@ -1,15 +1,12 @@
-import gc
-from collections import defaultdict
-from copy import deepcopy
+import functools
 from dataclasses import dataclass
 from enum import Enum, auto
-from itertools import cycle, pairwise, repeat
+from itertools import cycle
 from typing import NamedTuple
 
-from rich import print
-from tqdm.rich import tqdm
-
-from utils import MutablePoint
+from output import Progress, print
+from render import show
+from utils import MutablePoint, fast_forward, runtime_profile
 
 EMPTY = "."
 SETTLED_ROCK_FRAGMENT = "\N{FULL BLOCK}"
@@ -156,13 +153,13 @@ class Cave:
                     if foo != EMPTY:
                         r[x + self.rock.position.x] = MOVING_ROCK_FRAGMENT
             rows.append(r)
-        for rev_row_idx, r in enumerate(reversed(rows)):
-            print(f"{len(self.cave)-rev_row_idx:4} |" + "".join(r) + "|")
-        print(
+        lines = [f"{len(self.cave)-rev_row_idx:4} |" + "".join(r) + "|" for rev_row_idx, r in enumerate(reversed(rows))]
+        lines.append(
             "   0 \N{BOX DRAWINGS LIGHT UP AND RIGHT}"
             + "\N{BOX DRAWINGS LIGHT HORIZONTAL}" * len(self.cave[0])
             + "\N{BOX DRAWINGS LIGHT UP AND LEFT}"
         )
+        show("\n".join(lines) + "\n")
 
     def stop_rock(self):
         width = ROCK_SIZE[self.rock.type].width
@@ -186,7 +183,7 @@ def tetris(winds: str, max_rocks: int):
     block_dropping = False
     blocks_dropped = 0
 
-    progress = iter(tqdm(repeat(1), total=max_rocks))
+    progress = Progress(desc="rocks", total=max_rocks, counter="rocks dropped")
     while blocks_dropped <= max_rocks:
         if block_dropping:
             wind = next(winds)
@@ -201,130 +198,104 @@ def tetris(winds: str, max_rocks: int):
             cave.spawn_new_rock()
             block_dropping = True
             blocks_dropped += 1
-            next(progress)
+            progress.tick()
 
         # cave.print()
     # cave.print(True)
+    progress.close()
     print(f"Final height of the tower: {cave.height}")
     return cave.height
 
 
-class CaveSnapshot(NamedTuple):
-    height: int
-    cave_state: list
-    rocks_dropped: int
-
+# the rocks as bit masks of their rows from the bottom up, bit 6 is the left wall and they start 2 units from it
+ROCK_MASKS = (
+    (0b0011110,),
+    (0b0001000, 0b0011100, 0b0001000),
+    (0b0011100, 0b0000100, 0b0000100),
+    (0b0010000, 0b0010000, 0b0010000, 0b0010000),
+    (0b0011000, 0b0011000),
+)
+LEFT_WALL = 1 << (CAVE_WIDTH - 1)
+RIGHT_WALL = 1
+# the rows below the top that are compared to detect the cycle, rocks don't fall through deeper gaps than that
+SURFACE_DEPTH = 64
 
-class Cycle(NamedTuple):
-    rock_type: RockType
-    wind_idx: int
-    height: int
-    rocks_dropped: int
 
+@dataclass
+class Chamber:
+    """The settled rocks as bit masks of the rows (only up to the top of the tower) and what falls next."""
 
-def tetris2(winds_input: str, max_rocks: int, height_to_start_searching_for_cycles: int):
-    cave = Cave()
-    winds = cycle(enumerate(winds_input))
-    block_dropping = False
-    blocks_dropped = wind_idx = 0
-
-    tetris_cycle = defaultdict(list)
-    found_cycle = None
-    cycle_applied = False
-    progress = iter(tqdm(repeat(1), total=max_rocks))
-    while blocks_dropped <= max_rocks:
-        if block_dropping:
-            wind_idx, wind = next(winds)
-            rock_horizontal_direction = Direction.RIGHT if wind == ">" else Direction.LEFT
-            cave.move_rock_horizontal(rock_horizontal_direction)
-            # cave.print()
-            rock_moved_down = cave.drop_rock()
-            if not rock_moved_down:
-                cave.stop_rock()
-                block_dropping = False
-        else:
-            cave.spawn_new_rock()
-            block_dropping = True
-            blocks_dropped += 1
-            next(progress)
-            # add board, wind, and next rock state to cycle detection
-            cave_height_for_snapshot = 400
-            cave_height_to_skip = 600 if TEST_DATA else 1_500  # skip before starting to look for cycles
-            if not found_cycle and cave.rock and cave.height > cave_height_to_skip:
-                tetris_cycle[(cave.rock.type, wind_idx % len(winds_input))].append(
-                    CaveSnapshot(
-                        cave.height,
-                        deepcopy(cave.cave[cave.height - cave_height_for_snapshot :]),
-                        blocks_dropped,
-                    )
-                )
+    rows: list[int]
+    rock_idx: int = 0
+    wind_idx: int = 0
 
-            if (
-                found_cycle
-                and not cycle_applied
-                and cave.rock.type == found_cycle.rock_type
-                and wind_idx % len(winds_input) == found_cycle.wind_idx
-            ):
-                # we're at the start of the cycle
-                missing_rocks = max_rocks - (blocks_dropped - 1)  # -1 as don't count the newly spawned rock
-                cycle_repetitions = (
-                    missing_rocks // found_cycle.rocks_dropped - 1
-                )  # 1 less repetition to avoid overshooting
-                print(
-                    f"Applying cycle: current dropped blocks: {blocks_dropped}. "
-                    f"Need {missing_rocks:,} rocks to drop -> {cycle_repetitions=:,}"
-                )
-                blocks_dropped += cycle_repetitions * found_cycle.rocks_dropped
-                cave_extra_height = cycle_repetitions * found_cycle.height
-                print(
-                    f"cycle applied: current dropped blocks: {blocks_dropped:,}. "
-                    f"Old height {cave.height:,}. Gained extra height {cave_extra_height:,}"
-                )
-                cycle_applied = True
-
-            if not found_cycle and cave.height >= height_to_start_searching_for_cycles:
-                print(f"Got {len(tetris_cycle)} possible cycles")
-                for (rock_type, wind_idx), cave_snapshots in tetris_cycle.items():
-                    if len(cave_snapshots) < 5:  # min repetitions
-                        continue
-                    diffs_heights = {p[1] - p[0] for p in pairwise(h.height for h in cave_snapshots)}
-                    diffs_blocks = {p[1] - p[0] for p in pairwise(h.rocks_dropped for h in cave_snapshots)}
-                    all_the_same = all(p[1] == p[0] for p in pairwise(h.cave_state for h in cave_snapshots))
-                    if len(diffs_heights) != 1 or len(diffs_blocks) != 1:
-                        print(f"Found strange cycle: {rock_type} at wind {wind_idx}: {diffs_heights=}, {diffs_blocks=}")
-                    print(f"Unique height differences: {diffs_heights}")
-                    print([snapshot.height for snapshot in cave_snapshots])
-                    print(f"Unique block count differences: {diffs_blocks} ({len(cave_snapshots)} total)")
-                    print([snapshot.rocks_dropped for snapshot in cave_snapshots])
-                    if all_the_same and len(diffs_heights) == 1 and len(diffs_blocks) == 1:
-                        print(
-                            f"All cave snapshots are the same!! {rock_type} at wind {wind_idx} ({len(cave_snapshots)} repetitions)"
-                        )
-                        found_cycle = Cycle(rock_type, wind_idx, diffs_heights.pop(), diffs_blocks.pop())
-                        print("\n".join("".join(foo) for foo in reversed(cave_snapshots[0].cave_state)))
-                        tetris_cycle.clear()
-                        break
-    print(f"{blocks_dropped=}")
-    print(f"{cave.height=:,} + {cave_extra_height=:,} = {cave.height + cave_extra_height:,}")
-    return cave.height + cave_extra_height
+    @property
+    def height(self):
+        return len(self.rows)
+
+    def fingerprint(self):
+        return self.rock_idx, self.wind_idx, tuple(self.rows[-SURFACE_DEPTH:])
+
+    def collides(self, rock: tuple[int, ...], y: int) -> bool:
+        rows = self.rows
+        return any(y + i < len(rows) and rows[y + i] & part for i, part in enumerate(rock))
+
+    def drop_rock(self, winds: str) -> "Chamber":
+        rock = ROCK_MASKS[self.rock_idx]
+        self.rock_idx = (self.rock_idx + 1) % len(ROCK_MASKS)
+        y = self.height + ROCK_START_CLEARANCE
+        while True:
+            wind = winds[self.wind_idx]
+            self.wind_idx = (self.wind_idx + 1) % len(winds)
+            if wind == ">":
+                if not any(part & RIGHT_WALL for part in rock):
+                    moved = tuple(part >> 1 for part in rock)
+                    if not self.collides(moved, y):
+                        rock = moved
+            elif not any(part & LEFT_WALL for part in rock):
+                moved = tuple(part << 1 for part in rock)
+                if not self.collides(moved, y):
+                    rock = moved
+            if y == FLOOR or self.collides(rock, y - 1):
+                break
+            y -= 1
+        for i, part in enumerate(rock):
+            if y + i < len(self.rows):
+                self.rows[y + i] |= part
+            else:
+                self.rows.append(part)
+        return self
+
+
+def tetris2(winds: str, max_rocks: int):
+    """Tower height after `max_rocks` rocks, skipping over the repetitions of the rocks and winds."""
+    result = fast_forward(
+        lambda: Chamber([]),
+        functools.partial(Chamber.drop_rock, winds=winds),
+        max_rocks,
+        fingerprint=Chamber.fingerprint,
+        metric=lambda chamber: chamber.height,
+    )
+    if result.cycle:
+        print(f"The tower repeats every {result.cycle.period} rocks after the first {result.cycle.start}")
+    return result.value
 
 
 def part_1():
     MAX_ROCKS = 2022
     winds = load_data()
-    final_height = tetris(winds, MAX_ROCKS)
+    with runtime_profile("search"):
+        final_height = tetris(winds, MAX_ROCKS)
     print(f"part 1 result: {final_height}")
 
 
 def part_2():
     MAX_ROCKS = 1_000_000_000_000
-    HEIGHT_TO_START_SEARCHING_FOR_CYCLES = 683 if TEST_DATA else 23_567
     winds = load_data()
-    final_height = tetris2(winds, MAX_ROCKS, HEIGHT_TO_START_SEARCHING_FOR_CYCLES)
+    with runtime_profile("search"):
+        final_height = tetris2(winds, MAX_ROCKS)
     print(f"part 2 result: {final_height}")
 
 
 if __name__ == "__main__":
-    print(f"default gc: {gc.get_threshold()}")
-    gc.set_threshold(267_829, 38_342, 16_893)
     part_2()
@@ -1,13 +1,12 @@
 import argparse
 import contextlib
-import functools
 import re
 import time
 import typing
 from io import TextIOWrapper
 
-from rich import print
-from tqdm import tqdm
+from output import print
+from utils import memory_budget, memoize
 
 VERBOSE = False
 
@@ -67,71 +66,56 @@ def load_input(indata: TextIOWrapper):
     return blueprints
 
 
-BLUEPRINT: Blueprint = None
-TOTAL_MINUTES_PART1 = 24
+# the states of a single blueprint easily take a few GB, keep the cache within half of the RAM
+CACHE_BUDGET = memory_budget(0.5)
 
 
-@functools.lru_cache(maxsize=90_000_000)
-def part1_worker_helper(robots: Robots, resources: Resources, minutes_left: int):
-    if VERBOSE:
-        print(f"minutes_left: {minutes_left}\t{robots}\t{resources}")
-
-    # if ((ci := part1_worker_helper.cache_info()).hits + ci.misses) % 200_000 == 0:
-    #     print(ci, f"{ci.hits / (ci.hits+ci.misses):.2%}")
-    if minutes_left == 0:
-        return resources.geodes, tuple()
-    geodes_when_constructed_ore_robot = 0, tuple()
-    geodes_when_constructed_clay_robot = 0, tuple()
-    geodes_when_constructed_obsidian_robot = 0, tuple()
-    geodes_when_constructed_geode_robot = 0, tuple()
-    geodes_when_no_robots_constructed = 0, tuple()
-    if resources.obsidian >= BLUEPRINT.geode_robot_cost.obsidian and resources.ore >= BLUEPRINT.geode_robot_cost.ore:
+def options(blueprint: Blueprint, robots: Robots, resources: Resources) -> list[tuple[str | None, Robots, Resources]]:
+    """Return what can be done in a minute: the robot built (None when waiting) and the robots and resources after."""
+    result = []
+    if resources.obsidian >= blueprint.geode_robot_cost.obsidian and resources.ore >= blueprint.geode_robot_cost.ore:
         new_resources = Resources(
-            ore=resources.ore - BLUEPRINT.geode_robot_cost.ore + robots.ore,
+            ore=resources.ore - blueprint.geode_robot_cost.ore + robots.ore,
             clay=resources.clay + robots.clay,
-            obsidian=resources.obsidian - BLUEPRINT.geode_robot_cost.obsidian + robots.obsidian,
+            obsidian=resources.obsidian - blueprint.geode_robot_cost.obsidian + robots.obsidian,
             geodes=resources.geodes + robots.geode,
         )
-        res = part1_worker_helper(robots._replace(geode=robots.geode + 1), new_resources, minutes_left - 1)
-        geodes_when_constructed_geode_robot = res[0], ((TOTAL_MINUTES_PART1 - minutes_left, "geode"), *res[1])
+        result.append(("geode", robots._replace(geode=robots.geode + 1), new_resources))
     if (
-        resources.clay >= BLUEPRINT.obsidian_robot_cost.clay
-        and resources.ore >= BLUEPRINT.obsidian_robot_cost.ore
+        resources.clay >= blueprint.obsidian_robot_cost.clay
+        and resources.ore >= blueprint.obsidian_robot_cost.ore
         and robots.obsidian
-        < BLUEPRINT.geode_robot_cost.obsidian  # don't build more obsidian robots than the cost of a geode robot
+        < blueprint.geode_robot_cost.obsidian  # don't build more obsidian robots than the cost of a geode robot
     ):
         new_resources = Resources(
-            ore=resources.ore - BLUEPRINT.obsidian_robot_cost.ore + robots.ore,
-            clay=resources.clay - BLUEPRINT.obsidian_robot_cost.clay + robots.clay,
+            ore=resources.ore - blueprint.obsidian_robot_cost.ore + robots.ore,
+            clay=resources.clay - blueprint.obsidian_robot_cost.clay + robots.clay,
             obsidian=resources.obsidian + robots.obsidian,
             geodes=resources.geodes + robots.geode,
         )
-        res = part1_worker_helper(robots._replace(obsidian=robots.obsidian + 1), new_resources, minutes_left - 1)
-        geodes_when_constructed_obsidian_robot = res[0], ((TOTAL_MINUTES_PART1 - minutes_left, "obsidian"), *res[1])
+        result.append(("obsidian", robots._replace(obsidian=robots.obsidian + 1), new_resources))
     # don't build more clay robots than obsidian robot cost.
-    if resources.ore >= BLUEPRINT.clay_robot_cost.ore and robots.clay < BLUEPRINT.obsidian_robot_cost.clay:
+    if resources.ore >= blueprint.clay_robot_cost.ore and robots.clay < blueprint.obsidian_robot_cost.clay:
         new_resources = Resources(
-            ore=resources.ore - BLUEPRINT.clay_robot_cost.ore + robots.ore,
+            ore=resources.ore - blueprint.clay_robot_cost.ore + robots.ore,
             clay=resources.clay + robots.clay,
             obsidian=resources.obsidian + robots.obsidian,
             geodes=resources.geodes + robots.geode,
         )
-        res = part1_worker_helper(robots._replace(clay=robots.clay + 1), new_resources, minutes_left - 1)
-        geodes_when_constructed_clay_robot = res[0], ((TOTAL_MINUTES_PART1 - minutes_left, "clay"), *res[1])
-    if resources.ore >= BLUEPRINT.ore_robot_cost.ore and robots.ore < max(
-        BLUEPRINT.ore_robot_cost.ore,
-        BLUEPRINT.clay_robot_cost.ore,
-        BLUEPRINT.obsidian_robot_cost.ore,
-        BLUEPRINT.geode_robot_cost.ore,
+        result.append(("clay", robots._replace(clay=robots.clay + 1), new_resources))
+    if resources.ore >= blueprint.ore_robot_cost.ore and robots.ore < max(
+        blueprint.ore_robot_cost.ore,
+        blueprint.clay_robot_cost.ore,
+        blueprint.obsidian_robot_cost.ore,
+        blueprint.geode_robot_cost.ore,
     ):
         new_resources = Resources(
-            ore=resources.ore - BLUEPRINT.ore_robot_cost.ore + robots.ore,
+            ore=resources.ore - blueprint.ore_robot_cost.ore + robots.ore,
             clay=resources.clay + robots.clay,
             obsidian=resources.obsidian + robots.obsidian,
             geodes=resources.geodes + robots.geode,
         )
-        res = part1_worker_helper(robots._replace(ore=robots.ore + 1), new_resources, minutes_left - 1)
-        geodes_when_constructed_ore_robot = res[0], ((TOTAL_MINUTES_PART1 - minutes_left, "ore"), *res[1])
+        result.append(("ore", robots._replace(ore=robots.ore + 1), new_resources))
 
     new_resources = Resources(
         ore=resources.ore + robots.ore,
@@ -139,25 +123,52 @@ def part1_worker_helper(robots: Robots, resources: Resources, minutes_left: int)
         obsidian=resources.obsidian + robots.obsidian,
         geodes=resources.geodes + robots.geode,
     )
-    geodes_when_no_robots_constructed = part1_worker_helper(robots, new_resources, minutes_left - 1)
+    result.append((None, robots, new_resources))
+    return result
+
+
+@memoize(context=True, max_bytes=CACHE_BUDGET)
+def part1_worker_helper(blueprint: Blueprint, robots: Robots, resources: Resources, minutes_left: int) -> int:
+    """Return the most geodes that can be opened. `explain` tells how."""
+    if VERBOSE:
+        print(f"minutes_left: {minutes_left}\t{robots}\t{resources}")
 
+    # if ((ci := part1_worker_helper.stats()).hits + ci.misses) % 200_000 == 0:
+    #     print(ci, f"{ci.hits / (ci.hits+ci.misses):.2%}")
+    if minutes_left == 0:
+        return resources.geodes
     return max(
-        geodes_when_constructed_ore_robot,
-        geodes_when_constructed_clay_robot,
-        geodes_when_constructed_obsidian_robot,
-        geodes_when_constructed_geode_robot,
-        geodes_when_no_robots_constructed,
+        part1_worker_helper(blueprint, new_robots, new_resources, minutes_left - 1)
+        for _, new_robots, new_resources in options(blueprint, robots, resources)
     )
 
 
+def explain(blueprint: Blueprint, total_minutes: int) -> list[tuple[int, str]]:
+    """Return the (minute, robot) builds of a best plan for the blueprint.
+
+    It follows the options whose value matches the best one, which are mostly still in the cache of
+    `part1_worker_helper`, so call it before clearing that.
+    """
+    plan = []
+    robots, resources = Robots(1, 0, 0, 0), Resources(0, 0, 0, 0)
+    for minutes_left in range(total_minutes, 0, -1):
+        best = part1_worker_helper(blueprint, robots, resources, minutes_left)
+        for robot, new_robots, new_resources in options(blueprint, robots, resources):
+            if part1_worker_helper(blueprint, new_robots, new_resources, minutes_left - 1) == best:
+                break
+        if robot is not None:
+            plan.append((total_minutes - minutes_left, robot))
+        robots, resources = new_robots, new_resources
+    return plan
+
+
 def part1_work(blueprint: Blueprint):
     total_minutes = 24
-    part1_worker_helper.cache_clear()
-    global BLUEPRINT
-    BLUEPRINT = blueprint
-    res = part1_worker_helper(Robots(1, 0, 0, 0), Resources(0, 0, 0, 0), total_minutes)
-    print(res[1])
-    return res[0]
+    res = part1_worker_helper(blueprint, Robots(1, 0, 0, 0), Resources(0, 0, 0, 0), total_minutes)
+    if VERBOSE:
+        print(explain(blueprint, total_minutes))
+    part1_worker_helper.cache_clear(blueprint)
+    return res
 
 
 def part1(input_file: TextIOWrapper):
@@ -182,12 +193,11 @@ def part1(input_file: TextIOWrapper):
 
 def part2_work(blueprint: Blueprint):
     total_minutes = 32
-    part1_worker_helper.cache_clear()
-    global BLUEPRINT
-    BLUEPRINT = blueprint
-    res = part1_worker_helper(Robots(1, 0, 0, 0), Resources(0, 0, 0, 0), total_minutes)
-    print(res[1])
-    return res[0]
+    res = part1_worker_helper(blueprint, Robots(1, 0, 0, 0), Resources(0, 0, 0, 0), total_minutes)
+    if VERBOSE:
+        print(explain(blueprint, total_minutes))
+    part1_worker_helper.cache_clear(blueprint)
+    return res
 
 
 def part2(input_file: TextIOWrapper):
@@ -1,7 +1,6 @@
 import math
 
-from rich import print
-from tqdm.rich import tqdm
+from output import print, tqdm
 
 VERBOSE = 1
 TEST_DATA = False
@@ -12,6 +11,14 @@ def load_input():
         return [int(line) for line in indata]
 
 
+def generate_input(scale: float, rng) -> str:
+    """A random file `scale` times the size of the real one (5000 numbers, a single 0)."""
+    size = max(2, round(5000 * scale))
+    numbers = [rng.choice((-1, 1)) * rng.randint(1, 10_000) for _ in range(size - 1)]
+    numbers.insert(rng.randrange(size), 0)
+    return "\n".join(map(str, numbers)) + "\n"
+
+
 def part_1():
     indata = load_input()
     numbers_with_original_indexes = [(num, idx) for idx, num in enumerate(indata)]
@@ -1,9 +1,8 @@
 from functools import partial
 from typing import Literal
 
-from tqdm.rich import tqdm
-from rich import print
-
+from output import print, tqdm
+from render import Palette, render, show
 from utils import Point
 
 # Map layout (map to cube side mapping)
@@ -87,26 +86,26 @@ def find_starting_point(map) -> Point:
     return Point(map[1].index(OPEN_TILE), 1)
 
 
-def print_map(map_, route_taken: list[tuple[Point, HEADING]], final_heading: HEADING):
-    canvas = []
-    for r, row in enumerate(map_):
-        canvas_row = []
-        for c, cell in enumerate(row):
-            if cell == EMPTY:
-                canvas_row.append(EMPTY)
-            elif cell == WALL:
-                canvas_row.append("[blue]\N{FULL BLOCK}[/blue]")
-            elif cell == OPEN_TILE:
-                canvas_row.append(f"[white]{OPEN_TILE}[/white]")
-        canvas.append(canvas_row)
+# the final heading is drawn in another colour than the same heading on the route, so it has its own cells
+FINAL_HEADING_CELLS = {UP: "N", DOWN: "S", LEFT: "W", RIGHT: "E"}
+MAP_PALETTE = Palette(
+    {
+        WALL: "blue",
+        OPEN_TILE: "white",
+        **{h: "green" for h in rotation},
+        **dict.fromkeys(FINAL_HEADING_CELLS.values(), "red"),
+    },
+    glyphs={WALL: "\N{FULL BLOCK}", **{cell: heading for heading, cell in FINAL_HEADING_CELLS.items()}},
+)
 
-    for point, heading in route_taken:
-        canvas[point.y][point.x] = f"[green]{heading}[/green]"
 
-    canvas[point.y][point.x] = f"[red]{final_heading}[/red]"
-    print("     " + "0123456789" * 11)
-    for r, row in enumerate(canvas):
-        print(f"{r:3}: {''.join(row)}")
+def print_map(map_, route_taken: list[tuple[Point, HEADING]], final_heading: HEADING):
+    canvas = [list(row) for row in map_]
+    for point, heading in route_taken:
+        canvas[point.y][point.x] = heading
+    canvas[point.y][point.x] = FINAL_HEADING_CELLS[final_heading]
+    width = max(len(row) for row in canvas)
+    show(render(("".join(row).ljust(width, EMPTY) for row in canvas), MAP_PALETTE))
 
 
 def move(map: list[list[str]], current_position: Point, heading: HEADING, amount: int):
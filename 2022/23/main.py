@@ -1,12 +1,10 @@
 from collections import defaultdict, deque
-from functools import partial
-from operator import attrgetter
-from typing import Literal, Optional
+from typing import Optional
 
-from tqdm.rich import tqdm
-from rich import print
-
-from utils import Point
+import stencil
+from output import print, tqdm
+from render import Palette, render, show
+from utils import OFFSETS8, bounding_box, pack, pack_offset, unpack
 
 
 VERBOSE = 0
@@ -14,70 +12,66 @@ TEST_DATA = False
 
 ELF = "#"
 EMPTY = "."
-
-
-def load_input() -> list[Point]:
+HIGHLIGHTED_ELF = "@"
+ARROWS = "\N{UPWARDS ARROW}\N{DOWNWARDS ARROW}\N{LEFTWARDS ARROW}\N{RIGHTWARDS ARROW}"
+# the highlighted elf is yellow, with an arrow too if it wants to move
+HIGHLIGHTED_ARROWS = dict(zip(ARROWS, "NSWE"))
+MAP_PALETTE = Palette(
+    {
+        ELF: "red",
+        EMPTY: "white",
+        HIGHLIGHTED_ELF: "yellow",
+        **dict.fromkeys(ARROWS, "red"),
+        **dict.fromkeys(HIGHLIGHTED_ARROWS.values(), "yellow"),
+    },
+    glyphs={HIGHLIGHTED_ELF: "\N{FULL BLOCK}", **{cell: arrow for arrow, cell in HIGHLIGHTED_ARROWS.items()}},
+)
+
+# N, NE, NW == (0, -1), (-1, -1), (1, -1)
+MOVE_DIRECTIONS = [
+    # where to move; what directions to check before moving
+    ((0, -1), ((0, -1), (-1, -1), (1, -1))),  # N
+    ((0, 1), ((0, 1), (-1, 1), (1, 1))),      # S
+    ((-1, 0), ((-1, 0), (-1, -1), (-1, 1))),  # W
+    ((1, 0), ((1, 0), (1, -1), (1, 1))),      # E
+]
+
+
+def load_input() -> set[int]:
+    """Return the packed positions of the elves."""
     elf_input = "#"
     with open("test_input.txt" if TEST_DATA else "input.txt") as indata:
-        elves: list[Point] = []
+        elves: set[int] = set()
         for row_idx, line in enumerate(indata):
             line = line.strip()
             if line == "":
                 break
-            elves.extend(Point(col, row_idx) for col, spot in enumerate(line) if spot == elf_input)
+            elves.update(pack(col, row_idx) for col, spot in enumerate(line) if spot == elf_input)
 
     return elves
 
 
-def print_map(map_: defaultdict[int, defaultdict[int, Point | None]], highlight: Optional[Point] = None, want_to_move_to = None):
-    canvas = []
-    min_x = 0
-    max_x = 0
-    min_y = 0
-    max_y = 0
-    for x in map_:
-        for y in map_[x]:
-            if y > max_y:
-                max_y = y
-            if y < min_y:
-                min_y = y
-        if x > max_x:
-            max_x = x
-        if x < min_x:
-            min_x = x
-    for y in range(min_y, max_y + 1):
-        canvas_row = []
-        for x in range(min_x, max_x + 1):
-            if y in map_[x] and map_[x][y] is not None:
-                if highlight and highlight == Point(x, y):
-                    canvas_row.append("[yellow]\N{FULL BLOCK}[/yellow]")
-                else:
-                    canvas_row.append("[red]#[/red]")
-            else:
-                canvas_row.append(f"[white]{EMPTY}[/white]")
-        canvas.append(canvas_row)
+def print_map(elves: set[int], highlight: Optional[int] = None, want_to_move_to = None):
+    top_left, bottom_right = bounding_box(elves)
+    min_x, min_y = min(top_left.x, 0), min(top_left.y, 0)
+    max_x, max_y = max(bottom_right.x, 0), max(bottom_right.y, 0)
+    width = max_x - min_x + 1
+    canvas = [bytearray(EMPTY * width, "ascii") for _ in range(max_y - min_y + 1)]
+    for elf in elves:
+        x, y = unpack(elf)
+        canvas[y - min_y][x - min_x] = ord(HIGHLIGHTED_ELF if elf == highlight else ELF)
+    rows = [row.decode() for row in canvas]
 
     want_to_move_to = want_to_move_to or {}
-    for elves in want_to_move_to.values():
-        for elf, arrow in elves:
-            y = elf.y - min_y
-            x = elf.x-min_x
-            if highlight and highlight == Point(x, y):
-                canvas[y][x] = f"[yellow]{arrow}[/yellow]"
-            else:
-                canvas[y][x] = f"[red]{arrow}[/red]"
-
-    if min_x < 0:
-        negatives = "9876543210" * 4
-        negatives = f"[purple]-{negatives[min_x - 1 :]}[/purple]"
-    else:
-        negatives = " 0"
-
-    print(f"    {negatives}" + "123456789" * 4)
-    r = min_y
-    for row in canvas:
-        print(f"{r:3}: {''.join(row)}")
-        r += 1
+    for moving_elves in want_to_move_to.values():
+        for elf, arrow in moving_elves:
+            x, y = unpack(elf)
+            row = rows[y - min_y]
+            arrow = HIGHLIGHTED_ARROWS[arrow] if elf == highlight else arrow
+            rows[y - min_y] = row[: x - min_x] + arrow + row[x - min_x + 1 :]
+
+    show(render(rows, MAP_PALETTE, first_row=min_y, first_column=min_x))
+
 
 def direction_to_arrow(direction: tuple[int, int]):
     match direction:
@@ -91,162 +85,131 @@ def direction_to_arrow(direction: tuple[int, int]):
             return "\N{RIGHTWARDS ARROW}"
 
 
+def play_round(elves: set[int], possible_move_directions: deque) -> bool:
+    """Move the elves (in place) and rotate the move directions, return if any elf moved."""
+    # the directions as packed offsets, in the current order
+    directions = [
+        (pack_offset(*direction), [pack_offset(*subdir) for subdir in to_check], direction)
+        for direction, to_check in possible_move_directions
+    ]
+    want_to_move_to = defaultdict(list)
+    for elf in elves:
+        if VERBOSE > 1:
+            print_map(elves, elf, want_to_move_to)
+        if not any(elf + offset in elves for offset in OFFSETS8):
+            continue
+        # this elf wants to move
+        for offset, to_check, direction in directions:
+            if any(elf + subdir in elves for subdir in to_check):
+                continue
+            # no other elf there, move in that direction
+            want_to_move_to[elf + offset].append((elf, direction_to_arrow(direction)))
+            break
+        else:
+            if VERBOSE > 1:
+                print(f"The elf at {unpack(elf)} wants to move but has nowhere to go")
+    # move all the elves that want to move
+    if VERBOSE:
+        print(want_to_move_to)
+
+    for destination, moving_elves in want_to_move_to.items():
+        if len(moving_elves) > 1:
+            # more than 1 elf wants to move to this destination, no one moves.
+            continue
+        # move the elf to this destination
+        elves.remove(moving_elves[0][0])
+        elves.add(destination)
+    possible_move_directions.rotate(-1)
+    return bool(want_to_move_to)
+
+
+def elves_layer(elves: set[int]):
+    """The elves as a `stencil` layer, with the bounding box of the elves as the grid."""
+    top_left, bottom_right = bounding_box(elves)
+    layer = stencil.np.zeros((bottom_right.y - top_left.y + 1, bottom_right.x - top_left.x + 1), dtype=bool)
+    for elf in elves:
+        x, y = unpack(elf)
+        layer[y - top_left.y, x - top_left.x] = True
+    return layer
+
+
+def play_round_on_layer(elves, possible_move_directions: deque):
+    """`play_round` on a `stencil` layer of the elves, all of them at once. Return the new layer and if any moved."""
+    elves, _, _ = stencil.with_margin(elves)
+    wants_to_move = elves & stencil.any_neighbour(elves, stencil.OFFSETS8)
+    moves = [
+        (*direction, wants_to_move & ~stencil.any_neighbour(elves, to_check))
+        for direction, to_check in possible_move_directions
+    ]
+    elves, moved = stencil.move_agents(elves, moves)
+    possible_move_directions.rotate(-1)
+    return elves, moved > 0
+
+
+def empty_ground(elves) -> int:
+    """The empty cells in the bounding box of the elves of the layer."""
+    ys, xs = stencil.np.nonzero(elves)
+    return (ys.max() - ys.min() + 1) * (xs.max() - xs.min() + 1) - len(ys)
+
+
 def part_1():
     elves = load_input()
-    map_ = generate_map(elves)
     num_rounds = 10
+    if stencil.AVAILABLE and not VERBOSE:
+        elves = elves_layer(elves)
+        possible_move_directions = deque(MOVE_DIRECTIONS)
+        for _ in range(num_rounds):
+            elves, _ = play_round_on_layer(elves, possible_move_directions)
+        print(empty_ground(elves))
+        return
     if VERBOSE:
-        print_map(map_)
-
-    # N, NE, NW == (0, -1), (-1, -1), (1, -1)
-    possible_move_directions = deque(
-        [
-            # where to move; what directions to check before moving
-            ((0, -1), ((0, -1), (-1, -1), (1, -1))),  # N
-            ((0, 1), ((0, 1), (-1, 1), (1, 1))),      # S
-            ((-1, 0), ((-1, 0), (-1, -1), (-1, 1))),  # W
-            ((1, 0), ((1, 0), (1, -1), (1, 1))),      # E
-        ]
-    )
+        print_map(elves)
 
+    possible_move_directions = deque(MOVE_DIRECTIONS)
     for round_num in tqdm(range(num_rounds)):
-        want_to_move_to = defaultdict(list)
         if VERBOSE:
             print(f"Round {round_num + 1}, move directions: {[direction_to_arrow(d[0]) for d in possible_move_directions]}")
-            print_map(map_)
-        for elf in elves:
-            if VERBOSE > 1:
-                print_map(map_, elf, want_to_move_to)
-            has_neighbours = any(
-                map_[x][y] is not None
-                for x in range(elf.x - 1, elf.x + 2)
-                for y in range(elf.y - 1, elf.y + 2)
-                if Point(x, y) != elf
-            )
-            if has_neighbours:
-                # this elf wants to move
-                for direction, to_check in possible_move_directions:
-                    next_direction = any(map_[elf.x + subdir[0]][elf.y + subdir[1]] is not None for subdir in to_check)
-                    if next_direction:
-                        continue
-                    # no other elf there, move in that direction
-                    want_to_move_to[(elf.x + direction[0], elf.y + direction[1])].append((elf, direction_to_arrow(direction)))
-                    break
-                else:
-                    if VERBOSE > 1:
-                        print(f"The elf at {elf} wants to move but has nowhere to go")
-        # move all the elves that want to move
-        if VERBOSE:
-            print(want_to_move_to)
-
-        for destination, moving_elves in want_to_move_to.items():
-            if len(moving_elves) > 1:
-                # more than 1 elf wants to move to this destination, no one moves.
-                continue
-            # move the elf to this destination
-            new_elf = Point(*destination)
-            elf_idx = elves.index(moving_elves[0][0])
-            elves[elf_idx] = new_elf
-
-        map_ = generate_map(elves)
-        possible_move_directions.rotate(-1)
+            print_map(elves)
+        play_round(elves, possible_move_directions)
         if VERBOSE:
             print(f"End of Round {round_num + 1}")
-            print_map(map_)
+            print_map(elves)
 
     # calculate number of empty ground
-    min_x = 0
-    max_x = 0
-    min_y = 0
-    max_y = 0
-    for x in map_:
-        for y in map_[x]:
-            if y > max_y:
-                max_y = y
-            if y < min_y:
-                min_y = y
-        if x > max_x:
-            max_x = x
-        if x < min_x:
-            min_x = x
-    print(sum(1 if map_[x][y] is None else 0 for x in range(min_x, max_x+1) for y in range(min_y,max_y+1)))
-
-
-
-def generate_map(elves: list[Point]) -> defaultdict[int, defaultdict[int, Point | None]]:
-    map_: defaultdict[int, defaultdict[int, Point | None]] = defaultdict(lambda: defaultdict(lambda: None))
-    for elf in elves:
-        map_[elf.x][elf.y] = elf
-    return map_
+    top_left, bottom_right = bounding_box(elves)
+    area = (bottom_right.x - top_left.x + 1) * (bottom_right.y - top_left.y + 1)
+    print(area - len(elves))
+
 
 def part_2():
     elves = load_input()
-    map_ = generate_map(elves)
-    num_rounds = 10
+    if stencil.AVAILABLE and not VERBOSE:
+        elves = elves_layer(elves)
+        possible_move_directions = deque(MOVE_DIRECTIONS)
+        round_num = 1
+        while True:
+            elves, moved = play_round_on_layer(elves, possible_move_directions)
+            if not moved:
+                print(f"No elf want to move on round {round_num}.")
+                return
+            round_num += 1
     if VERBOSE:
-        print_map(map_)
-
-    # N, NE, NW == (0, -1), (-1, -1), (1, -1)
-    possible_move_directions = deque(
-        [
-            # where to move; what directions to check before moving
-            ((0, -1), ((0, -1), (-1, -1), (1, -1))),  # N
-            ((0, 1), ((0, 1), (-1, 1), (1, 1))),      # S
-            ((-1, 0), ((-1, 0), (-1, -1), (-1, 1))),  # W
-            ((1, 0), ((1, 0), (1, -1), (1, 1))),      # E
-        ]
-    )
+        print_map(elves)
 
+    possible_move_directions = deque(MOVE_DIRECTIONS)
     round_num = 0
     while True:
         round_num +=1
-        want_to_move_to = defaultdict(list)
         if VERBOSE:
             print(f"Round {round_num}, move directions: {[direction_to_arrow(d[0]) for d in possible_move_directions]}")
-            print_map(map_)
-        for elf in elves:
-            if VERBOSE > 1:
-                print_map(map_, elf, want_to_move_to)
-            has_neighbours = any(
-                map_[x][y] is not None
-                for x in range(elf.x - 1, elf.x + 2)
-                for y in range(elf.y - 1, elf.y + 2)
-                if Point(x, y) != elf
-            )
-            if has_neighbours:
-                # this elf wants to move
-                for direction, to_check in possible_move_directions:
-                    next_direction = any(map_[elf.x + subdir[0]][elf.y + subdir[1]] is not None for subdir in to_check)
-                    if next_direction:
-                        continue
-                    # no other elf there, move in that direction
-                    want_to_move_to[(elf.x + direction[0], elf.y + direction[1])].append((elf, direction_to_arrow(direction)))
-                    break
-                else:
-                    if VERBOSE > 1:
-                        print(f"The elf at {elf} wants to move but has nowhere to go")
-        # move all the elves that want to move
-        if VERBOSE:
-            print(want_to_move_to)
-
-        if not want_to_move_to:
+            print_map(elves)
+        if not play_round(elves, possible_move_directions):
             print(f"No elf want to move on round {round_num}.")
             return
-        for destination, moving_elves in want_to_move_to.items():
-            if len(moving_elves) > 1:
-                # more than 1 elf wants to move to this destination, no one moves.
-                continue
-            # move the elf to this destination
-            new_elf = Point(*destination)
-            elf_idx = elves.index(moving_elves[0][0])
-            elves[elf_idx] = new_elf
-
-        map_ = generate_map(elves)
-        possible_move_directions.rotate(-1)
         print(f"End of Round {round_num}")
         if VERBOSE:
             print(f"End of Round {round_num}")
-            print_map(map_)
+            print_map(elves)
 
 
 
@@ -1,18 +1,19 @@
-import heapq
-from collections import defaultdict, deque
-from dataclasses import dataclass, field
-from typing import Iterable
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import NamedTuple
 
-from rich import print
-
-from utils import Point, Point3d
+import stencil
+from cache import cached_graph
+from output import print
+from utils import Graph, GraphBuilder, Point, Point3d
 
 VERBOSE = 1
 TEST_DATA = False
 
 EMPTY = "."
 WALL = "#"
-MAX_TIME = 512
+# bump when generate_all_snapshots changes, the cached graphs are keyed by it
+SNAPSHOTS_VERSION = 2
 
 if TEST_DATA:
     ...
@@ -20,9 +21,17 @@ else:
     ...
 
 
-def load_input() -> list[list[str]]:
-    with open("test_input.txt" if TEST_DATA else "input.txt") as indata:
-        valey_map = [list(line.strip()) for line in indata]
+class Valley(NamedTuple):
+    valey_map: list[list[str]]
+    winds: dict[Point, str]
+    start: Point
+    end: Point
+    # the moves through the valley, see `generate_all_snapshots`; None when the `stencil` takes care of the moves
+    graph: Graph | None
+
+
+def load_input(lines: Iterable[str]) -> tuple[list[list[str]], dict[Point, str]]:
+    valey_map = [list(line.strip()) for line in lines if line.strip()]
 
     winds = {}
     for r, row in enumerate(valey_map):
@@ -33,6 +42,20 @@ def load_input() -> list[list[str]]:
     return valey_map, winds
 
 
+def parse(buf: bytes) -> Valley:
+    valey_map, winds = load_input(buf.decode().splitlines())
+    start, end = find_starting_point(valey_map)
+    if stencil.AVAILABLE:
+        return Valley(valey_map, winds, start, end, None)
+    graph = cached_graph(
+        "2022/24 snapshots",
+        SNAPSHOTS_VERSION,
+        (["".join(row) for row in valey_map], start, end),
+        lambda: generate_all_snapshots(valey_map, winds, start, end),
+    )
+    return Valley(valey_map, winds, start, end, graph)
+
+
 def find_starting_point(valey_map):
     for idx, cell in enumerate(valey_map[0]):
         if cell == EMPTY:
@@ -78,24 +101,13 @@ def lcm(a, b):
     return (a * b) // gcd(a, b)
 
 
-@dataclass
-class Node:
-    coordinates: Point3d
-    links: list[Point3d] = field(default_factory=list)
-
-    def __lt__(self, other):
-        if not isinstance(other, Node):
-            return NotImplemented
-        return self.coordinates < other.coordinates
+def generate_all_snapshots(valey_map, winds: dict[Point, str], start: Point, end: Point) -> Graph:
+    """Return the graph of the moves through the valley in time.
 
-
-def generate_all_snapshots(
-    valey_map,
-    winds: dict[Point, str],
-    start: Point,
-    end: Point,
-    starting_wind_cycle: int = 0,
-):
+    The winds repeat every ``lcm(height, width)`` minutes, so that many snapshots of the valley are enough: the
+    node of (x, y) at minute t is ``(t % period) * plane + y * row_len + x`` and the last snapshot leads back to the
+    first one. Both the start and the end can be walked in and out of, so the one graph serves every trip.
+    """
     map_width = len(valey_map[0]) - 2  # substract the borders
     map_height = len(valey_map) - 2
     number_of_wind_cycles = lcm(map_height, map_width)
@@ -121,24 +133,23 @@ def generate_all_snapshots(
                 assert wind not in wind_cycles[i][new_coord]
                 wind_cycles[i][new_coord].append(wind)
 
-    wind_cycles = deque(wind_cycles)
-    wind_cycles.rotate(-starting_wind_cycle)
-
-    nodes: list[Node] = []
+    # now generate the graph of possible moves, node id of (x, y) at time i is `i * plane + y * row_len + x`
+    row_len = map_width + 2
+    plane = row_len * (map_height + 2)
+    builder = GraphBuilder(number_of_wind_cycles * plane)
     top_point = start if start.y == 0 else end
     bottom_point = end if end.y == map_height + 1 else start
-    # now generate the graph of possible moves
     neighbours = (Point(-1, 0), Point(1, 0), Point(0, -1), Point(0, 1))
-    for i in range(MAX_TIME):
-        next_cycle = (i + 1) % len(wind_cycles)
+    for i in range(number_of_wind_cycles):
+        next_cycle = (i + 1) % number_of_wind_cycles
         for x in range(1, map_width + 1):
             for y in range(0, map_height + 2):
                 if (y == 0 and x != top_point.x) or (y == map_height + 1 and x != bottom_point.x):
                     continue
-                node = Node(Point3d(x, y, i))
+                node = i * plane + y * row_len + x
                 point = Point(x, y)
-                if point not in wind_cycles[next_cycle] and i + 1 < MAX_TIME:
-                    node.links.append(Point3d(x, y, i + 1))
+                if point not in wind_cycles[next_cycle]:
+                    builder.add_edge(node, next_cycle * plane + y * row_len + x)
                 for neighbour in neighbours:
                     n = point + neighbour
                     if (
@@ -147,130 +158,106 @@ def generate_all_snapshots(
                         and (n.x != end.x or n.y != end.y)
                     ):
                         continue
-                    if n not in wind_cycles[next_cycle] and i + 1 < MAX_TIME:
-                        node.links.append(Point3d(n.x, n.y, i + 1))
-                # if node.links:
-                for link in node.links:
-                    assert link != node.coordinates
-                nodes.append(node)
-        # handle start & end
-    start_nodes = [
-        n for n in nodes if n.coordinates.x == start.x and n.coordinates.y == start.y and n.coordinates.z == 0
+                    if n not in wind_cycles[next_cycle]:
+                        builder.add_edge(node, next_cycle * plane + n.y * row_len + n.x)
+
+    return builder.build()
+
+
+def free_cells(valey_map):
+    """Return a function giving the `stencil` layer of the cells free of walls and winds at a minute.
+
+    Each wind direction is a layer of the inside of the valley that just rolls around with the minutes.
+    """
+    np = stencil.np
+    rows = ["".join(row) for row in valey_map]
+    walls = stencil.layer(rows, WALL)
+    winds = {wind: stencil.layer(rows, wind)[1:-1, 1:-1] for wind in "^v<>"}
+
+    def free_at(minute: int):
+        blown = (
+            np.roll(winds["^"], -minute, axis=0)
+            | np.roll(winds["v"], minute, axis=0)
+            | np.roll(winds["<"], -minute, axis=1)
+            | np.roll(winds[">"], minute, axis=1)
+        )
+        free = ~walls
+        free[1:-1, 1:-1] &= ~blown
+        return free
+
+    return free_at
+
+
+def walk_through(valley: Valley, start: Point, end: Point, start_time: int = 0) -> list[Point3d]:
+    """`find_shortest_path` with the `stencil`: all the places the expedition can be at are moved a minute at once."""
+    free_at = free_cells(valley.valey_map)
+    positions = stencil.np.zeros_like(free_at(0))
+    positions[start.y, start.x] = True
+    # the places of every minute, to walk back the way to the end
+    reached = [positions]
+    minute = start_time
+    while not positions[end.y, end.x]:
+        minute += 1
+        positions = stencil.spread(positions) & free_at(minute)
+        if not positions.any():
+            raise ValueError(f"{end} can't be reached from {start}")
+        reached.append(positions)
+
+    path = [Point3d(end.x, end.y, minute)]
+    x, y = end.x, end.y
+    for earlier in reversed(reached[:-1]):
+        x, y = next(
+            (x + dx, y + dy)
+            for dx, dy in ((0, 0), *stencil.OFFSETS4)
+            if 0 <= y + dy < earlier.shape[0] and 0 <= x + dx < earlier.shape[1] and earlier[y + dy, x + dx]
+        )
+        path.append(Point3d(x, y, path[-1].z - 1))
+    # without the start
+    return path[-2::-1]
+
+
+def find_shortest_path(valley: Valley, start: Point, end: Point, start_time: int = 0) -> list[Point3d]:
+    """Return the points (without the start) on the quickest way from start to end leaving at `start_time`.
+
+    The z of a point is the minute it is reached at.
+    """
+    if valley.graph is None:
+        return walk_through(valley, start, end, start_time)
+    row_len = len(valley.valey_map[0])
+    plane = row_len * len(valley.valey_map)
+    period = valley.graph.num_nodes // plane
+    start_node = (start_time % period) * plane + start.y * row_len + start.x
+    end_nodes = [i * plane + end.y * row_len + end.x for i in range(period)]
+    # every step takes a minute so the first end node reached is the quickest one
+    paths = valley.graph.dijkstra([start_node], targets=end_nodes, all_targets=False)
+    end_node = min((node for node in end_nodes if paths.reached(node)), key=lambda node: paths.distance[node])
+    path = paths.path_to(end_node)[1:]
+    return [
+        Point3d(x, y, start_time + minute)
+        for minute, (y, x) in enumerate((divmod(node % plane, row_len) for node in path), start=1)
     ]
-    end_nodes = [n for n in nodes if n.coordinates.x == end.x and n.coordinates.y == end.y]
-    assert len(start_nodes) == 1
-    # assert len(end_nodes) == number_of_wind_cycles + 1
-    return nodes, start_nodes[0], end_nodes
-
-
-def dijkstra(nodes: Iterable[Node], start: Node, end_nodes: Iterable[Node]) -> dict[Point3d, Node]:
-    graph = {node.coordinates: node for node in nodes}
-    distance = defaultdict(lambda: 99_999_999)
-    distance[start.coordinates] = 0
-    parent: dict[Point3d, Node] = {start.coordinates: None}
-    queue: list[tuple[int, Node]] = [(0, start)]
-    for end_node in end_nodes:
-        heapq.heappush(queue, (9999_9999_9999_9999, end_node))
-    while queue:
-        unused_dist, u = heapq.heappop(queue)
-        for link in u.links:
-            if distance[link] > distance[u.coordinates] + 1:
-                distance[link] = distance[u.coordinates] + 1
-                parent[link] = u
-                heapq.heappush(queue, (distance[link], graph[link]))
-    return parent
-
-
-def part_1():
-    valey_map, winds = load_input()
-    start, end = find_starting_point(valey_map)
-    # print_map(valey_map, winds)
-    nodes, start_node, end_nodes = generate_all_snapshots(valey_map, winds, start, end)
-    parents = dijkstra(nodes, start_node, end_nodes)
-    paths = {}
-    for end_node in end_nodes:
-        end_node = end_node.coordinates
-        if end_node in parents:
-            paths[end_node] = []
-            node = end_node
-            while parents[node]:
-                paths[end_node].append(node)
-                node = parents[node].coordinates
-            paths[end_node].reverse()
-            print(f"Found a way to {end_node}")
-        else:
-            print(f"No way to {end_node}")
-
-    shortest = min(paths.values(), key=len)
+
+
+def part1(valley: Valley) -> int:
+    shortest = find_shortest_path(valley, valley.start, valley.end)
     print(f"shortest path: {len(shortest)} {shortest}")
+    return len(shortest)
 
 
-def part_2():
-    valey_map, winds = load_input()
-    start, end = find_starting_point(valey_map)
-    # print_map(valey_map, winds)
-    nodes, start_node, end_nodes = generate_all_snapshots(valey_map, winds, start, end)
-    parents = dijkstra(nodes, start_node, end_nodes)
-    paths = {}
-    for end_node in end_nodes:
-        end_node = end_node.coordinates
-        if end_node in parents:
-            paths[end_node] = []
-            node = end_node
-            while parents[node]:
-                paths[end_node].append(node)
-                node = parents[node].coordinates
-            paths[end_node].reverse()
-            if VERBOSE > 1:
-                print(f"Found a way to {end_node}")
-        else:
-            print(f"No way to {end_node}")
-
-    shortest = min(paths.values(), key=len)
+def part2(valley: Valley) -> int:
+    shortest = find_shortest_path(valley, valley.start, valley.end)
     print(f"shortest path: {len(shortest)} {shortest}")
 
-    nodes, start_node, end_nodes = generate_all_snapshots(valey_map, winds, end, start, len(shortest))
-    parents = dijkstra(nodes, start_node, end_nodes)
-    paths = {}
-    for end_node in end_nodes:
-        end_node = end_node.coordinates
-        if end_node in parents:
-            paths[end_node] = []
-            node = end_node
-            while parents[node]:
-                paths[end_node].append(node)
-                node = parents[node].coordinates
-            paths[end_node].reverse()
-            if VERBOSE > 1:
-                print(f"Found a way to {end_node}")
-        else:
-            print(f"No way to {end_node}")
-
-    shortest2 = min(paths.values(), key=len)
+    shortest2 = find_shortest_path(valley, valley.end, valley.start, len(shortest))
     print(f"shortest path: {len(shortest2)} {shortest2}")
 
-    nodes, start_node, end_nodes = generate_all_snapshots(valey_map, winds, start, end, len(shortest) + len(shortest2))
-    parents = dijkstra(nodes, start_node, end_nodes)
-    paths = {}
-    for end_node in end_nodes:
-        end_node = end_node.coordinates
-        if end_node in parents:
-            paths[end_node] = []
-            node = end_node
-            while parents[node]:
-                paths[end_node].append(node)
-                node = parents[node].coordinates
-            paths[end_node].reverse()
-            if VERBOSE > 1:
-                print(f"Found a way to {end_node}")
-        else:
-            print(f"No way to {end_node}")
-
-    shortest3 = min(paths.values(), key=len)
+    shortest3 = find_shortest_path(valley, valley.start, valley.end, len(shortest) + len(shortest2))
     print(f"shortest path: {len(shortest3)} {shortest3}")
 
-    print(f"Part 2 answer: {len(shortest) + len(shortest2) + len(shortest3)}")
+    return len(shortest) + len(shortest2) + len(shortest3)
 
 
 if __name__ == "__main__":
-    part_2()
+    with open("test_input.txt" if TEST_DATA else "input.txt", "rb") as input_file:
+        valley = parse(input_file.read())
+    print(f"Part 2 answer: {part2(valley)}")
@@ -2,9 +2,7 @@ from functools import partial
 from operator import itemgetter
 from typing import Literal
 
-from tqdm.rich import tqdm
-from rich import print
-
+from output import print
 from utils import Point
 
 
@@ -1,9 +1,8 @@
-import re
 import dataclasses
 from typing import NamedTuple
 from collections.abc import Iterable, Sequence
-import itertools
-import tqdm
+
+from utils import IntervalMap, IntervalSet, blocks, ints
 
 
 class RangeMap(NamedTuple):
@@ -31,6 +30,9 @@ class Mapping:
                 return range.dest + dest_idx
         raise KeyError(f"{idx=} not found in {self.ranges}")
 
+    def interval_map(self) -> IntervalMap:
+        return IntervalMap((r.source, r.source + r.length, r.dest - r.source) for r in self.ranges)
+
 
 def get_location_from_seed(seed: int, mappings, type_mappings: dict[str, str]) -> int:
     current_type = "seed"
@@ -45,152 +47,58 @@ def get_location_from_seed(seed: int, mappings, type_mappings: dict[str, str]) -
     return current_value
 
 
-def part1():
-    value = 0
-    seeds = []
-    current_ranges = []
+class Almanac(NamedTuple):
+    seeds: tuple[int, ...]
+    # source type -> destination type
+    type_mappings: dict[str, str]
+    # source type -> its mapping
+    mappings: dict[str, Mapping]
+
+
+def parse(buf: bytes) -> Almanac:
+    seeds_block, *mapping_blocks = blocks(buf)
+    seeds = tuple(ints(seeds_block.split(b":")[1]))
     type_mappings = {}
     mappings = {}
-
-    def commit_mapping():
-        nonlocal current_ranges
-        if current_ranges:
-            m = Mapping(ranges=current_ranges, source_type=mapping_from, dest_type=mapping_to)
-            mappings[mapping_from] = m
-            current_ranges = []
-
-    for line in open("input.txt").readlines():
-        line = line.strip()
-        if line.startswith("seeds:"):
-            seeds = [int(x) for x in line.split(":")[1].split()]
-        elif ":" in line:
-            mapping_from, mapping_to = line.split()[0].split("-to-")
-            type_mappings[mapping_from] = mapping_to
-        elif line:  # not empty line - a range
-            dest_start, source_start, length = [int(x) for x in line.split()]
-            r = RangeMap(source=source_start, dest=dest_start, length=length)
-            current_ranges.append(r)
-        else:  # empty line
-            commit_mapping()
-
-    commit_mapping()
-    lowest_location = 2**2048
-    for seed in seeds:
-        if (
-            seed_location := get_location_from_seed(seed, mappings=mappings, type_mappings=type_mappings)
-        ) < lowest_location:
-            lowest_location = seed_location
-
-    print(f"The value is {lowest_location}")
+    for block in mapping_blocks:
+        header, _, numbers = block.partition(b"\n")
+        mapping_from, mapping_to = header.split()[0].decode().split("-to-")
+        type_mappings[mapping_from] = mapping_to
+        numbers = ints(numbers)
+        ranges = [
+            RangeMap(source=source_start, dest=dest_start, length=length)
+            for dest_start, source_start, length in zip(numbers[::3], numbers[1::3], numbers[2::3])
+        ]
+        if ranges:
+            mappings[mapping_from] = Mapping(ranges=ranges, source_type=mapping_from, dest_type=mapping_to)
+    return Almanac(seeds, type_mappings, mappings)
+
+
+def part1(almanac: Almanac) -> int:
+    return min(
+        get_location_from_seed(seed, mappings=almanac.mappings, type_mappings=almanac.type_mappings)
+        for seed in almanac.seeds
+    )
 
 
 ################################################################################
 
 
-def range_intersection(range_a: tuple[int, int], range_b: tuple[int, int]):
-    """Return the result of intersection of 2 ranges of numbers.
-
-    The ranges are interpreted as (start, length).
-
-    Returns three values:
-    - a range before the intersection (or None)
-    - the intersection (or None)
-    - the range after the intersection (or None)
-    """
-    if range_a[0] > range_b[0]:
-        range_a, range_b = range_b, range_a
-
-    range_a_start = range_a[0]
-    range_b_start = range_b[0]
-    range_a_end = range_a[0] + range_a[1] - 1
-    range_b_end = range_b[0] + range_b[1] - 1
-
-    def start_end_to_start_length(start: int, end: int):
-        return start, end - start + 1
-
-    intersection_start = max(range_a_start, range_b_start)
-    intersection_end = min(range_a_end, range_b_end)
-
-    if intersection_start > intersection_end:
-        return range_a, None, range_b
-
-    intersection = start_end_to_start_length(intersection_start, intersection_end)
-
-    if range_a_start < intersection_start:
-        before_start = range_a_start
-        before_end = intersection_start - 1
-        assert before_start <= before_end
-        before = start_end_to_start_length(before_start, before_end)
-    else:
-        before = None
-
-    if intersection_end < range_a_end or intersection_end < range_b_end:
-        after_start = intersection_end + 1
-        after_end = max(range_a_end, range_b_end)
-        after = start_end_to_start_length(after_start, after_end)
-    else:
-        after = None
-
-    return before, intersection, after
-
-
-def part2():
-    value = 0
-    seeds = []
-    current_ranges = []
-    type_mappings = {}
-    mappings: dict[str, Mapping] = {}
-
-    def commit_mapping():
-        nonlocal current_ranges
-        if current_ranges:
-            m = Mapping(ranges=current_ranges, source_type=mapping_from, dest_type=mapping_to)
-            mappings[mapping_from] = m
-            current_ranges = []
-
-    for line in open("input.txt").readlines():
-        line = line.strip()
-        if line.startswith("seeds:"):
-            seeds = [int(x) for x in line.split(":")[1].split()]
-        elif ":" in line:
-            mapping_from, mapping_to = line.split()[0].split("-to-")
-            type_mappings[mapping_from] = mapping_to
-        elif line:  # not empty line - a range
-            dest_start, source_start, length = [int(x) for x in line.split()]
-            r = RangeMap(source=source_start, dest=dest_start, length=length)
-            current_ranges.append(r)
-        else:  # empty line
-            commit_mapping()
-
-    commit_mapping()
-    lowest_location = 2**2048
-
-    for seed_start, length in tqdm.tqdm(itertools.batched(seeds, 2)):
-        current_type = "seed"
-        current_ranges = [(seed_start, length)]
-        # target_type = type_mappings[current_type]
-        while current_type != "location":
-            mapped_ranges = []
-            unmapped_ranges = []
-            for target_range in mappings[current_type].ranges:
-                for current_range in current_ranges:
-                    # TODO: mając mapowania z jednego typu na drugi, może dojść do sytuacji, gdy tylko część zakresu zostanie zmapowana (intersection) a pozostałe trafią do before lub after.
-                    # ale nawet wtedy mogą być zmapowane przez inne mapowania tego typu. trzeba sprawdzić wszystkie możliwości. a to co zostanie, jest przenoszone bezpośrednio (source=dest)
-                    before, intersection, after = range_intersection(
-                        current_range, (target_range.source, target_range.length)
-                    )
-                    if before:
-                        new_ranges.append(before)
-                    if after:
-                        new_ranges.append(after)
-
-            current_ranges = new_ranges
-            current_type = type_mappings[current_type]
-        if (new_lowest := min(current_ranges, key=lambda x: x[0])) < lowest_location:
-            lowest_location = new_lowest
-
-    print(f"The value is {lowest_location}")
+def part2(almanac: Almanac) -> int:
+    seeds = almanac.seeds
+    # push whole seed ranges through the chain of mappings instead of single seeds
+    current_ranges = IntervalSet.from_ranges(zip(seeds[::2], seeds[1::2]))
+    current_type = "seed"
+    while current_type != "location":
+        current_ranges = almanac.mappings[current_type].interval_map().map(current_ranges)
+        current_type = almanac.type_mappings[current_type]
+    return current_ranges.min()
 
 
 if __name__ == "__main__":
-    part2()
+    import sys
+
+    with open(sys.argv[1] if len(sys.argv) > 1 else "input.txt", "rb") as input_file:
+        almanac = parse(input_file.read())
+    print(f"Part 1: {part1(almanac)}")
+    print(f"Part 2: {part2(almanac)}")
@@ -3,7 +3,7 @@ import dataclasses
 from typing import NamedTuple
 from collections.abc import Iterable, Sequence
 import itertools
-import tqdm
+from output import tqdm, trange
 
 class Race(NamedTuple):
     time: int
@@ -24,9 +24,9 @@ def part1():
     value = 1
     races = load_races()
     
-    for race in tqdm.tqdm(races):
+    for race in tqdm(races):
         how_long_to_press_to_win = []
-        for i in tqdm.trange(1, race.time):
+        for i in trange(1, race.time):
             if i * (race.time-i) > race.distance:
                 how_long_to_press_to_win.append(i)
         print(f"Ways to win {race=}: {how_long_to_press_to_win}")
@@ -47,7 +47,7 @@ def part2():
             distance = int( "".join(line.removeprefix("Distance:").split()))
     
     how_long_to_press_to_win = []
-    for i in tqdm.trange(1, time):
+    for i in trange(1, time):
         if i * (time-i) > distance:
             how_long_to_press_to_win.append(i)
     print(f"Ways to win race: {how_long_to_press_to_win}")
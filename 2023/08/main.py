@@ -4,7 +4,7 @@ from typing import NamedTuple
 from collections.abc import Iterable, Sequence
 import itertools
 import functools
-import tqdm
+from output import tqdm
 
 from math import lcm
 
@@ -61,7 +61,7 @@ def part2():
 
     instructions = [0 if i == "L" else 1 for i in instructions]
     # current_nodes = [n for n in nodes if n.endswith("A")]
-    # for idx, instruction in tqdm.tqdm(enumerate(itertools.cycle(instructions), 1)):
+    # for idx, instruction in tqdm(enumerate(itertools.cycle(instructions), 1)):
     #     current_nodes = [nodes[n][instruction] for n in current_nodes]
     #     if all(n.endswith("Z") for n in current_nodes):
     #         break
@@ -6,8 +6,7 @@ import re
 from collections.abc import Iterable, Sequence
 from typing import NamedTuple
 
-import tqdm
-from rich import print
+from output import print
 
 
 class Point(NamedTuple):
@@ -5,8 +5,7 @@ from typing import NamedTuple
 from collections.abc import Iterable, Sequence
 import functools
 import itertools
-import tqdm
-from rich import print
+from output import print, tqdm
 
 
 def print_sky(sky_map):
@@ -20,6 +19,23 @@ def distance(p1, p2):
     return abs(p2[0] - p1[0]) + abs(p2[1] - p1[1])
 
 
+def generate_input(scale: float, rng) -> str:
+    """A random sky `scale` times the area of the real one (140x140 with about 440 galaxies and a few empty rows
+    and columns)."""
+    side = max(2, round(140 * math.sqrt(scale)))
+    empty_rows = {r for r in range(side) if rng.random() < 0.05}
+    empty_columns = {c for c in range(side) if rng.random() < 0.05}
+    rows = []
+    for r in range(side):
+        rows.append(
+            "".join(
+                "#" if r not in empty_rows and c not in empty_columns and rng.random() < 0.024 else "."
+                for c in range(side)
+            )
+        )
+    return "\n".join(rows) + "\n"
+
+
 def part1():
     value = 0
 
@@ -61,7 +77,7 @@ def part1():
 
     distances = {}
 
-    for galaxy in tqdm.tqdm(galaxies):
+    for galaxy in tqdm(galaxies):
         for other in range(galaxy + 1, len(galaxies) + 1):
             d = distance(galaxies[galaxy], galaxies[other])
             distances.setdefault(galaxy, {})[other] = d
@@ -130,7 +146,7 @@ def part2():
 
     distances = {}
 
-    for galaxy in tqdm.tqdm(galaxies):
+    for galaxy in tqdm(galaxies):
         for other in range(galaxy + 1, len(galaxies) + 1):
             d = distance2(galaxies[galaxy], galaxies[other], rows_to_duplicate, columns_to_duplicate)
             distances.setdefault(galaxy, {})[other] = d
@@ -5,9 +5,7 @@ from collections.abc import Iterable, Sequence
 from copy import deepcopy
 import functools
 import itertools
-import tqdm
-import tqdm.rich
-from rich import print
+from output import print, tqdm
 
 
 bad_spring = re.compile("#+")
@@ -67,7 +65,7 @@ def part2():
         posibilites = [[]]
         # replace each "?" with "." or "#" and check if it results in correct solution
         print(f"Generating posibilities for {springs_map}")
-        for x in tqdm.rich.tqdm(springs_map):
+        for x in tqdm(springs_map):
             if x != "?":
                 [a.append(x) for a in posibilites]
             else:
@@ -76,7 +74,7 @@ def part2():
                 [a.append("#") for a in new_posibilities]
                 posibilites.extend(new_posibilities)
         print(f"Got {len(posibilites)=} for {springs_map}")
-        for posibility in tqdm.rich.tqdm(posibilites):
+        for posibility in tqdm(posibilites):
             if verify(posibility, control):
                 value += 1
 
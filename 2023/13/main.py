@@ -4,8 +4,7 @@ from typing import NamedTuple
 from collections.abc import Iterable, Sequence
 import functools
 import itertools
-import tqdm
-from rich import print
+from output import print
 import difflib
 
 
@@ -3,10 +3,11 @@ import dataclasses
 from typing import NamedTuple
 from collections.abc import Iterable, Sequence
 import functools
-import itertools
-import tqdm
-from rich import print
-from tqdm.rich import trange
+
+import stencil
+from output import print
+from render import Palette, render, show
+from utils import Grid, fast_forward, read_grid
 
 MOVEABLE = "O"
 STATIONARY = "#"
@@ -21,14 +22,11 @@ def read_input():
     return area
 
 
+AREA_PALETTE = Palette({MOVEABLE: "blue", STATIONARY: "red", EMPTY: "gray"})
+
+
 def print_area(area):
-    for r, row in enumerate(area):
-        row = "".join(row)
-        row = row.replace(MOVEABLE, f"[blue]{MOVEABLE}[/blue]")
-        row = row.replace(STATIONARY, f"[red]{STATIONARY}[/red]")
-        row = row.replace(EMPTY, f"[gray]{EMPTY}[/gray]")
-        print(f"{r:3}: {row}")
-    print("")
+    show(render(("".join(row) for row in area), AREA_PALETTE, ruler=False))
 
 
 def tilt_north(area):
@@ -72,8 +70,12 @@ def part1():
     value = 0
 
     area = read_input()
-    tilt_north(area)
-    value = calculate_load(area)
+    if stencil.AVAILABLE:
+        rows = ["".join(row) for row in area]
+        value = layer_north_load(stencil.tilt(stencil.layer(rows, MOVEABLE), stencil.layer(rows, STATIONARY), 0, -1))
+    else:
+        tilt_north(area)
+        value = calculate_load(area)
 
     print(f"The value is {value}")
 
@@ -154,50 +156,56 @@ def tilt(area, direction):
 CYCLES = 1_000_000_000
 
 
-def checksum(area):
-    import hashlib
+def roll(line: bytes) -> bytes:
+    """Move the round rocks to the start of the line, up to the cube shaped rocks."""
+    # "O" sorts after "." so the reverse order puts the round rocks first
+    return STATIONARY.encode().join(bytes(sorted(part, reverse=True)) for part in line.split(STATIONARY.encode()))
 
-    h = hashlib.sha256()
-    for row in area:
-        h.update("".join(row).encode())
-    return h.hexdigest()
 
+def spin_cycle(platform: Grid) -> Grid:
+    """Tilt the platform north, west, south and east."""
+    for _ in range(4):
+        # tilt north and rotate clockwise, so that the next tilt to the north is a tilt to the west of the original
+        platform = Grid.from_lines([roll(platform.column(x))[::-1] for x in range(platform.width)])
+    return platform
 
-def part2():
-    value = 0
-    from collections import defaultdict
 
-    area = read_input()
-    seen_hashes = defaultdict(list)
-    for i in trange(1, CYCLES + 1, unit_scale=True):
-        tilt(area, "N")
-        tilt(area, "W")
-        tilt(area, "S")
-        tilt(area, "E")
-        # print(f"After {i+1} cycles:")
-        # print_area(area)
-        if i > 1_000:
-            h = checksum(area)
-            seen_hashes[h].append(i)
-            if len(seen_hashes[h]) > 100:
-                print(f"Iterations for hash={h}: {seen_hashes[h]}")
-                break
-    print(seen_hashes.keys())
-    derivatives = [b - a for a, b in itertools.pairwise(seen_hashes[h])]
-    # print(derivatives)
-    derivatives = set(derivatives)
-    print(derivatives)
-    assert len(derivatives) == 1
-    derivative = derivatives.pop()
-    cycles_left = CYCLES - i
-    loops_left = cycles_left // derivative
-    for j in trange(i + loops_left * derivative, CYCLES):
-        tilt(area, "N")
-        tilt(area, "W")
-        tilt(area, "S")
-        tilt(area, "E")
-        value = calculate_load(area)
-        print(f"{j=}, {value=}")
+def north_load(platform: Grid) -> int:
+    return sum((platform.height - y) * row.count(MOVEABLE) for y, row in enumerate(platform.rows()))
+
+
+# north, west, south, east
+SPIN_DIRECTIONS = ((0, -1), (-1, 0), (0, 1), (1, 0))
+
+
+def spin_layers(rocks, blocked):
+    """`spin_cycle` on the `stencil` layers of the round rocks and of the cube shaped ones."""
+    for dx, dy in SPIN_DIRECTIONS:
+        rocks = stencil.tilt(rocks, blocked, dx, dy)
+    return rocks
+
+
+def layer_north_load(rocks) -> int:
+    """`north_load` of the `stencil` layer of the round rocks."""
+    return int((rocks.sum(axis=1) * stencil.np.arange(rocks.shape[0], 0, -1)).sum())
+
+
+def part2():
+    platform = read_grid(open("input.txt", "rb").read())
+    if stencil.AVAILABLE:
+        rows = platform.rows()
+        blocked = stencil.layer(rows, STATIONARY)
+        result = fast_forward(
+            lambda: stencil.layer(rows, MOVEABLE),
+            lambda rocks: spin_layers(rocks, blocked),
+            CYCLES,
+            fingerprint=lambda rocks: stencil.np.packbits(rocks).tobytes(),
+            metric=layer_north_load,
+        )
+    else:
+        result = fast_forward(lambda: platform, spin_cycle, CYCLES, metric=north_load)
+    print(f"Cycle of {result.cycle.period} spin cycles starting after {result.cycle.start}")
+    value = result.value
 
     print(f"The value is {value}")
 
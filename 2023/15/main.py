@@ -5,8 +5,7 @@ from collections.abc import Iterable, Sequence
 from contextlib import suppress
 import functools
 import itertools
-import tqdm
-from rich import print
+from output import print, tqdm
 
 
 def my_hash(string: str) -> int:
@@ -28,7 +27,7 @@ def part1():
         lines.append(line)
     line = "".join(lines)
 
-    for sequence in tqdm.tqdm(line.split(",")):
+    for sequence in tqdm(line.split(",")):
         value += my_hash(sequence)
 
     print(f"The value is {value}")
@@ -48,7 +47,7 @@ def part2():
 
     label_to_hash = {}
     boxes = [{} for i in range(256)]
-    for sequence in tqdm.tqdm(line.split(",")):
+    for sequence in tqdm(line.split(",")):
         if sequence[-1] == "-":
             label = sequence[:-1]
             op = "-"
@@ -3,71 +3,66 @@ import dataclasses
 import enum
 from typing import NamedTuple
 from collections.abc import Iterable, Sequence
-from collections import defaultdict
 import functools
 import itertools
-import tqdm
-from rich import print
-from rich.console import Console
-from rich.text import Text
 
+from output import print, tqdm
+from utils import Grid, read_grid, read_input
 
-class Point(NamedTuple):
-    r: int
-    c: int
 
-    # def __add__(self, other):
-    #     if not (isinstance(other, Point) or isinstance(other, MutablePoint)):
-    #         return NotImplemented
-    #     return Point(self.x + other.x, self.y + other.y)
-
-
-class Direction(enum.StrEnum):
-    UP = "U"
-    DOWN = "D"
-    RIGHT = "R"
-    LEFT = "L"
+class Direction(enum.IntEnum):
+    # the same order as Grid.offsets4
+    UP = 0
+    RIGHT = 1
+    DOWN = 2
+    LEFT = 3
 
 
 @dataclasses.dataclass
 class Ray:
-    p: Point
+    # index of a cell in the cave grid
+    p: int
     direction: Direction
-    path: list[tuple[Point, Direction]] = dataclasses.field(default_factory=list)
+    # the ray this one was split from and the direction that one entered the splitter in: `ray_path` rebuilds the
+    # cells the light went through from them instead of every ray carrying its path
+    parent: "Ray | None" = dataclasses.field(default=None, repr=False)
+    split_direction: Direction | None = dataclasses.field(default=None, repr=False)
 
     def __post_init__(self):
-        self.path.append(self.p)
-
-    def set_point(self, new_p: Point):
-        new_path_segment = new_p
-        self.path.append(new_path_segment)
-        self.p = new_p
+        self.start = self.p
+        self.start_direction = self.direction
+        # the direction in which the ray entered its current cell (`direction` is where it goes next)
+        self.entry = self.direction
 
 
+# "/" swaps UP and RIGHT, DOWN and LEFT; "\" swaps UP and LEFT, DOWN and RIGHT
 rotation = {
-    Direction.UP: {"/": Direction.RIGHT, "\\": Direction.LEFT},
-    Direction.DOWN: {"/": Direction.LEFT, "\\": Direction.RIGHT},
-    Direction.RIGHT: {"/": Direction.UP, "\\": Direction.DOWN},
-    Direction.LEFT: {"/": Direction.DOWN, "\\": Direction.UP},
+    ord("/"): [Direction.RIGHT, Direction.UP, Direction.LEFT, Direction.DOWN],
+    ord("\\"): [Direction.LEFT, Direction.DOWN, Direction.RIGHT, Direction.UP],
 }
+VERTICAL_SPLITTER = ord("|")
+HORIZONTAL_SPLITTER = ord("-")
 
 
-console = Console(highlight=False)
+def print_ray(ray: Ray, cave: Grid, energized_tiles: bytearray):
+    from rich.console import Console
 
+    console = Console(highlight=False)
+    rows = [list(row) for row in cave.rows()]
+    for tile, directions in enumerate(energized_tiles):
+        if directions:
+            x, y = cave.coordinates(tile)
+            rows[y][x] = "[yellow]#[/yellow]"
+    for p in ray_path(cave, ray):
+        x, y = cave.coordinates(p)
+        rows[y][x] = "[red]@[/red]"
+    rows[y][x] = "[bright_magenta]*[/bright_magenta]"
 
-def print_ray(ray: Ray, cave, energized_tiles):
-    cave = [list(row) for row in cave]
-    for tile in energized_tiles:
-        cave[tile.r][tile.c] = "[yellow]#[/yellow]"
-    for p in ray.path:
-        cave[p.r][p.c] = "[red]@[/red]"
-    cave[p.r][p.c] = "[bright_magenta]*[/bright_magenta]"
-
-    nums = "".join(f"{i}         " for i in range(len(cave[0]) // 10))
+    nums = "".join(f"{i}         " for i in range(cave.width // 10))
     print(f"     {nums}")
-    nums = "01234567890" * (len(cave[0]) // 10)
+    nums = "01234567890" * (cave.width // 10)
     print(f"     {nums}")
-    for row_idx, row in enumerate(cave):
+    for row_idx, row in enumerate(rows):
         # avoid problem with rich like "\[red]"
         row = "".join(row).replace("\\", "\u2572")
         # .replace("/", "\u2571")
@@ -75,64 +70,90 @@ def print_ray(ray: Ray, cave, energized_tiles):
     print("")
 
 
-def trace_light(cave: list[str], starting_ray=None) -> int:
+def continued_direction(tile: int, direction: Direction) -> Direction:
+    """The direction a ray continues in after entering the tile (a split ray goes DOWN or RIGHT)."""
+    if tile in rotation:
+        return rotation[tile][direction]
+    if tile == VERTICAL_SPLITTER and direction in (Direction.LEFT, Direction.RIGHT):
+        return Direction.DOWN
+    if tile == HORIZONTAL_SPLITTER and direction in (Direction.UP, Direction.DOWN):
+        return Direction.RIGHT
+    return direction
+
+
+def ray_path(cave: Grid, ray: Ray) -> list[int]:
+    """Rebuild the cells the light went through to get to the ray's current cell.
+
+    The path is followed again from where the first ray started: each ray up to the splitter it was split at, then
+    the ray itself up to its current cell. A ray never enters a cell in the same direction twice, so the cell and
+    the direction it was entered in tell where to stop.
+    """
+    rays = []
+    while ray is not None:
+        rays.append(ray)
+        ray = ray.parent
+    rays.reverse()
+    path = []
+    for ray, split in zip(rays, [*rays[1:], None]):
+        target = (ray.p, ray.entry) if split is None else (split.start, split.split_direction)
+        p, entry = ray.start, ray.start_direction
+        for _ in range(len(cave.cells) * 4):
+            path.append(p)
+            if (p, entry) == target:
+                break
+            entry = continued_direction(cave.cells[p], entry)
+            p += cave.offsets4[entry]
+    return path
+
+
+def trace_light(cave: Grid, starting_ray=None) -> int:
     if not starting_ray:
-        starting_ray = Ray(Point(0, 0), Direction.RIGHT)
+        starting_ray = Ray(cave.index(0, 0), Direction.RIGHT)
 
+    cells, offsets, outside = cave.cells, cave.offsets4, cave.border
     active_rays = [starting_ray]
-    cave_h = len(cave)
-    cave_w = len(cave[0])
-    energized_tiles = defaultdict(set)
-    energized_tiles[Point(starting_ray.p.r, starting_ray.p.c)] = {starting_ray.direction}
+    # a bit for each direction in which the light entered the tile
+    energized_tiles = bytearray(len(cells))
+    energized_tiles[starting_ray.p] = 1 << starting_ray.direction
     while active_rays:
         ray = active_rays.pop()
         # print_ray(ray, cave, energized_tiles)
         # print(f"active_rays: {len(active_rays)}")
+        p, direction = ray.p, ray.direction
+        # the same turns as `continued_direction`, inlined
         while True:
-            tile = cave[ray.p.r][ray.p.c]
-            energized_tiles[ray.p].add(ray.direction)
-            if tile in ("/", "\\"):
-                ray.direction = rotation[ray.direction][tile]
-            elif tile in ("-", "|"):
-                if not (
-                    (tile == "|" and ray.direction in (Direction.UP, Direction.DOWN))
-                    or (tile == "-" and ray.direction in (Direction.LEFT, Direction.RIGHT))
-                ):
-                    if tile == "|":
-                        ray.direction = Direction.DOWN
-                        active_rays.append(Ray(ray.p, Direction.UP, path=ray.path.copy()))
-                    else:
-                        ray.direction = Direction.RIGHT
-                        active_rays.append(Ray(ray.p, Direction.LEFT, path=ray.path.copy()))
-
-            match ray.direction:
-                case Direction.UP:
-                    next_point = Point(ray.p.r - 1, ray.p.c)
-                case Direction.DOWN:
-                    next_point = Point(ray.p.r + 1, ray.p.c)
-                case Direction.RIGHT:
-                    next_point = Point(ray.p.r, ray.p.c + 1)
-                case Direction.LEFT:
-                    next_point = Point(ray.p.r, ray.p.c - 1)
-            if next_point.r < 0 or next_point.r >= cave_w or next_point.c < 0 or next_point.c >= cave_h:
+            tile = cells[p]
+            entry = direction
+            energized_tiles[p] |= 1 << direction
+            if tile in rotation:
+                direction = rotation[tile][direction]
+            elif tile == VERTICAL_SPLITTER:
+                if direction in (Direction.LEFT, Direction.RIGHT):
+                    direction = Direction.DOWN
+                    active_rays.append(Ray(p, Direction.UP, ray, entry))
+            elif tile == HORIZONTAL_SPLITTER:
+                if direction in (Direction.UP, Direction.DOWN):
+                    direction = Direction.RIGHT
+                    active_rays.append(Ray(p, Direction.LEFT, ray, entry))
+
+            next_point = p + offsets[direction]
+            if cells[next_point] == outside:
                 # light ray hit the cave wall
                 break
-            if next_point in energized_tiles and ray.direction in energized_tiles[next_point]:
+            if energized_tiles[next_point] & (1 << direction):
                 # we have already visited this tile in this direction - skip it
                 break
-            ray.set_point(next_point)
+            p = next_point
+        ray.p, ray.direction, ray.entry = p, direction, entry
 
     # print(energized_tiles)
-    return len(energized_tiles)
+    return len(energized_tiles) - energized_tiles.count(0)
 
 
 def part1():
     value = 0
 
-    cave = []
-    for line in open("input.txt").readlines():
-        line = line.strip()
-        cave.append(line)
+    cave = read_grid(read_input("input.txt"))
 
     value = trace_light(cave)
 
@@ -145,27 +166,22 @@ def part1():
 def part2():
     value = 0
 
-    cave = []
-    for line in open("input.txt").readlines():
-        line = line.strip()
-        cave.append(line)
+    cave = read_grid(read_input("input.txt"))
 
     rays = []
-    cave_h = len(cave)
-    cave_w = len(cave[0])
-    for i in range(cave_h):
-        ray = Ray(Point(i, 0), direction=Direction.RIGHT)
+    for i in range(cave.height):
+        ray = Ray(cave.index(0, i), direction=Direction.RIGHT)
         rays.append(ray)
-        ray = Ray(Point(i, cave_w - 1), direction=Direction.LEFT)
+        ray = Ray(cave.index(cave.width - 1, i), direction=Direction.LEFT)
         rays.append(ray)
-    for i in range(cave_w):
-        ray = Ray(Point(0, i), direction=Direction.DOWN)
+    for i in range(cave.width):
+        ray = Ray(cave.index(i, 0), direction=Direction.DOWN)
         rays.append(ray)
-        ray = Ray(Point(cave_h - 1, i), direction=Direction.UP)
+        ray = Ray(cave.index(i, cave.height - 1), direction=Direction.UP)
         rays.append(ray)
 
     highest_ray = None
-    for ray in tqdm.tqdm(rays):
+    for ray in tqdm(rays):
         if (ray_value := trace_light(cave, starting_ray=ray)) > value:
             value = ray_value
             highest_ray = ray
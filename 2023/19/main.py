@@ -4,9 +4,11 @@ from typing import Any, NamedTuple
 from collections.abc import Iterable, Sequence
 import functools
 import itertools
+import math
 import operator
-import tqdm
-from rich import print
+
+from output import print
+from utils import IntervalSet
 
 
 class Part(NamedTuple):
@@ -134,29 +136,41 @@ def read_input2():
     return parsed_workflows
 
 
-def part2():
-    value = 0
+CATEGORY_RANGE = (1, 4001)
+
+
+def count_accepted(workflows, workflow: str, ratings: dict[str, IntervalSet]) -> int:
+    """Count the combinations of `ratings` that end up accepted when starting at `workflow`.
 
+    Every rule splits the ratings of its category in two: the part that matches goes to the rule's target, the rest
+    continues with the next rule.
+    """
+    if workflow == "R":
+        return 0
+    if workflow == "A":
+        return math.prod(values.size() for values in ratings.values())
+    accepted = 0
+    for rule in workflows[workflow]:
+        if len(rule) == 1:
+            return accepted + count_accepted(workflows, rule[0], ratings)
+        category, sign, constant, target = rule
+        matching = IntervalSet([(1, constant)] if sign == "<" else [(constant + 1, CATEGORY_RANGE[1])])
+        if matched := ratings[category] & matching:
+            accepted += count_accepted(workflows, target, ratings | {category: matched})
+        if not (rest := ratings[category] - matching):
+            return accepted
+        ratings = ratings | {category: rest}
+    return accepted
+
+
+def part2():
     workflows = read_input2()
-    all_branches_expanded = False
-    space = {}
     starting_workflow = "in"
-    current_workflow = starting_workflow
-    for workflow in workflows:
-        subtree = {}
-        for rule in workflows[workflow]:
-            if len(rule) == 1:
-                # subtree = rule
-                subtree[""] = rule[0]
-            else:
-                subtree[(rule[0], rule[1], rule[2])] = rule[3]
-        space[workflow] = subtree
-
-    while not all_branches_expanded:
-        break
-    # go throuht the tree. have a data structure to represent a set of ranges of accepted values,
-    # starting with (1,4000). At each
-    # tree branch make a copy of it and adjust the ranges. recurse until "A" or "R"
+    # go through the tree with the sets of accepted values of each category, starting with (1,4000), and split
+    # them at each rule
+    value = count_accepted(
+        workflows, starting_workflow, {category: IntervalSet([CATEGORY_RANGE]) for category in "xmas"}
+    )
 
     print(f"The value is {value}")
 
@@ -6,8 +6,7 @@ from typing import NamedTuple
 from collections.abc import Iterable, Sequence
 import functools
 import itertools
-import tqdm
-from rich import print
+from output import print
 
 
 @dataclasses.dataclass
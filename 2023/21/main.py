@@ -2,55 +2,63 @@ import re
 import dataclasses
 from typing import NamedTuple
 from collections.abc import Iterable, Sequence
-from contextlib import suppress
+from array import array
 import functools
 import itertools
-import tqdm
-from rich import print
+
+import stencil
+from output import print, trange
+from utils import read_grid, read_input
 
 
 def part1():
     value = 0
     steps_to_take = 64
 
-    walking_area = []
-    # a map of point coordinates to the step number on which it was reached
-    points_reached = {}
-    for line in open("input.txt").readlines():
-        line = line.strip()
-        walking_area.append(line)
-        with suppress(ValueError):
-            idx = line.index("S")
-            start = len(walking_area) - 1, idx
-
-    area_h = len(walking_area)
-    area_w = len(walking_area[0])
+    walking_area = read_grid(read_input("input.txt"))
+    if stencil.AVAILABLE:
+        print(f"The value is {count_reachable(walking_area, steps_to_take)}")
+        return
+    cells, offsets, rock = walking_area.cells, walking_area.offsets4, ord("#")
+    start = walking_area.find("S")
+    # the step number on which each cell was reached, 0 for the cells not reached yet
+    points_reached = array("i", bytes(4 * len(cells)))
+    # rocks and the grid's border both stop the walk, marking them as reached keeps the loop to a single check
+    for idx, cell in enumerate(cells):
+        if cell == rock or cell == walking_area.border:
+            points_reached[idx] = -1
 
     possible_positions = [start]
-    for step_no in tqdm.trange(1, steps_to_take + 1):
+    for step_no in trange(1, steps_to_take + 1):
         new_possible_positions = []
         for step in possible_positions:
-            for direction in ((-1, 0), (1, 0), (0, 1), (0, -1)):
-                new_step = step[0] + direction[0], step[1] + direction[1]
-                if (
-                    new_step[0] < 0
-                    or new_step[0] >= area_h
-                    or new_step[1] < 0
-                    or new_step[1] >= area_w
-                    or walking_area[new_step[0]][new_step[1]] == "#"
-                ):
-                    continue
-                if new_step not in points_reached:
+            for offset in offsets:
+                new_step = step + offset
+                if not points_reached[new_step]:
                     points_reached[new_step] = step_no
                     new_possible_positions.append(new_step)
         possible_positions = new_possible_positions
 
-    for step_no in points_reached.values():
-        if step_no % 2 == 0:
+    for step_no in points_reached:
+        if step_no > 0 and step_no % 2 == 0:
             value += 1
     print(f"The value is {value}")
 
 
+def count_reachable(walking_area, steps: int) -> int:
+    """The number of garden plots the elf can be on after exactly `steps` steps, the `stencil` way.
+
+    The positions possible after a step are the garden plots next to the ones possible before it, for the whole
+    garden at once.
+    """
+    rows = walking_area.rows()
+    garden = stencil.layer(rows, ".S")
+    positions = stencil.layer(rows, "S")
+    for _ in trange(steps):
+        positions = stencil.any_neighbour(positions, stencil.OFFSETS4) & garden
+    return int(positions.sum())
+
+
 ################################################################################
 
 
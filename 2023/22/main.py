@@ -1,4 +1,3 @@
-import ast
 import copy
 import dataclasses
 import functools
@@ -7,8 +6,8 @@ import re
 from collections.abc import Iterable, Sequence
 from typing import NamedTuple
 
-import tqdm
-from rich import print
+from output import print
+from utils import ints, read_input
 
 EMPTY = "."
 
@@ -44,10 +43,10 @@ class Brick:
 def load_bricks():
     bricks = []
     area_x, area_y, area_z = 0, 0, 0
-    for line in open("input.txt").readlines():
-        line = line.strip()
-        start, end = line.split("~")
-        b = Brick(Point3d(*ast.literal_eval(start)), end=Point3d(*ast.literal_eval(end)))
+    # "X,Y,Z~X,Y,Z"
+    numbers = ints(read_input("input.txt"))
+    for i in range(0, len(numbers), 6):
+        b = Brick(Point3d(*numbers[i : i + 3]), end=Point3d(*numbers[i + 3 : i + 6]))
         bricks.append(b)
         if (bx := max(b.start.x, b.end.x)) > area_x:
             area_x = bx
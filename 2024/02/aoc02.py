@@ -1,7 +1,8 @@
 import argparse
 import itertools
 
-from rich import print
+from output import print
+from profiling import profile_if
 
 VERBOSE = 1
 
@@ -69,11 +70,13 @@ def main():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
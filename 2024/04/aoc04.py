@@ -1,8 +1,8 @@
 import argparse
 import itertools
 
-from rich import print
-import tqdm
+from output import print, trange
+from profiling import profile_if
 
 VERBOSE = 1
 
@@ -18,7 +18,7 @@ def part1(input_file):
         xmases += line.count("XMAS")
         xmases += line.count("SAMX")
     column_max = len(lines[0])
-    for row in tqdm.trange(0, len(lines) - 3):
+    for row in trange(0, len(lines) - 3):
         for column in range(0, column_max):
             candidate = f"{lines[row][column]}{lines[row+1][column]}{lines[row+2][column]}{lines[row+3][column]}"
             if candidate in ("XMAS", "SAMX"):
@@ -46,11 +46,13 @@ def main():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
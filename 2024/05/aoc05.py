@@ -1,9 +1,10 @@
 import argparse
 import functools
 import itertools
+import math
 
-from rich import print
-import tqdm
+from output import print
+from profiling import profile_if
 
 VERBOSE = 1
 
@@ -24,6 +25,28 @@ def load_input(indata) -> tuple[dict[int, list[int]], dict[int, list[int]], list
     return must_be_before, must_be_after, pages_to_print
 
 
+def generate_input(scale: float, rng) -> str:
+    """Random rules and updates, about `scale` times the size of the real input.
+
+    The real one orders 49 pages with a rule for every pair and has 200 updates of 5 to 23 pages. Both the number of
+    pages and of the updates grow with the square root of the scale, so the updates get longer as well.
+    """
+    growth = math.sqrt(scale)
+    num_pages = max(3, round(49 * growth))
+    order = rng.sample(range(10, 10 + 2 * num_pages), num_pages)
+    rules = [f"{before}|{after}" for i, before in enumerate(order) for after in order[i + 1 :]]
+    rng.shuffle(rules)
+    rank = {page: i for i, page in enumerate(order)}
+    updates = []
+    for _ in range(max(1, round(200 * growth))):
+        length = rng.randrange(min(5, num_pages), max(5, num_pages // 2) + 1) | 1
+        pages = rng.sample(order, min(length, num_pages))
+        if rng.random() < 0.5:
+            pages.sort(key=rank.__getitem__)
+        updates.append(",".join(map(str, pages)))
+    return "\n".join(rules) + "\n\n" + "\n".join(updates) + "\n"
+
+
 def is_correct_order(must_be_before, must_be_after, pages_to_print) -> bool:
     for idx, page in enumerate(pages_to_print):
         # check that a page that is before isn't required to be after
@@ -77,11 +100,13 @@ def main():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
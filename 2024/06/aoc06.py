@@ -1,13 +1,12 @@
 import argparse
-import functools
-import itertools
 from concurrent.futures.process import ProcessPoolExecutor
-from copy import deepcopy
-
-from rich import print
-import tqdm
+from enum import StrEnum
 from io import TextIOWrapper
-from enum import Enum, StrEnum
+
+from output import print
+from profiling import profile_if
+from render import Palette, render, show
+from utils import Grid, read_grid, read_input
 
 VERBOSE = False
 
@@ -23,141 +22,117 @@ class Direction(StrEnum):
     LEFT = "←"
 
 
+# in the same order as Grid.offsets4, so turning right is `(direction + 1) % 4`
+DIRECTIONS = (Direction.UP, Direction.RIGHT, Direction.DOWN, Direction.LEFT)
+
+
 def load_input(indata: TextIOWrapper):
-    lab = []
-    guard_pos = None
-    for idx, line in enumerate(indata):
-        lab.append(list(line))
-        if GUARD in line:
-            guard_pos = idx, line.index(GUARD)
+    lab = read_grid(read_input(indata))
+    guard_pos = lab.find(GUARD)
     assert guard_pos is not None
     return lab, guard_pos
 
 
-def move_guard_forward(old_pos, direction: Direction):
-    match direction:
-        case Direction.UP:
-            return old_pos[0] - 1, old_pos[1]
-        case Direction.RIGHT:
-            return old_pos[0], old_pos[1] + 1
-        case Direction.DOWN:
-            return old_pos[0] + 1, old_pos[1]
-        case Direction.LEFT:
-            return old_pos[0], old_pos[1] - 1
+VISITED = "X"
+# the guard facing each of DIRECTIONS, as a single byte cell of a frame
+GUARD_CELLS = "^>v<"
+LAB_PALETTE = Palette(
+    {OBSTACLE: "white", NEW_OBSTACLE: "yellow", VISITED: "red", **{guard: "blue" for guard in GUARD_CELLS}},
+    glyphs=dict(zip(GUARD_CELLS, DIRECTIONS)),
+)
 
 
-def rotate_right(old_direction: Direction) -> Direction:
-    match old_direction:
-        case Direction.UP:
-            return Direction.RIGHT
-        case Direction.RIGHT:
-            return Direction.DOWN
-        case Direction.DOWN:
-            return Direction.LEFT
-        case Direction.LEFT:
-            return Direction.UP
-
-
-def print_lab(lab, guard_pos, direction: Direction, visited_positions, new_obstacle=None):
+def print_lab(lab: Grid, guard_pos: int, direction: int, visited_positions, new_obstacle=None):
+    frame = lab.cells.copy()
+    for position, visited in enumerate(visited_positions):
+        if visited:
+            frame[position] = ord(VISITED)
     if new_obstacle is not None:
-        lab = deepcopy(lab)
-        lab[new_obstacle[0]][new_obstacle[1]] = NEW_OBSTACLE
-    print("    ", end="")
-    for i in range(len(lab[0])):
-        print(i % 10, end="")
-    print()
-    for ridx, row in enumerate(lab):
-        print(f"{ridx:2}: ", end="")
-        for cidx, cell in enumerate(row):
-            if cell == OBSTACLE:
-                print(f"[white]{OBSTACLE}[/white]", end="")
-                continue
-            if cell == NEW_OBSTACLE:
-                print(f"[yellow]{NEW_OBSTACLE}[/yellow]", end="")
-                continue
-            if (ridx, cidx) == guard_pos:
-                print(f"[blue]{direction}[/blue]", end="")
-                continue
-            if (ridx, cidx) in visited_positions:
-                print("[red]X[/red]", end="")
-                continue
-            print(".", end="")
-        print("")
-    print("")
+        frame[new_obstacle] = ord(NEW_OBSTACLE)
+    frame[guard_pos] = ord(GUARD_CELLS[direction])
+    start = lab.index(0, 0)
+    show(
+        render(
+            (frame[start + y * lab.stride : start + y * lab.stride + lab.width] for y in range(lab.height)), LAB_PALETTE
+        )
+    )
 
 
 def part1(input_file: TextIOWrapper):
     lab, guard_pos = load_input(input_file)
-    lab_dimensions = len(lab), len(lab[0])
-    direction = Direction.UP
-    distinct_positions = {guard_pos}
+    cells, offsets, outside, obstacle = lab.cells, lab.offsets4, lab.border, ord(OBSTACLE)
+    direction = 0
+    distinct_positions = bytearray(len(cells))
+    distinct_positions[guard_pos] = 1
     while True:
         if VERBOSE:
             print_lab(lab, guard_pos, direction, distinct_positions)
         # move guard forward until there's an obstacle or she walks outside
-        new_pos = move_guard_forward(guard_pos, direction)
-        if not (0 <= new_pos[0] < lab_dimensions[0]) or not (0 <= new_pos[1] < lab_dimensions[1]):
-            # moved outside
+        new_pos = guard_pos + offsets[direction]
+        if cells[new_pos] == outside:
             break
-        if lab[new_pos[0]][new_pos[1]] == OBSTACLE:
-            direction = rotate_right(direction)
+        if cells[new_pos] == obstacle:
+            direction = (direction + 1) % 4
             continue
         guard_pos = new_pos
-        distinct_positions.add(new_pos)
-    print(f"part 1: {len(distinct_positions)}")
+        distinct_positions[new_pos] = 1
+    print(f"part 1: {distinct_positions.count(1)}")
+
 
+def part2_worker(task) -> tuple[int, bool]:
+    """Returns True if the guard enters a loop, False if she goes outside the lab.
 
-def part2_worker(task) -> tuple[tuple[int, int], bool]:
-    """Returns True if the guard enters a loop, False if she goes outside the lab."""
+    `visited_positions` has a bit set for each direction in which the guard already left a cell.
+    """
     lab, guard_pos, new_obstacle, direction, visited_positions = task
-    lab_dimensions = len(lab), len(lab[0])
-    print(f"Worker starting...{new_obstacle}")
+    cells, offsets, outside, obstacle = lab.cells, lab.offsets4, lab.border, ord(OBSTACLE)
+    print(f"Worker starting...{lab.coordinates(new_obstacle)}")
     while True:
         if VERBOSE:
             print_lab(lab, guard_pos, direction, visited_positions)
         # move guard forward until there's an obstacle or she walks outside
-        new_pos = move_guard_forward(guard_pos, direction)
-        if not (0 <= new_pos[0] < lab_dimensions[0]) or not (0 <= new_pos[1] < lab_dimensions[1]):
+        new_pos = guard_pos + offsets[direction]
+        if cells[new_pos] == outside:
             # moved outside
             return new_obstacle, False
-        if lab[new_pos[0]][new_pos[1]] == OBSTACLE:
-            direction = rotate_right(direction)
+        if cells[new_pos] == obstacle:
+            direction = (direction + 1) % 4
             continue
 
         guard_pos = new_pos
-        if new_pos in visited_positions and direction in visited_positions[new_pos]:
+        if visited_positions[new_pos] & (1 << direction):
             return new_obstacle, True
-        visited_positions.setdefault(new_pos, []).append(direction)
+        visited_positions[new_pos] |= 1 << direction
 
 
 def part2(input_file):
     lab, guard_pos = load_input(input_file)
-    lab_dimensions = len(lab), len(lab[0])
-    direction = Direction.UP
+    cells, offsets, outside, obstacle = lab.cells, lab.offsets4, lab.border, ord(OBSTACLE)
+    direction = 0
     starting_pos = guard_pos
-    visited_positions = {starting_pos: [direction]}
-    new_obsctacles = set()
+    visited_positions = bytearray(len(cells))
+    visited_positions[starting_pos] = 1 << direction
     tasks = {}
     while True:
         if VERBOSE:
             print_lab(lab, guard_pos, direction, visited_positions)
         # move guard forward until there's an obstacle or she walks outside
-        new_pos = move_guard_forward(guard_pos, direction)
-        if not (0 <= new_pos[0] < lab_dimensions[0]) or not (0 <= new_pos[1] < lab_dimensions[1]):
+        new_pos = guard_pos + offsets[direction]
+        if cells[new_pos] == outside:
             break
-        if lab[new_pos[0]][new_pos[1]] == OBSTACLE:
-            direction = rotate_right(direction)
+        if cells[new_pos] == obstacle:
+            direction = (direction + 1) % 4
             continue
         else:
             # simulate an obstacle and check for loops
-            direction_after_rotating = rotate_right(direction)
-            lab_copy = deepcopy(lab)
-            lab_copy[new_pos[0]][new_pos[1]] = OBSTACLE
+            direction_after_rotating = (direction + 1) % 4
             if new_pos not in tasks:
-                tasks[new_pos] = lab_copy, guard_pos, new_pos, direction_after_rotating, deepcopy(visited_positions)
+                lab_copy = lab.snapshot()
+                lab_copy.set(new_pos, obstacle)
+                tasks[new_pos] = lab_copy, guard_pos, new_pos, direction_after_rotating, visited_positions.copy()
 
         guard_pos = new_pos
-        visited_positions.setdefault(new_pos, []).append(direction)
+        visited_positions[new_pos] |= 1 << direction
     # make sure we don't put an obstacle in the starting position
 
     with ProcessPoolExecutor() as executor:
@@ -181,13 +156,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
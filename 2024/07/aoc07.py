@@ -3,8 +3,8 @@ import functools
 import itertools
 from copy import deepcopy
 
-from rich import print
-import tqdm
+from output import print, tqdm
+from profiling import profile_if
 from io import TextIOWrapper
 from enum import Enum, StrEnum
 import operator
@@ -57,7 +57,7 @@ def part2(input_file):
     equations = load_input(input_file)
     operations = operator.add, operator.mul, concat
     total_calibration_result = 0
-    for eq in tqdm.tqdm(equations):
+    for eq in tqdm(equations):
         result, parts = eq
         for candidate in itertools.product(operations, repeat=len(parts) - 1):
             possible = compute(parts, candidate)
@@ -76,13 +76,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -4,8 +4,8 @@ import itertools
 from copy import deepcopy
 from itertools import pairwise, combinations
 
-from rich import print
-from tqdm import trange, tqdm
+from output import print, tqdm
+from profiling import profile_if
 from io import TextIOWrapper
 from enum import Enum, StrEnum
 import operator
@@ -102,13 +102,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -4,8 +4,8 @@ from collections import deque
 from io import TextIOWrapper
 from typing import NamedTuple
 
-from rich import print
-from tqdm.rich import tqdm
+from output import print, tqdm
+from profiling import profile_if
 
 VERBOSE = False
 
@@ -21,6 +21,12 @@ def load_input(indata: TextIOWrapper):
         return used_blocks, free_blocks
 
 
+def generate_input(scale: float, rng) -> str:
+    """A random disk map `scale` times the size of the real one (10,000 files)."""
+    files = max(1, round(10_000 * scale))
+    return "".join(f"{rng.randint(1, 9)}{rng.randint(0, 9)}" for _ in range(files - 1)) + f"{rng.randint(1, 9)}\n"
+
+
 def part1(input_file: TextIOWrapper):
     used_blocks, free_blocks = load_input(input_file)
     defragmented_blocks = []
@@ -49,7 +55,10 @@ def part1(input_file: TextIOWrapper):
                 # - is the same as free space
                 # - is larger than free space
                 if last_file_size is None:
-                    last_file_size = used_blocks_queue.pop()  # TODO: handle error when no more blocks
+                    if not used_blocks_queue:
+                        # every file is in place, the rest of the disk is free
+                        break
+                    last_file_size = used_blocks_queue.pop()
 
                 if last_file_size <= free:
                     free -= last_file_size
@@ -138,13 +147,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
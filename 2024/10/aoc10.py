@@ -1,67 +1,51 @@
 import collections
 import itertools
-from collections import deque
 from io import TextIOWrapper
-from typing import NamedTuple
 import concurrent.futures
-from rich import print
-from tqdm.rich import tqdm
+
+from output import print
+from profiling import profile_if
+from utils import Grid, read_grid, read_input
 
 VERBOSE = False
 
 TOP_HEIGHT = 9
+# the cell values of the trailheads and the tops in the grid
+TRAILHEAD = "0"
+TOP = ord(str(TOP_HEIGHT))
 
 
-def load_input(indata: TextIOWrapper) -> list[list[int]]:
-    topo_map = []
-    for row_idx, line in enumerate(indata):
-        line = line.split("#")[0].strip()
-        if not line:
-            continue
-        blocks = [int(i) for i in line]
-        topo_map.append(blocks)
-    return topo_map
+def load_input(indata: TextIOWrapper) -> Grid:
+    return read_grid(read_input(indata, comment=b"#"))
 
 
 import argparse
 
 
-class Point2D(NamedTuple):
-    r: int
-    c: int
-
-
-def print_map(topo_map: list[list[int]], trail_points: list[Point2D]) -> None:
+def print_map(topo_map: Grid, trail_points: list[int]) -> None:
     print(f"    ", end="")
-    for i in range(len(topo_map[0])):
+    for i in range(topo_map.width):
         print(f"[grey]{i % 10}[/grey]", end="")
     print("")
-    for row_idx, row in enumerate(topo_map):
+    for row_idx, row in enumerate(topo_map.rows()):
         print(f"[grey]{row_idx:2}:[/grey] ", end="")
         for col_idx, val in enumerate(row):
-            if (row_idx, col_idx) in trail_points:
+            if topo_map.index(col_idx, row_idx) in trail_points:
                 print("[red]@[/red]", end="")
             else:
-                print(topo_map[row_idx][col_idx], end="")
+                print(val, end="")
         print("")
     print("")
 
 
-def get_neighbours(point: Point2D, topo_map) -> list[Point2D]:
-    ret = []
-    point_height = topo_map[point.r][point.c]
-    if point.r > 0 and topo_map[point.r - 1][point.c] == point_height + 1:
-        ret.append(Point2D(point.r - 1, point.c))
-    if point.r < len(topo_map) - 1 and topo_map[point.r + 1][point.c] == point_height + 1:
-        ret.append(Point2D(point.r + 1, point.c))
-    if point.c > 0 and topo_map[point.r][point.c - 1] == point_height + 1:
-        ret.append(Point2D(point.r, point.c - 1))
-    if point.c < len(topo_map[0]) - 1 and topo_map[point.r][point.c + 1] == point_height + 1:
-        ret.append(Point2D(point.r, point.c + 1))
-    return ret
+def get_neighbours(point: int, topo_map: Grid) -> list[int]:
+    # the heights are ASCII digits and the border is never a digit, so no bounds checks are needed
+    cells = topo_map.cells
+    next_height = cells[point] + 1
+    return [point + offset for offset in topo_map.offsets4 if cells[point + offset] == next_height]
 
 
-def analyze_trailhead(trailhead: Point2D, topo_map: list[list[int]]) -> tuple[int, Point2D]:
+def analyze_trailhead(trailhead: int, topo_map: Grid) -> tuple[int, int]:
     to_test = get_neighbours(trailhead, topo_map)
     tops_reached = set()
     points_tested = set()
@@ -69,7 +53,7 @@ def analyze_trailhead(trailhead: Point2D, topo_map: list[list[int]]) -> tuple[in
         point_to_test = to_test.pop()
         if point_to_test in points_tested:
             continue
-        if topo_map[point_to_test.r][point_to_test.c] == TOP_HEIGHT:
+        if topo_map.cells[point_to_test] == TOP:
             tops_reached.add(point_to_test)
             continue
         points_tested.add(point_to_test)
@@ -81,24 +65,20 @@ def analyze_trailhead(trailhead: Point2D, topo_map: list[list[int]]) -> tuple[in
 
 def part1(input_file: TextIOWrapper):
     topo_map = load_input(input_file)
-    trailheads = []
-    for ridx, row in enumerate(topo_map):
-        for cidx, cell in enumerate(row):
-            if cell == 0:
-                trailheads.append(Point2D(ridx, cidx))
+    trailheads = topo_map.find_all(TRAILHEAD)
     results = concurrent.futures.ProcessPoolExecutor(1).map(analyze_trailhead, trailheads, itertools.repeat(topo_map))
     final_result = sum(res[0] for res in results)
 
     print(f"Part 1: {final_result}")
 
 
-def analyze_trailhead_part2(trailhead: Point2D, topo_map: list[list[int]]) -> tuple[int, Point2D]:
+def analyze_trailhead_part2(trailhead: int, topo_map: Grid) -> tuple[int, int]:
     to_test = collections.deque([x] for x in get_neighbours(trailhead, topo_map))
     tops_reached = set()
     while to_test:
         trail_to_test = to_test.popleft()
         point_to_test = trail_to_test[-1]
-        if topo_map[point_to_test.r][point_to_test.c] == TOP_HEIGHT:
+        if topo_map.cells[point_to_test] == TOP:
             tops_reached.add(tuple(trail_to_test))
             continue
         for next_step in get_neighbours(point_to_test, topo_map):
@@ -110,11 +90,7 @@ def analyze_trailhead_part2(trailhead: Point2D, topo_map: list[list[int]]) -> tu
 
 def part2(input_file: TextIOWrapper):
     topo_map = load_input(input_file)
-    trailheads = []
-    for ridx, row in enumerate(topo_map):
-        for cidx, cell in enumerate(row):
-            if cell == 0:
-                trailheads.append(Point2D(ridx, cidx))
+    trailheads = topo_map.find_all(TRAILHEAD)
     # results = concurrent.futures.ProcessPoolExecutor(1).map(
     #     analyze_trailhead_part2, trailheads, itertools.repeat(topo_map)
     # )
@@ -129,13 +105,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -15,96 +15,33 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import Iterable, NamedTuple, TypedDict
 
-from rich import print
-from tqdm.rich import tqdm, trange
+from output import print, tqdm
+from profiling import profile_if
+from utils import Grid, read_grid, read_input
 
 VERBOSE = False
 
 
-class Point(NamedTuple):
-
-    x: int
-    y: int
-
-    def __add__(self, other):
-        if not (isinstance(other, Point) or isinstance(other, MutablePoint)):
-            return NotImplemented
-        return Point(self.x + other.x, self.y + other.y)
-
-    def distance(self, other):
-        if not (isinstance(other, Point)):  # or isinstance(other, MutablePoint)):
-            raise NotImplementedError(f"Can't take distance of Point and {type(other)}")
-        return abs(self.x - other.x) + abs(self.y - other.y)
-
-
-class Direction(enum.StrEnum):
-    UP = "^"
-    DOWN = "v"
-    LEFT = "<"
-    RIGHT = ">"
-
-    @staticmethod
-    def values():
-        return (Direction.UP, Direction.DOWN, Direction.LEFT, Direction.RIGHT)
-
-    # a dummy method to allow comparision
-    def __lt__(self, other):
-        if not isinstance(other, Direction):
-            return NotImplemented
-        return self.value < other.value
-
-    def reverse(self):
-        return DIRECTION_REVERSE[self.value]
-
-
-DIRECTION_REVERSE = {
-    "UP": Direction.DOWN,
-    "DOWN": Direction.UP,
-    "LEFT": Direction.RIGHT,
-    "RIGHT": Direction.LEFT,
-    "^": Direction.DOWN,
-    "v": Direction.UP,
-    "<": Direction.RIGHT,
-    ">": Direction.LEFT,
-}
-
-DIRECTION_TO_VECTOR = {
-    Direction.UP: Point(0, -1),
-    Direction.DOWN: Point(0, 1),
-    Direction.LEFT: Point(-1, 0),
-    Direction.RIGHT: Point(1, 0),
-}
-
-
 @dataclass
 class Region:
     name: str
-    points: set[Point] = field(default_factory=set)
-    perimeter: int = 0
-
-    @property
-    def area(self):
-        return len(self.points)
+    # the region's label in `Components.labels`
+    label: int
+    area: int
+    perimeter: int
 
     @property
     def price(self):
         return self.perimeter * self.area
 
-    def is_connected(self, outside_point: Point):
-        for point in self.points:
-            if point.distance(outside_point) == 1:
-                return True
-        return False
-
-    def print(self, area_w, area_h):
-        for x in range(area_w):
+    def print(self, area: Grid, labels):
+        for x in range(area.width):
             print(f"{x%10}", end="")
         print("")
-        for y in range(area_h):
+        for y in range(area.height):
             print(f"{y:2}: ", end="")
-            for x in range(area_w):
-                p = Point(x, y)
-                if p in self.points:
+            for x in range(area.width):
+                if labels[area.index(x, y)] == self.label:
                     print(f"[blue]{self.name}[/blue]", end="")
                 else:
                     print("[gray].[/gray]", end="")
@@ -112,62 +49,22 @@ class Region:
 
 
 def load_input(indata: TextIOWrapper):
-    area = []
-    region_names = set()
-    for row_idx, line in enumerate(indata):
-        line = line.split("#")[0].strip()
-        if not line:
-            continue
-        area.append(list(line))
-        region_names.update(line)
+    area = read_grid(read_input(indata, comment=b"#"))
+    region_names = set("".join(area.rows()))
     return area, region_names
 
 
-def ingest_region(p: Point, area) -> Region:
-    area_h = len(area)
-    area_w = len(area[0])
-    r = Region(area[p.y][p.x])
-    r.points.add(p)
-    points_to_check = {p}
-    while points_to_check:
-        current = points_to_check.pop()
-        same_region_neighbours = 0
-        for d in Direction.values():
-            new_neighbour = current + DIRECTION_TO_VECTOR[d]
-            if (
-                0 <= new_neighbour.x < area_w
-                and 0 <= new_neighbour.y < area_h
-                and area[new_neighbour.y][new_neighbour.x] == r.name
-            ):
-                if new_neighbour not in r.points:
-                    r.points.add(new_neighbour)
-                    points_to_check.add(new_neighbour)
-                same_region_neighbours += 1
-        r.perimeter += 4 - same_region_neighbours
-
-    if len(r.points) == 1:
-        r.perimeter = 4
-    assert len(r.points) > 0
-    assert r.area > 0
-    assert r.perimeter > 0
-    return r
-
-
-def find_regions_new(area) -> dict[str, list[Region]]:
-    visited_points = set()
+def find_regions_new(area: Grid) -> dict[str, list[Region]]:
+    # the border never matches a plant so it counts towards the perimeter
+    components = area.components()
     regions = {}
-    area_h = len(area)
-    area_w = len(area[0])
-    for ridx, row in enumerate(area):
-        for cidx, cell in enumerate(row):
-            p = Point(x=cidx, y=ridx)
-            if p in visited_points:
-                continue
-            new_region = ingest_region(p, area)
-            if VERBOSE:
-                new_region.print(area_w, area_h)
-            visited_points.update(new_region.points)
-            regions.setdefault(new_region.name, []).append(new_region)
+    for label, (size, boundary, first_cell) in enumerate(
+        zip(components.sizes, components.boundaries, components.first_cells)
+    ):
+        new_region = Region(chr(area.cells[first_cell]), label, size, boundary)
+        if VERBOSE:
+            new_region.print(area, components.labels)
+        regions.setdefault(new_region.name, []).append(new_region)
     return regions
 
 
@@ -209,13 +106,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -2,14 +2,14 @@ import argparse
 import collections
 import concurrent.futures
 import itertools
-import re
 from collections import deque
 from fractions import Fraction
 from io import TextIOWrapper
 from typing import NamedTuple
 
-from rich import print
-from tqdm.rich import tqdm, trange
+from output import print
+from profiling import profile_if
+from utils import ints, read_input
 
 VERBOSE = False
 
@@ -32,23 +32,13 @@ class ClawMachine(NamedTuple):
     prize: Point
 
 
-def load_input(indata: TextIOWrapper) -> list[list[int]]:
-    button_re = re.compile(r"Button (?P<button>A|B): X\+(?P<x>\d+), Y\+(?P<y>\d+)")
-    prize_re = re.compile(r"Prize: X=(?P<x>\d+), Y=(?P<y>\d+)")
-    buttons = []
-    claws = []
-    for row_idx, line in enumerate(indata):
-        line = line.split("#")[0].strip()
-        if not line:
-            continue
-        if m := button_re.match(line):
-            buttons.append(Point(int(m.group("x")), int(m.group("y"))))
-        elif m := prize_re.match(line):
-            prize = Point(int(m.group("x")), int(m.group("y")))
-            claws.append(ClawMachine(buttons[0], buttons[1], prize))
-            buttons = []
-
-    return claws
+def load_input(indata: TextIOWrapper) -> list[ClawMachine]:
+    # "Button A: X+AX, Y+AY", "Button B: X+BX, Y+BY", "Prize: X=PX, Y=PY"
+    numbers = ints(read_input(indata, comment=b"#"))
+    return [
+        ClawMachine(Point(*numbers[i : i + 2]), Point(*numbers[i + 2 : i + 4]), Point(*numbers[i + 4 : i + 6]))
+        for i in range(0, len(numbers), 6)
+    ]
 
 
 def part1(input_file: TextIOWrapper):
@@ -104,13 +94,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -2,19 +2,21 @@ import argparse
 import collections
 import concurrent.futures
 import functools
-import io
 import itertools
+import math
 import operator
-import re
-from collections import defaultdict, deque
+import statistics
+from collections import deque
 from dataclasses import dataclass
 from fractions import Fraction
 from io import TextIOWrapper
 from pathlib import Path
 from typing import NamedTuple
 
-from rich import print
-from tqdm.rich import tqdm, trange
+from output import print
+from profiling import profile_if
+from render import Palette, render, show
+from utils import find_cycle, ints, read_input
 
 VERBOSE = False
 
@@ -70,40 +72,25 @@ class Robot:
         self.p += self.v
 
 
+# up to 9 robots on a cell show as their number, more as a "+"
+ROBOT_COUNTS = ".123456789"
+MAP_PALETTE = Palette({c: "green" for c in ROBOT_COUNTS[1:] + "+"})
+
+
 def print_map(robots: list[Robot]):
-    robot_positions = defaultdict(int)
+    rows = [bytearray(b"." * MAP_WIDTH) for _ in range(MAP_HEIGHT)]
     for r in robots:
-        robot_positions[Point(r.p.x, r.p.y)] += 1
-
-    print("    ", end="")
-    for i in range(MAP_WIDTH):
-        print(i % 10, end="")
-    print("")
-    for y in range(MAP_HEIGHT):
-        print(f"{y:2}: ", end="")
-        for x in range(MAP_WIDTH):
-            if (count := robot_positions[Point(x, y)]) > 0:
-                print(count, end="")
-            else:
-                print(".", end="")
-        print("")
-    print("")
-
-
-def load_input(indata: TextIOWrapper) -> list[list[int]]:
-    robot_re = re.compile(r"p=(?P<px>-?\d+),(?P<py>-?\d+) v=(?P<vx>-?\d+),(?P<vy>-?\d+)")
+        count = ROBOT_COUNTS.find(chr(rows[r.p.y][r.p.x])) + 1
+        rows[r.p.y][r.p.x] = ord(ROBOT_COUNTS[count] if 0 < count < len(ROBOT_COUNTS) else "+")
+    show(render(rows, MAP_PALETTE))
+
+
+def load_input(indata: TextIOWrapper) -> list[Robot]:
+    # "p=PX,PY v=VX,VY"
+    numbers = ints(read_input(indata, comment=b"#"))
     robots = []
-    for row_idx, line in enumerate(indata):
-        line = line.split("#")[0].strip()
-        if not line:
-            continue
-        if m := robot_re.match(line):
-            robots.append(
-                Robot(
-                    MutablePoint(int(m.group("px")), int(m.group("py"))),
-                    MutablePoint(int(m.group("vx")), int(m.group("vy"))),
-                )
-            )
+    for px, py, vx, vy in zip(numbers[0::4], numbers[1::4], numbers[2::4], numbers[3::4]):
+        robots.append(Robot(MutablePoint(px, py), MutablePoint(vx, vy)))
 
     return robots
 
@@ -145,33 +132,40 @@ def part1(input_file: TextIOWrapper):
     print(f"Part 1: {safety_factor}")
 
 
-def print_map2(robots: list[Robot], out_file):
-    out = io.StringIO()
-    robot_positions = defaultdict(int)
-    for r in robots:
-        robot_positions[Point(r.p.x, r.p.y)] += 1
+def tightest_time(positions: tuple[int, ...], velocities: tuple[int, ...], size: int) -> tuple[int, int]:
+    """Return the time at which the robots are the least spread along one axis, and the period of that axis."""
 
-    for y in range(MAP_HEIGHT):
-        for x in range(MAP_WIDTH):
-            if (count := robot_positions[Point(x, y)]) > 0:
-                print(count, end="", file=out)
-            else:
-                print(" ", end="", file=out)
-        print("", file=out)
-    print("", file=out)
+    def step(positions):
+        return tuple((p + v) % size for p, v in zip(positions, velocities))
 
-    out_file.write(out.getvalue())
+    cycle = find_cycle(lambda: positions, step)
+    best_time, best_variance = 0, math.inf
+    for time in range(cycle.start + cycle.period):
+        if (variance := statistics.pvariance(positions)) < best_variance:
+            best_time, best_variance = time, variance
+        positions = step(positions)
+    return best_time, cycle.period
 
 
 def part2(input_file: TextIOWrapper):
-    part1_rounds = 1_000_000
+    """The robots form the tree when they are packed the tightest, which can be found separately for both axes.
+
+    The x coordinates repeat every MAP_WIDTH seconds and the y ones every MAP_HEIGHT seconds (at most - the periods
+    are found by simulating), the tree appears at the time matching both according to the Chinese remainder theorem.
+    """
     robots = load_input(input_file)
-    with open("iterations dump2", "w") as out:
-        for round in trange(1000, part1_rounds):
-            print(f"\n\n\n\n\nIteration {round}", file=out)
-            print_map2(robots, out)
-            for r in robots:
-                r.move()
+    time_x, period_x = tightest_time(tuple(r.p.x for r in robots), tuple(r.v.x for r in robots), MAP_WIDTH)
+    time_y, period_y = tightest_time(tuple(r.p.y for r in robots), tuple(r.v.y for r in robots), MAP_HEIGHT)
+    if VERBOSE:
+        print(f"x: tightest at {time_x} (period {period_x}), y: tightest at {time_y} (period {period_y})")
+    # time = time_x + k * period_x, and time = time_y (mod period_y)
+    k = (time_y - time_x) * pow(period_x, -1, period_y) % period_y
+    time = time_x + k * period_x
+    if VERBOSE:
+        for r in robots:
+            r.p = MutablePoint((r.p.x + r.v.x * time) % MAP_WIDTH, (r.p.y + r.v.y * time) % MAP_HEIGHT)
+        print_map(robots)
+    print(f"Part 2: {time}")
 
 
 def main():
@@ -179,13 +173,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
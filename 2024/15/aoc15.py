@@ -14,8 +14,9 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import NamedTuple
 
-from rich import print
-from tqdm.rich import tqdm, trange
+from output import print
+from profiling import profile_if
+from render import Palette, render, show
 
 VERBOSE = False
 
@@ -81,29 +82,14 @@ DIRECTION_TO_VECTOR = {
 }
 
 
+ROBOT = "@"
+WAREHOUSE_PALETTE = Palette({ROBOT: "red", WALL: "yellow", BOX: "blue", "[": "blue", "]": "blue"})
+
+
 def print_map(warehouse, robot: MutablePoint):
-    print("    ", end="")
-    height = len(warehouse)
-    width = len(warehouse[0])
-    for i in range(width):
-        print(i % 10, end="")
-    print("")
-    for y in range(height):
-        print(f"{y:2}: ", end="")
-        for x in range(width):
-            if robot == Point(x, y):
-                # print("\N{robot face}", end="")
-                print("[red]@[/red]", end="")
-            else:
-                match warehouse[y][x]:
-                    case "#":
-                        print(f"[yellow]{WALL}[/yellow]", end="")
-                    case w if w in (BOX, "[", "]"):
-                        print(f"[blue]{w}[/blue]", end="")
-                    case _:
-                        print(warehouse[y][x], end="")
-        print("")
-    print("")
+    rows = ["".join(row) for row in warehouse]
+    rows[robot.y] = rows[robot.y][: robot.x] + ROBOT + rows[robot.y][robot.x + 1 :]
+    show(render(rows, WAREHOUSE_PALETTE))
 
 
 def load_input(indata: TextIOWrapper):
@@ -307,13 +293,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
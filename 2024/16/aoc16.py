@@ -1,23 +1,12 @@
 import argparse
-import collections
-import concurrent.futures
 import enum
-import functools
-import gc
-import heapq
-import io
-import itertools
-import operator
-import re
-from collections import defaultdict, deque
-from dataclasses import dataclass, field
-from fractions import Fraction
-from io import TextIOWrapper
-from pathlib import Path
-from typing import Iterable, NamedTuple
-
-from rich import print
-from tqdm import tqdm, trange
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import NamedTuple
+
+from output import count, print
+from profiling import profile_if
+from utils import INFINITY, dijkstra_search
 
 VERBOSE = False
 
@@ -117,63 +106,7 @@ class Coordinate(NamedTuple):
     direction: Direction
 
 
-class Edge(NamedTuple):
-    target: Coordinate
-    points: int
-
-    @property
-    def weight(self):
-        return self.points
-
-
-@dataclass(order=True)
-class Node:
-    """A graph node class for use with the Dijkstra algorithm."""
-
-    coordinates: Coordinate
-    links: list[Edge] = field(default_factory=list, repr=False, init=False, compare=False)
-    is_blocked: bool
-
-    # def __lt__(self, other):
-    #     if not isinstance(other, Node):
-    #         return NotImplemented
-    #     return self.coordinates < other.coordinates
-
-    def __hash__(self) -> int:
-        return hash(self.coordinates)
-
-
-def dijkstra(
-    nodes: Iterable[Node], start: Node, end_nodes: Iterable[Node]
-) -> tuple[dict[Coordinate, Node], dict[Coordinate, int]]:
-    """Implementation of Dijkstra graph path finding algorithm.
-
-    Actually finds a route from the start node to all reachable nodes.
-
-    :param nodes: an iterable of all the nodes in the graph.
-    :param start: the start node.
-    :param end_nodes: an iterable of end nodes.
-    :returns: a mapping of node to its parent (predecesor on the path).
-    """
-    graph = {node.coordinates: node for node in nodes}
-    distance: dict[Coordinate, int] = defaultdict(lambda: 999_999_999)
-    distance[start.coordinates] = 0
-    parent: dict[Coordinate, Node] = {start.coordinates: None}
-    queue: list[tuple[int, Node]] = [(0, start)]
-    for end_node in end_nodes:
-        heapq.heappush(queue, (9999_9999_9999_9999, end_node))
-    while queue:
-        unused_dist, u = heapq.heappop(queue)
-        for link in u.links:
-            if (new_distance := distance[u.coordinates] + link.weight) < distance[link.target]:
-                distance[link.target] = new_distance
-                parent[link.target] = u
-                heapq.heappush(queue, (distance[link.target], graph[link.target]))
-
-    return parent, distance
-
-
-def load_input(indata: TextIOWrapper):
+def load_input(indata: Iterable[str]):
     map = []
     start = end = None
     for row_idx, line in enumerate(indata):
@@ -192,177 +125,106 @@ def load_input(indata: TextIOWrapper):
     return map, start, end
 
 
-def make_graph(area, start: Point, end: Point):
-    graph: dict[Coordinate, Node] = {}
-
-    nodes: list[Node] = []
-    area_h = len(area)
+def make_moves(area):
+    """Return functions generating the moves from a state and the moves into it, plus the state encoder."""
     area_w = len(area[0])
-
-    # first create all the nodes
-    for r, row in enumerate(area):
-        for c, cell in enumerate(row):
-            # for going_straight in (True, False):
-            for direction in Direction.values():
-                coord = Coordinate(x=c, y=r, direction=direction)
-                blocked = cell != EMPTY
-                node = Node(coord, is_blocked=blocked)
-                graph[coord] = node
-                nodes.append(node)
-
-    # this will kill the GC (a graph of cycles and cycles) so disable it
-    gc.collect()
-    gc.disable()
-
-    for r in trange(area_h, desc="rows"):
-        for c in trange(area_w, desc="columns"):
-            # for going_straight in (True, False):
-            # direction from which we get on to this node
-            if area[r][c] == WALL:
-                continue
-            for direction in Direction.values():
-                node = graph[Coordinate(x=c, y=r, direction=direction)]
-                # create straight forward link to neighbour
-                direction_vector = DIRECTION_TO_VECTOR[direction]
-                nx = c + direction_vector[0]
-                ny = r + direction_vector[1]
-                if (0 <= nx < area_w) and (0 <= ny < area_h) and area[ny][nx] == EMPTY:
-                    # if nx < 0 or nx >= area_w or ny < 0 or ny >= area_h or area[ny][nx] == WALL:
-                    neighbour_coord = Coordinate(x=nx, y=ny, direction=direction)
-                    if neighbour_coord in graph:
-                        node.links.append(Edge(neighbour_coord, POINTS_STRAIGHT))
-                for rotated_direction in Direction.values():
-                    # create rotation link
-                    if direction != rotated_direction and rotated_direction != direction.reverse():
-                        rotated_coord = Coordinate(x=c, y=r, direction=rotated_direction)
-                        node.links.append(Edge(rotated_coord, POINTS_ROTATION))
-                assert len(node.links) > 0
-
-    # add a starting node
-    start_coord = Coordinate(x=start.x, y=start.y, direction=Direction.RIGHT)
-    starting_node = graph[start_coord]
-
-    end_nodes = [graph[Coordinate(x=end.x, y=end.y, direction=d)] for d in Direction.values()]
-    return graph, nodes, starting_node, end_nodes
-
-
-def part1(input_file: TextIOWrapper):
-    area, start, end = load_input(input_file)
+    rotations = {
+        direction: [other for other in Direction.values() if other != direction and other != direction.reverse()]
+        for direction in Direction.values()
+    }
+    direction_index = {direction: idx for idx, direction in enumerate(Direction.values())}
+
+    def encode(state: Coordinate) -> int:
+        return (state.y * area_w + state.x) * 4 + direction_index[state.direction]
+
+    def neighbours(state: Coordinate):
+        x, y, direction = state
+        direction_vector = DIRECTION_TO_VECTOR[direction]
+        nx = x + direction_vector.x
+        ny = y + direction_vector.y
+        # the maze is surrounded by walls, no need to check the bounds
+        if area[ny][nx] == EMPTY:
+            yield Coordinate(nx, ny, direction), POINTS_STRAIGHT
+        for rotated_direction in rotations[direction]:
+            yield Coordinate(x, y, rotated_direction), POINTS_ROTATION
+
+    def reverse_neighbours(state: Coordinate):
+        x, y, direction = state
+        direction_vector = DIRECTION_TO_VECTOR[direction]
+        px = x - direction_vector.x
+        py = y - direction_vector.y
+        if area[py][px] == EMPTY:
+            yield Coordinate(px, py, direction), POINTS_STRAIGHT
+        for rotated_direction in rotations[direction]:
+            yield Coordinate(x, y, rotated_direction), POINTS_ROTATION
+
+    return neighbours, reverse_neighbours, encode
+
+
+def parse(buf: bytes):
+    """The maze, the start and the end; both parts only read them."""
+    return load_input(buf.decode().splitlines())
+
+
+def part1(parsed):
+    area, start, end = parsed
     assert area
     assert start
     assert end
-    graph, nodes, starting_node, end_nodes = make_graph(area, start, end)
-    parents, distance = dijkstra(nodes, starting_node, end_nodes=end_nodes)
-
-    min_score = 999_999_999_999_999
-    for end_node in end_nodes:
-        print(f"Parents of end node {end_node.coordinates}:")
-        if end_node.coordinates not in parents:
-            print(f"[red]End node {end_node} not found in parents![/red]")
-            continue
-        if (dist := distance[end_node.coordinates]) < min_score:
-            min_score = dist
-
-    print(f"Part 1: {min_score:,}")
-
-
-def dijkstra2(
-    nodes: Iterable[Node], start: Node, end_nodes: Iterable[Node]
-) -> tuple[dict[Coordinate, list[Node]], dict[Coordinate, int]]:
-    """Implementation of Dijkstra graph path finding algorithm.
-
-    Actually finds a route from the start node to all reachable nodes.
-
-    :param nodes: an iterable of all the nodes in the graph.
-    :param start: the start node.
-    :param end_nodes: an iterable of end nodes.
-    :returns: a mapping of node to its parent (predecesor on the path).
-    """
-    graph = {node.coordinates: node for node in nodes}
-    distance: dict[Coordinate, int] = defaultdict(lambda: 999_999_999)
-    distance[start.coordinates] = 0
-    parent: dict[Coordinate, list[Node]] = {start.coordinates: None}
-    queue: list[tuple[int, Node]] = [(0, start)]
-    for end_node in end_nodes:
-        heapq.heappush(queue, (9999_9999_9999_9999, end_node))
-    while queue:
-        unused_dist, u = heapq.heappop(queue)
-        for link in u.links:
-            if (new_distance := distance[u.coordinates] + link.weight) < distance[link.target]:
-                distance[link.target] = new_distance
-                parent[link.target] = [u]
-                heapq.heappush(queue, (distance[link.target], graph[link.target]))
-            elif (new_distance := distance[u.coordinates] + link.weight) == distance[link.target]:
-                parent[link.target].append(u)
-                heapq.heappush(queue, (distance[link.target], graph[link.target]))
-
-    return parent, distance
-
-
-part2_parents = {}
-
-
-@functools.cache
-def calculare_score_helper(point) -> set[Point]:
-    i = point
-    distinct_points = {Point(i.coordinates.x, i.coordinates.y)}
-    junctions_to_check = [i]
-    while junctions_to_check:
-        i = junctions_to_check.pop()
-        distinct_points |= {Point(i.coordinates.x, i.coordinates.y)}
-        if part2_parents[i.coordinates] is None:
-            continue
-        for parent in part2_parents[i.coordinates]:
-            distinct_points |= calculare_score_helper(parent)
-    return distinct_points
-
-
-def part2(input_file: TextIOWrapper):
-    area, start, end = load_input(input_file)
+    neighbours, unused_reverse_neighbours, encode = make_moves(area)
+    result = dijkstra_search(
+        [Coordinate(start.x, start.y, Direction.RIGHT)],
+        neighbours,
+        encode,
+        is_goal=lambda state: state.x == end.x and state.y == end.y,
+    )
+    count("states reached", len(result.distance))
+    if result.goal is None:
+        print(f"[red]End {end} not reachable![/red]")
+        return None
+    return result.cost
+
+
+def part2(parsed):
+    area, start, end = parsed
     assert area
     assert start
     assert end
-    graph, nodes, starting_node, end_nodes = make_graph(area, start, end)
-    parents, distance = dijkstra2(nodes, starting_node, end_nodes=end_nodes)
-
-    part2_parents.update(parents)
-
-    min_score = 999_999_999_999_999
-    min_score_end_node = end_nodes[0]
-    for end_node in end_nodes:
-        print(f"Parents of end node {end_node.coordinates}:")
-        if end_node.coordinates not in parents:
-            print(f"[red]End node {end_node} not found in parents![/red]")
-            continue
-        if (dist := distance[end_node.coordinates]) < min_score:
-            min_score = dist
-            min_score_end_node = end_node
-
-    i = min_score_end_node
-    # distinct_points = {(i.coordinates.x, i.coordinates.y)}
-    # junctions_to_check = [i]
-    # while junctions_to_check:
-    #     i = junctions_to_check.pop()
-    #     distinct_points |= {(i.coordinates.x, i.coordinates.y)}
-    #     if parents[i.coordinates]:
-    #         junctions_to_check.extend(parents[i.coordinates])
-    distinct_points = calculare_score_helper(i)
-
-    print(f"Part 2: {len(distinct_points):,}")
+    neighbours, reverse_neighbours, encode = make_moves(area)
+    from_start = dijkstra_search([Coordinate(start.x, start.y, Direction.RIGHT)], neighbours, encode).distance
+
+    end_states = [Coordinate(end.x, end.y, d) for d in Direction.values()]
+    min_score = min(from_start.get(encode(state), INFINITY) for state in end_states)
+    if min_score == INFINITY:
+        print(f"[red]End {end} not reachable![/red]")
+        return None
+    best_end_states = [state for state in end_states if from_start.get(encode(state)) == min_score]
+    # a state is on one of the best paths if the best way to it and the best way from it to the end add up to the
+    # best score - so search backwards from the end as well
+    to_end = dijkstra_search(best_end_states, reverse_neighbours, encode).distance
+    count("states reached", len(from_start) + len(to_end))
+
+    distinct_points = {
+        key // 4 for key, distance in from_start.items() if distance + to_end.get(key, INFINITY) == min_score
+    }
+    return len(distinct_points)
 
 
 def main():
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("part", type=int, choices=[1, 2])
-    parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
+    parser.add_argument("input", type=argparse.FileType("rb"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    parsed = parse(arguments.input.read())
+    with profile_if(arguments.profile):
+        answer = part1(parsed) if arguments.part == 1 else part2(parsed)
+    # None when the end can't be reached, which the part has reported already
+    if answer is not None:
+        print(f"Part {arguments.part}: {answer:,}")
 
 
 if __name__ == "__main__":
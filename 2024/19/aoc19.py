@@ -2,7 +2,6 @@ import argparse
 import collections
 import concurrent.futures
 import enum
-import functools
 import gc
 import heapq
 import io
@@ -16,17 +15,17 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import Iterable, NamedTuple
 
-from rich import print
-from tqdm.rich import tqdm, trange
+from output import print, tqdm
+from profiling import profile_if
+from utils import memoize
 
 VERBOSE = False
 
-patterns = []
-
 
 def load_input(indata: TextIOWrapper):
     designs = []
-    patterns.extend(indata.readline().strip().split(", "))
+    # a frozenset caches its hash, which makes it a cheap context for the memoized functions
+    patterns = frozenset(indata.readline().strip().split(", "))
     for row_idx, line in enumerate(indata):
         line = line.split("#")[0].strip()
         if not line:
@@ -35,8 +34,8 @@ def load_input(indata: TextIOWrapper):
     return patterns, designs
 
 
-@functools.cache
-def make_design_from_patterns(design):
+@memoize(context=True)
+def make_design_from_patterns(patterns: frozenset[str], design: str):
     candidates = []
     if design == "":
         # we successfully created the required design
@@ -45,7 +44,7 @@ def make_design_from_patterns(design):
         if design.startswith(pattern):
             candidates.append(pattern)
     for pattern in candidates:
-        if make_design_from_patterns(design.removeprefix(pattern)):
+        if make_design_from_patterns(patterns, design.removeprefix(pattern)):
             return True
     return False
 
@@ -55,14 +54,14 @@ def part1(input_file: TextIOWrapper):
 
     possible_designs = 0
     for design in tqdm(designs, desc="designs"):
-        if make_design_from_patterns(design):
+        if make_design_from_patterns(patterns, design):
             possible_designs += 1
 
     print(f"Part 1: {possible_designs:,}")
 
 
-@functools.cache
-def make_design_from_patterns2(design):
+@memoize(context=True)
+def make_design_from_patterns2(patterns: frozenset[str], design: str):
     candidates = []
     if design == "":
         # we successfully created the required design
@@ -72,7 +71,7 @@ def make_design_from_patterns2(design):
             candidates.append(pattern)
     number_of_combinations = 0
     for pattern in candidates:
-        res = make_design_from_patterns2(design.removeprefix(pattern))
+        res = make_design_from_patterns2(patterns, design.removeprefix(pattern))
         if res:
             number_of_combinations += res
     return number_of_combinations
@@ -83,7 +82,7 @@ def part2(input_file: TextIOWrapper):
 
     possible_designs = 0
     for design in tqdm(designs, desc="designs"):
-        if number_of_combinations := make_design_from_patterns2(design):
+        if number_of_combinations := make_design_from_patterns2(patterns, design):
             if VERBOSE:
                 print(f"Number of combinations for design {design}: {number_of_combinations}")
             possible_designs += number_of_combinations
@@ -96,13 +95,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
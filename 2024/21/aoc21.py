@@ -1,10 +1,10 @@
 import argparse
 import contextlib
-import functools
 from io import TextIOWrapper
 
-from rich import print
-from tqdm import tqdm
+from output import print, tqdm
+from profiling import profile_if
+from utils import memoize
 
 VERBOSE = False
 
@@ -271,7 +271,7 @@ def part1(input_file: TextIOWrapper):
     print(f"Part 1: {result:,}")
 
 
-@functools.cache
+@memoize
 def part2_worker_helper(directional_robot_sequence: str, number_of_robots: int) -> int:
     ret = 0
     # each robot starts on ACTION
@@ -288,7 +288,7 @@ def part2_worker_helper(directional_robot_sequence: str, number_of_robots: int)
         ret += intermediate_sequence_length
         controlled_robot_state = key
     if number_of_robots >= 4 and VERBOSE:
-        print(f"{number_of_robots=}", part2_worker_helper.cache_info())
+        print(f"{number_of_robots=}", part2_worker_helper.stats())
     return ret
 
 
@@ -327,13 +327,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -16,9 +16,9 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import Iterable, NamedTuple
 
-from rich import print
-from rich.pretty import pprint
-from tqdm import tqdm, trange
+from output import print
+from profiling import profile_if
+from utils import maximum_clique
 
 VERBOSE = False
 
@@ -78,45 +78,6 @@ def print_lans(lans: frozenset[frozenset[str]]):
     print(sorted_sets)
 
 
-# https://en.wikipedia.org/wiki/Bron%E2%80%93Kerbosch_algorithm
-# The recursion is initiated by setting R and X to be the empty set and P to be the vertex set of the graph.
-def bron_kerbosch(r: set[str], p: set[str], x: set[str], graph: dict[str, set[str]]) -> list[set[str]]:
-    """
-    Bron-Kerbosch algorithm to find maximal cliques in an undirected graph.
-
-    :param R: Current clique (set of nodes in the clique found so far).
-    :param P: Candidates to extend the clique.
-    :param X: Excluded nodes (nodes that should not be considered for extension).
-    :param graph: The graph as a dictionary where the keys are node identifiers and the values are sets of neighboring nodes.
-    """
-    results = []
-    if len(p) == 0 and len(x) == 0:
-        return [r]
-    p, orig_p = set(p), p
-    x = set(x)
-    for vertex in orig_p:  # don't modify while being iterated over
-        v = {vertex}
-        result = bron_kerbosch(r | v, p & graph[vertex], x & graph[vertex], graph=graph)
-        if result:
-            results.extend(result)
-        p -= v
-        x |= v
-    return results
-
-
-def find_maximal_cliques(graph):
-    """
-    Function to initiate Bron-Kerbosch algorithm.
-
-    :param graph: The graph as a dictionary where the keys are node identifiers and the values are sets of neighboring nodes.
-    """
-    P = set(graph.keys())  # All nodes are candidates initially
-    X = set()  # No nodes are excluded initially
-    R = set()  # No nodes in the clique initially
-
-    return bron_kerbosch(R, P, X, graph)
-
-
 def part2(input_file: TextIOWrapper):
     input_lines = load_input(input_file)
     computer_links = defaultdict(set)
@@ -127,8 +88,7 @@ def part2(input_file: TextIOWrapper):
         vertexes.add(side_b)
         computer_links[side_a].add(side_b)
         computer_links[side_b].add(side_a)
-    all_cliques = find_maximal_cliques(computer_links)
-    largest_lan = sorted(all_cliques, key=len, reverse=True)[0]
+    largest_lan = maximum_clique(computer_links)
 
     print(f"Part 2: {','.join(sorted(largest_lan))}")
 
@@ -138,13 +98,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -8,7 +8,6 @@ import heapq
 import io
 import itertools
 import operator
-import re
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from fractions import Fraction
@@ -16,9 +15,9 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import Iterable, NamedTuple, TypedDict
 
-from rich import print
-from rich.pretty import pprint
-from tqdm import tqdm, trange
+from output import print
+from profiling import profile_if
+from utils import blocks, read_input
 
 VERBOSE = False
 
@@ -35,26 +34,20 @@ def load_input(indata: TextIOWrapper) -> tuple[dict, list[Gate]]:
     gates = []
     wires = {}
     init_states = {}
-    gate_re = re.compile(r"(?P<in1>\w{3}) (?P<gate>[A-Z]{2,3}) (?P<in2>\w{3}) -> (?P<out>\w{3})")
-    for row_idx, line in enumerate(indata):
-        line = line.strip().split("#")[0]
-        if not line:
-            continue
-        res = line.split(":")
-        if len(res) == 2:
-            init_states[res[0]] = bool(int(res[1]))
-            wires[res[0]] = {"initial": bool(int(res[1]))}
-        elif m := gate_re.match(line):
-            gate = {
-                "gate": m.group("gate").lower(),
-                "in1": m.group("in1"),
-                "in2": m.group("in2"),
-                "out": m.group("out"),
-            }
-            gates.append(gate)
-            wires.setdefault(m.group("in1"), {"name": m.group("in1")}).setdefault("destinations", []).append(gate)
-            wires.setdefault(m.group("in2"), {"name": m.group("in2")}).setdefault("destinations", []).append(gate)
-            wires.setdefault(m.group("out"), {})["input"] = gate
+    initial_block, gates_block = blocks(read_input(indata, comment=b"#"))
+    # "x00: 1"
+    for line in initial_block.decode().splitlines():
+        name, value = line.split(":")
+        init_states[name] = bool(int(value))
+        wires[name] = {"initial": bool(int(value))}
+    # "IN1 GATE IN2 -> OUT"
+    tokens = gates_block.decode().split()
+    for in1, gate_name, in2, out in zip(tokens[0::5], tokens[1::5], tokens[2::5], tokens[4::5]):
+        gate = {"gate": gate_name.lower(), "in1": in1, "in2": in2, "out": out}
+        gates.append(gate)
+        wires.setdefault(in1, {"name": in1}).setdefault("destinations", []).append(gate)
+        wires.setdefault(in2, {"name": in2}).setdefault("destinations", []).append(gate)
+        wires.setdefault(out, {})["input"] = gate
     for wire in init_states:
         wires[wire]["state"] = init_states[wire]
 
@@ -113,13 +106,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -17,9 +17,8 @@ from io import TextIOWrapper
 from pathlib import Path
 from typing import Iterable, NamedTuple, TypedDict
 
-from rich import print
-from rich.pretty import pprint
-from tqdm import tqdm, trange
+from output import print
+from profiling import profile_if
 
 VERBOSE = False
 
@@ -77,13 +76,15 @@ def main():
     parser.add_argument("part", type=int, choices=[1, 2])
     parser.add_argument("input", type=argparse.FileType("r"), default="test_input.txt")
     parser.add_argument("-v", "--verbose", action="store_true")
+    parser.add_argument("--profile", metavar="PREFIX", help="write profiles of the part to PREFIX.*")
     arguments = parser.parse_args()
     global VERBOSE
     VERBOSE = arguments.verbose
-    if arguments.part == 1:
-        part1(arguments.input)
-    elif arguments.part == 2:
-        part2(arguments.input)
+    with profile_if(arguments.profile):
+        if arguments.part == 1:
+            part1(arguments.input)
+        elif arguments.part == 2:
+            part2(arguments.input)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,689 @@
+"""Run the Advent of Code solutions in-process and report how long they took.
+
+The days follow a few different conventions:
+
+- 2021/2022: ``part_1()``/``part_2()`` reading ``input.txt`` from the current directory,
+- 2023: ``part1()``/``part2()`` (from the first ``template.py``) also reading ``input.txt``,
+- 2024: ``aocNN.py`` with ``part1(input_file)``/``part2(input_file)`` taking an open file,
+- new days (``template.py``): ``parse(buf)`` turning the input's bytes into whatever the parts need and
+  ``part1(parsed)``/``part2(parsed)`` returning the answers. Defining ``parse`` is what makes the runner treat
+  a day this way.
+
+The runner hides those differences: a part without parameters is run in a scratch directory where ``input.txt``
+points at the requested input, a part with a parameter gets the input file opened for it. A day with ``parse``
+gets the input read into memory before the clock starts and no files at all; `run` parses it once for all the
+parts and runs them in parallel processes (``--sequential`` for one after the other).
+
+Examples::
+
+    python aoc.py list
+    python aoc.py run 2024/16 --part 1 --input sample.txt
+    python aoc.py run --input input.txt          # every day that has an input.txt
+    python aoc.py run 2022/16 --profile profiles  # cProfile, flame graph stacks and allocations per part
+    python aoc.py run 2024/06 -p 1 --input sample.txt --animate  # the guard's walk, drawn in place
+    python aoc.py batch 2024/19 --inputs 'inputs/*.txt' -j 8  # every matching input, 8 processes
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import glob
+import importlib.util
+import inspect
+import io
+import multiprocessing
+import os
+import pickle
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import ModuleType
+
+import cache
+import output
+import profiling
+import render
+import utils
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+YEAR_RE = re.compile(r"^\d{4}$")
+DAY_RE = re.compile(r"^\d{2}$")
+
+DEFAULT_INPUT = "input.txt"
+IMPORT_TIME_TOP = 5
+ANIMATION_FPS = 30
+# names under which the old style days look for their input in the current directory
+INPUT_FILE_NAMES = ("input.txt", "test_input.txt")
+
+
+@dataclass(frozen=True, order=True)
+class Day:
+    year: int
+    day: int
+    path: Path = field(compare=False)
+
+    @property
+    def name(self) -> str:
+        return f"{self.year}/{self.day:02}"
+
+    @property
+    def directory(self) -> Path:
+        return self.path.parent
+
+    @property
+    def module_name(self) -> str:
+        return f"aoc_{self.year}_{self.day:02}"
+
+    def load(self) -> ModuleType:
+        """Import the day's module (once) under a unique name."""
+        if self.module_name in sys.modules:
+            return sys.modules[self.module_name]
+        spec = importlib.util.spec_from_file_location(self.module_name, self.path)
+        module = importlib.util.module_from_spec(spec)
+        # registered before executing so that process pools can pickle the module's functions
+        sys.modules[self.module_name] = module
+        # days import `utils` from the repo root and sometimes their own siblings
+        sys.path[:0] = [str(REPO_ROOT), str(self.directory)]
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            del sys.modules[self.module_name]
+            raise
+        finally:
+            del sys.path[:2]
+        return module
+
+    def unload(self) -> None:
+        """Forget the imported module so that the next `load` starts with fresh module level state."""
+        sys.modules.pop(self.module_name, None)
+
+    def part_function(self, module: ModuleType, part: int) -> Callable:
+        for name in (f"part{part}", f"part_{part}"):
+            if callable(function := getattr(module, name, None)):
+                return function
+        raise LookupError(f"{self.name} has no part {part}")
+
+    def resolve_input(self, input_name: str | os.PathLike) -> Path:
+        """Relative inputs are looked up in the day's directory."""
+        input_path = Path(input_name)
+        if not input_path.is_absolute():
+            input_path = self.directory / input_path
+        return input_path
+
+
+@dataclass
+class PartResult:
+    day: Day
+    part: int
+    input_path: Path
+    answer: object = None
+    wall_time: float = 0.0
+    cpu_time: float = 0.0
+    # in kB, None when the platform can't tell
+    peak_rss: int | None = None
+    output: str = ""
+    error: BaseException | None = None
+    # counters of the day's `utils.memoize` caches, by function name
+    memo_stats: dict[str, utils.MemoStats] = field(default_factory=dict)
+    # the day's `output.counters`
+    counters: dict[str, int] = field(default_factory=dict)
+    # of the days with a `parse`, included in the wall time
+    parse_time: float | None = None
+    # time spent in garbage collections during the part and their number
+    gc_pause: float = 0.0
+    gc_collections: int = 0
+
+
+@dataclass
+class ImportTime:
+    """What importing a day's module costs, from ``python -X importtime``."""
+
+    day: Day
+    # in seconds, of everything the module imports on top of a bare interpreter
+    total: float
+    # the module's own imports, by cumulative time, slowest first
+    imports: list[tuple[str, float]]
+
+
+def discover(root: Path = REPO_ROOT) -> list[Day]:
+    """Find all the `YEAR/DAY` solution modules."""
+    days = []
+    for year_dir in root.iterdir():
+        if not (year_dir.is_dir() and YEAR_RE.match(year_dir.name)):
+            continue
+        for day_dir in year_dir.iterdir():
+            if not (day_dir.is_dir() and DAY_RE.match(day_dir.name)):
+                continue
+            if module_path := find_solution_module(day_dir):
+                days.append(Day(int(year_dir.name), int(day_dir.name), module_path))
+    return sorted(days)
+
+
+def find_solution_module(day_dir: Path) -> Path | None:
+    candidates = [day_dir / f"aoc{day_dir.name}.py", day_dir / "main.py", *sorted(day_dir.glob("aoc*.py"))]
+    for candidate in candidates:
+        if candidate.is_file():
+            return candidate
+    return None
+
+
+def select_days(days: Iterable[Day], selectors: Iterable[str]) -> list[Day]:
+    """Filter days by `YEAR` or `YEAR/DAY` selectors (no selectors means all of them)."""
+    selectors = [s.strip("/") for s in selectors]
+    if not selectors:
+        return list(days)
+    selected = []
+    for day in days:
+        if any(s == day.name or s == str(day.year) or s == f"{day.year}/{day.day}" for s in selectors):
+            selected.append(day)
+    return selected
+
+
+def _reset_peak_rss() -> bool:
+    """Reset the kernel's RSS high water mark (Linux only), return if it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        return False
+    return True
+
+
+def _peak_rss() -> int:
+    """Return the peak resident set size in kB."""
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, everyone else kB
+    return max_rss // 1024 if sys.platform == "darwin" else max_rss
+
+
+@contextlib.contextmanager
+def _input_as_cwd(input_path: Path):
+    """Run in a scratch directory in which the input is visible as `input.txt`."""
+    previous_cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="aoc-") as scratch:
+        for name in INPUT_FILE_NAMES:
+            os.symlink(input_path.resolve(), os.path.join(scratch, name))
+        os.chdir(scratch)
+        try:
+            yield
+        finally:
+            os.chdir(previous_cwd)
+
+
+class _Tee(io.StringIO):
+    def __init__(self, echo_to=None):
+        super().__init__()
+        self.echo_to = echo_to
+
+    def write(self, s: str) -> int:
+        if self.echo_to is not None:
+            self.echo_to.write(s)
+        return super().write(s)
+
+
+def find_memos(module: ModuleType) -> dict[str, utils.Memo]:
+    """Return the `utils.memoize` caches of a module's functions."""
+    return {
+        name: memo
+        for name, value in vars(module).items()
+        if isinstance(memo := getattr(value, "memo", None), utils.Memo)
+    }
+
+
+def last_output_line(output: str) -> str | None:
+    for line in reversed(output.splitlines()):
+        if line := line.strip():
+            return line
+    return None
+
+
+# `run_part` without an already parsed input
+_UNPARSED = object()
+
+
+def run_part(
+    day: Day,
+    part: int,
+    input_path: Path,
+    verbose: bool = False,
+    profile_dir: Path | None = None,
+    parsed=_UNPARSED,
+) -> PartResult:
+    """Run one part of a day on the given input in this process.
+
+    The answer is the part's return value, or the last line it printed for the days that only print it.
+
+    :param profile_dir: profile the part (see `profiling.profile`) into ``YEAR_DAY_partN.*`` files there.
+    :param parsed: the result of the day's ``parse`` of the input, if `run_day` already has it.
+    """
+    result = PartResult(day, part, input_path)
+    module = day.load()
+    if hasattr(module, "VERBOSE"):
+        module.VERBOSE = verbose
+    function = day.part_function(module, part)
+    parse = getattr(module, "parse", None)
+    in_memory = callable(parse)
+    takes_input = len(inspect.signature(function).parameters) > 0
+    buf = input_path.read_bytes() if in_memory and parsed is _UNPARSED else None
+    memos = find_memos(module)
+    for memo in memos.values():
+        memo.reset_stats()
+
+    output.VERBOSE = verbose
+    output.counters.clear()
+    captured = _Tee(sys.stdout if verbose else None)
+    per_part_rss = _reset_peak_rss()
+    profile_prefix = None if profile_dir is None else profile_dir.resolve() / f"{day.year}_{day.day:02}_part{part}"
+    with (
+        contextlib.nullcontext() if in_memory else _input_as_cwd(input_path),
+        contextlib.redirect_stdout(captured),
+        profiling.profile_if(profile_prefix),
+        utils.record_gc_pauses() as gc_pauses,
+    ):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            if in_memory:
+                if parsed is _UNPARSED:
+                    parsed = parse(buf)
+                    result.parse_time = time.perf_counter() - wall_start
+                answer = function(parsed)
+            elif takes_input:
+                with open(input_path) as input_file:
+                    answer = function(input_file)
+            else:
+                answer = function()
+        except Exception as e:
+            answer = None
+            result.error = e
+        result.cpu_time = time.process_time() - cpu_start
+        result.wall_time = time.perf_counter() - wall_start
+    result.gc_pause = gc_pauses.total
+    result.gc_collections = gc_pauses.collections
+    result.peak_rss = _peak_rss() if per_part_rss or sys.platform != "linux" else None
+    result.memo_stats = {name: stats for name, memo in memos.items() if (stats := memo.stats()).hits + stats.misses}
+    result.counters = dict(output.counters)
+    result.output = captured.getvalue()
+    result.answer = answer if answer is not None else last_output_line(result.output)
+    return result
+
+
+_IMPORT_TIME_MARKER = "aoc: importing the day"
+_IMPORT_TIME_SCRIPT = f"""
+import importlib.util, sys
+sys.path[:0] = sys.argv[1:3]
+spec = importlib.util.spec_from_file_location("day", sys.argv[3])
+print({_IMPORT_TIME_MARKER!r}, file=sys.stderr, flush=True)
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+"""
+
+
+def expand_inputs(day: Day, pattern: str | os.PathLike) -> list[Path]:
+    """Return the files of a directory or matching a glob, relative patterns are taken from the day's directory."""
+    path = day.resolve_input(pattern)
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.is_file())
+    return sorted(Path(p) for p in glob.glob(str(path)) if os.path.isfile(p))
+
+
+def _picklable(value, fallback):
+    try:
+        pickle.dumps(value)
+    except Exception:
+        return fallback
+    return value
+
+
+def run_job(day: Day, part: int, input_path: Path, verbose: bool = False) -> PartResult:
+    """`run_part` in a worker process, with the answer and the error made safe to send back.
+
+    The worker keeps the day's module imported between jobs, so the parts mustn't leave state behind at module
+    level for the next input.
+    """
+    try:
+        result = run_part(day, part, input_path, verbose=verbose)
+    except LookupError:
+        raise
+    except Exception as e:
+        result = PartResult(day, part, input_path, error=e)
+    return _sendable(result)
+
+
+def _sendable(result: PartResult) -> PartResult:
+    """Make the answer and the error of a result safe to send back from a worker process."""
+    result.answer = _picklable(result.answer, str(result.answer))
+    result.error = _picklable(result.error, RuntimeError(repr(result.error)))
+    return result
+
+
+# the parsed input of the day `run_day` is running, which its forked workers inherit instead of unpickling a copy
+_shared_parsed = _UNPARSED
+
+
+def _set_concurrent_parts(count: int) -> None:
+    """Initialize a worker process: tell the memory budgets how many parts run at the same time."""
+    utils.CONCURRENT_PARTS = count
+
+
+def _run_parsed_part(day: Day, part: int, input_path: Path, verbose: bool, profile_dir: Path | None, parsed=_UNPARSED):
+    try:
+        result = run_part(
+            day, part, input_path, verbose, profile_dir, _shared_parsed if parsed is _UNPARSED else parsed
+        )
+    except Exception as e:
+        result = PartResult(day, part, input_path, error=e)
+    return _sendable(result)
+
+
+def run_day(
+    day: Day,
+    input_path: Path,
+    parts: Iterable[int] = (1, 2),
+    verbose: bool = False,
+    profile_dir: Path | None = None,
+    concurrent_parts: bool = True,
+) -> tuple[list[PartResult], float]:
+    """Run the parts of a day on an input, return their results and the wall time of the whole run.
+
+    A day with ``parse`` has the input parsed once, here, and the parts share what it returned: with
+    `concurrent_parts` every part runs in a process of its own (forked where possible, so the parsed data isn't
+    even copied until a part writes to it), otherwise one after the other in this process - so the parts mustn't
+    modify the parsed data. The other days run their parts one after the other with `run_part`. Missing parts are
+    skipped. The parts running side by side split the `utils.memory_budget` s between them.
+    """
+    global _shared_parsed
+    wall_start = time.perf_counter()
+    module = day.load()
+    parts = [part for part in parts if _has_part(day, module, part)]
+    parse = getattr(module, "parse", None)
+    if not callable(parse):
+        results = [run_part(day, part, input_path, verbose, profile_dir) for part in parts]
+        return results, time.perf_counter() - wall_start
+
+    parse_start = time.perf_counter()
+    try:
+        parsed = parse(input_path.read_bytes())
+    except Exception as e:
+        return [PartResult(day, part, input_path, error=e) for part in parts], time.perf_counter() - wall_start
+    parse_time = time.perf_counter() - parse_start
+
+    if not concurrent_parts or len(parts) < 2:
+        results = [run_part(day, part, input_path, verbose, profile_dir, parsed) for part in parts]
+    else:
+        fork = "fork" in multiprocessing.get_all_start_methods()
+        # without fork the workers get a pickled copy each
+        sent_parsed = () if fork else (parsed,)
+        _shared_parsed = parsed
+        try:
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=len(parts),
+                mp_context=multiprocessing.get_context("fork") if fork else None,
+                initializer=_set_concurrent_parts,
+                initargs=(len(parts),),
+            ) as pool:
+                futures = [
+                    pool.submit(_run_parsed_part, day, part, input_path, verbose, profile_dir, *sent_parsed)
+                    for part in parts
+                ]
+                results = [future.result() for future in futures]
+        finally:
+            _shared_parsed = _UNPARSED
+    for result in results:
+        result.parse_time = parse_time
+    return results, time.perf_counter() - wall_start
+
+
+def _has_part(day: Day, module: ModuleType, part: int) -> bool:
+    try:
+        day.part_function(module, part)
+    except LookupError:
+        return False
+    return True
+
+
+def run_batch(
+    days: Iterable[Day], parts: Iterable[int], pattern: str, jobs: int | None = None, verbose: bool = False
+) -> list[PartResult]:
+    """Run every part of the days on every input matching `pattern` (see `expand_inputs`) in a process pool.
+
+    The results come back in the order of the days, inputs and parts; missing parts are skipped.
+    """
+    parts = list(parts)
+    jobs = jobs or os.cpu_count() or 1
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, initializer=_set_concurrent_parts, initargs=(jobs,)
+    ) as pool:
+        futures = [
+            pool.submit(run_job, day, part, input_path, verbose)
+            for day in days
+            for input_path in expand_inputs(day, pattern)
+            for part in parts
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except LookupError:
+                continue
+    return results
+
+
+def parse_import_time(stderr: str) -> list[tuple[str, float]]:
+    """Return the top level imports in an ``-X importtime`` log that follow the marker, with their cumulative times."""
+    imports = []
+    _, _, log = stderr.partition(_IMPORT_TIME_MARKER)
+    for line in log.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # nested imports are indented and already counted in their importer's cumulative time
+        if not name.startswith("  ") and cumulative.strip().isdigit():
+            imports.append((name.strip(), int(cumulative) / 1e6))
+    return imports
+
+
+def measure_import_time(day: Day) -> ImportTime:
+    """Import the day's module in a fresh interpreter (the modules this one already imported would be free)."""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _IMPORT_TIME_SCRIPT, str(REPO_ROOT), str(day.directory), day.path],
+        capture_output=True,
+        text=True,
+        cwd=day.directory,
+    )
+    imports = parse_import_time(completed.stderr)
+    return ImportTime(day, sum(seconds for _, seconds in imports), sorted(imports, key=lambda i: i[1], reverse=True))
+
+
+def format_duration(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.0f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds:.2f} s"
+
+
+def format_rss(kilobytes: int | None) -> str:
+    if kilobytes is None:
+        return "?"
+    return f"{kilobytes / 1024:.1f} MiB"
+
+
+def format_gc(result: PartResult) -> str:
+    return f"{format_duration(result.gc_pause)} in {result.gc_collections:,}"
+
+
+def print_results(results: Iterable[PartResult], file=None) -> None:
+    file = file or sys.stdout
+    results = list(results)
+    header = f"{'day':8} {'part':>4} {'input':16} {'wall':>10} {'cpu':>10} {'gc':>16} {'peak RSS':>11}  answer"
+    print(header, file=file)
+    print("-" * len(header), file=file)
+    for r in results:
+        answer = f"ERROR {r.error!r}" if r.error else r.answer
+        print(
+            f"{r.day.name:8} {r.part:>4} {r.input_path.name:16} {format_duration(r.wall_time):>10} "
+            f"{format_duration(r.cpu_time):>10} {format_gc(r):>16} {format_rss(r.peak_rss):>11}  {answer}",
+            file=file,
+        )
+    for r in results:
+        if r.parse_time is not None:
+            print(f"{r.day.name} part {r.part} parse: {format_duration(r.parse_time)}", file=file)
+        for name, stats in r.memo_stats.items():
+            print(f"{r.day.name} part {r.part} {name}: {format_memo_stats(stats)}", file=file)
+        if r.counters:
+            counters = ", ".join(f"{name} {value:,}" for name, value in r.counters.items())
+            print(f"{r.day.name} part {r.part} counters: {counters}", file=file)
+
+
+def print_import_times(import_times: Iterable[ImportTime], top: int = IMPORT_TIME_TOP, file=None) -> None:
+    file = file or sys.stdout
+    for import_time in import_times:
+        slowest = ", ".join(f"{name} {format_duration(seconds)}" for name, seconds in import_time.imports[:top])
+        print(f"{import_time.day.name} imports {format_duration(import_time.total):>10}  {slowest}", file=file)
+
+
+def format_memo_stats(stats: utils.MemoStats) -> str:
+    return (
+        f"{stats.hits:,} hits, {stats.misses:,} misses ({stats.hit_rate:.1%} hit rate), "
+        f"{stats.entries:,} entries (peak {stats.peak_entries:,}, ~{stats.approximate_bytes / 1024**2:.1f} MiB now), "
+        f"{stats.evictions:,} evicted"
+    )
+
+
+def command_list(arguments) -> int:
+    for day in select_days(discover(), arguments.days):
+        print(f"{day.name}  {day.path.relative_to(REPO_ROOT)}")
+    return 0
+
+
+def command_run(arguments) -> int:
+    if arguments.no_cache:
+        cache.ENABLED = False
+    days = select_days(discover(), arguments.days)
+    parts = [arguments.part] if arguments.part else [1, 2]
+    frame_writer = None
+    if arguments.animate:
+        # the parts draw one after the other, in place, on the terminal the runner started on
+        arguments.verbose, arguments.sequential = True, True
+        frame_writer = render.FrameWriter(sys.stdout, diff=True, max_fps=arguments.animate)
+        render.set_sink(frame_writer)
+    failed = False
+    results = []
+    # of the days that parse their input once for all the parts
+    day_totals = []
+    for day in days:
+        input_path = day.resolve_input(arguments.input)
+        if not input_path.is_file():
+            if arguments.days:
+                print(f"{day.name}: no input {input_path}", file=sys.stderr)
+                failed = True
+            continue
+        try:
+            day_results, wall_time = run_day(
+                day, input_path, parts, arguments.verbose, arguments.profile, not arguments.sequential
+            )
+        except Exception as e:
+            day_results, wall_time = [PartResult(day, part, input_path, error=e) for part in parts], 0.0
+        for part in sorted(set(parts) - {r.part for r in day_results}):
+            print(f"{day.name} has no part {part}", file=sys.stderr)
+        failed |= any(r.error is not None for r in day_results)
+        results.extend(day_results)
+        if len(day_results) > 1 and day_results[0].parse_time is not None:
+            day_totals.append((day, wall_time, day_results[0].parse_time))
+    if frame_writer is not None:
+        frame_writer.flush()
+    print_results(results)
+    for day, wall_time, parse_time in day_totals:
+        print(f"{day.name} all parts {format_duration(wall_time)}, parsing once {format_duration(parse_time)}")
+    if arguments.importtime:
+        print_import_times(measure_import_time(day) for day in days if any(r.day == day for r in results))
+    return 1 if failed else 0
+
+
+def command_batch(arguments) -> int:
+    days = select_days(discover(), arguments.days)
+    parts = [arguments.part] if arguments.part else [1, 2]
+    results = run_batch(days, parts, arguments.inputs, arguments.jobs, arguments.verbose)
+    if not results:
+        print(f"no inputs matching {arguments.inputs}", file=sys.stderr)
+        return 1
+    print_results(results)
+    return 1 if any(r.error is not None for r in results) else 0
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list the discovered days")
+    list_parser.add_argument("days", nargs="*", help="YEAR or YEAR/DAY selectors")
+    list_parser.set_defaults(handler=command_list)
+
+    run_parser = subparsers.add_parser("run", help="run and time the solutions")
+    run_parser.add_argument("days", nargs="*", help="YEAR or YEAR/DAY selectors, all days if not given")
+    run_parser.add_argument("-p", "--part", type=int, choices=[1, 2])
+    run_parser.add_argument(
+        "-i", "--input", default=DEFAULT_INPUT, help="input file, relative paths are taken from each day's directory"
+    )
+    run_parser.add_argument("-v", "--verbose", action="store_true", help="set VERBOSE and show the solver's output")
+    run_parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="DIR",
+        help="write cProfile stats, collapsed stacks and the top allocations of each part to DIR",
+    )
+    run_parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="run the parts of the days with a `parse` one after the other instead of in parallel processes",
+    )
+    run_parser.add_argument(
+        "--animate",
+        type=float,
+        nargs="?",
+        const=ANIMATION_FPS,
+        metavar="FPS",
+        help=f"-v, drawing the days' maps in place on the terminal at up to FPS frames a second ({ANIMATION_FPS:g})",
+    )
+    run_parser.add_argument("--no-cache", action="store_true", help="don't use the days' on-disk cache (see cache.py)")
+    run_parser.add_argument(
+        "--importtime", action="store_true", help="also report how long importing each day takes (-X importtime)"
+    )
+    run_parser.set_defaults(handler=command_run)
+
+    batch_parser = subparsers.add_parser("batch", help="run the solutions on many inputs in a process pool")
+    batch_parser.add_argument("days", nargs="*", help="YEAR or YEAR/DAY selectors, all days if not given")
+    batch_parser.add_argument("-p", "--part", type=int, choices=[1, 2])
+    batch_parser.add_argument(
+        "-i",
+        "--inputs",
+        required=True,
+        help="directory or glob of inputs, relative paths are taken from each day's directory",
+    )
+    batch_parser.add_argument("-j", "--jobs", type=int, help="worker processes, the number of CPUs by default")
+    batch_parser.add_argument("-v", "--verbose", action="store_true", help="set VERBOSE in the solvers")
+    batch_parser.set_defaults(handler=command_batch)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    arguments = make_parser().parse_args(argv)
+    return arguments.handler(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+import os
+import textwrap
+
+import pytest
+
+import aoc
+import utils
+
+
+def make_day(tmp_path, source: str, year: int = 2099, day: int = 1) -> aoc.Day:
+    day_dir = tmp_path / str(year) / f"{day:02}"
+    day_dir.mkdir(parents=True)
+    (day_dir / "main.py").write_text(textwrap.dedent(source))
+    (day_dir / "sample.txt").write_text("1\n2\n3\n")
+    return aoc.Day(year, day, day_dir / "main.py")
+
+
+def test_discover_finds_all_conventions():
+    names = {day.name: day.path.name for day in aoc.discover()}
+    assert names["2021/01"] == "main.py"
+    assert names["2022/19"] == "aoc19.py"
+    assert names["2024/16"] == "aoc16.py"
+
+
+@pytest.mark.parametrize(
+    ("selectors", "expected"),
+    (
+        ((), ["2023/01", "2024/01", "2024/02"]),
+        (("2024",), ["2024/01", "2024/02"]),
+        (("2024/2",), ["2024/02"]),
+        (("2023/01/",), ["2023/01"]),
+    ),
+)
+def test_select_days(selectors, expected):
+    days = [aoc.Day(2023, 1, None), aoc.Day(2024, 1, None), aoc.Day(2024, 2, None)]
+    assert [d.name for d in aoc.select_days(days, selectors)] == expected
+
+
+def test_run_part_with_input_file_argument(tmp_path):
+    day = make_day(
+        tmp_path,
+        """
+        def part1(input_file):
+            return sum(int(line) for line in input_file)
+        """,
+        day=2,
+    )
+    result = aoc.run_part(day, 1, day.resolve_input("sample.txt"))
+    assert result.error is None
+    assert result.answer == 6
+    assert result.wall_time > 0
+
+
+def test_run_part_reading_input_txt_and_printing(tmp_path):
+    day = make_day(
+        tmp_path,
+        """
+        VERBOSE = 1
+
+        def part_2():
+            if VERBOSE:
+                print("noise")
+            print(f"The value is {len(open('input.txt').readlines())}")
+        """,
+        day=3,
+    )
+    result = aoc.run_part(day, 2, day.resolve_input("sample.txt"))
+    assert result.error is None
+    assert result.answer == "The value is 3"
+    assert "noise" not in result.output
+
+
+def test_run_part_reports_errors(tmp_path):
+    day = make_day(tmp_path, "def part1():\n    raise ValueError('boom')\n", day=4)
+    result = aoc.run_part(day, 1, day.resolve_input("sample.txt"))
+    assert isinstance(result.error, ValueError)
+    with pytest.raises(LookupError):
+        aoc.run_part(day, 2, day.resolve_input("sample.txt"))
+
+
+def test_run_part_reports_memo_stats(tmp_path):
+    day = make_day(
+        tmp_path,
+        """
+        from utils import memoize
+
+        @memoize
+        def fibonacci(n):
+            return n if n < 2 else fibonacci(n - 1) + fibonacci(n - 2)
+
+        @memoize
+        def unused(n):
+            return n
+
+        def part1():
+            return fibonacci(30)
+        """,
+        day=5,
+    )
+    result = aoc.run_part(day, 1, day.resolve_input("sample.txt"))
+    assert result.answer == 832040
+    assert list(result.memo_stats) == ["fibonacci"]
+    assert result.memo_stats["fibonacci"].misses == 31
+
+
+def test_measure_import_time(tmp_path):
+    day = make_day(
+        tmp_path,
+        """
+        import json
+        from output import print
+        """,
+    )
+    import_time = aoc.measure_import_time(day)
+    assert [name for name, _ in sorted(import_time.imports)] == ["json", "output"]
+    assert import_time.total == sum(seconds for _, seconds in import_time.imports) > 0
+
+
+def test_run_batch_over_a_directory_of_inputs(tmp_path):
+    day = make_day(
+        tmp_path,
+        """
+        def part1(input_file):
+            return sum(int(line) for line in input_file)
+
+        def part2(input_file):
+            raise ValueError("boom")
+        """,
+        day=6,
+    )
+    inputs = day.directory / "inputs"
+    inputs.mkdir()
+    (inputs / "a.txt").write_text("1\n2\n")
+    (inputs / "b.txt").write_text("10\n")
+    assert (
+        aoc.expand_inputs(day, "inputs")
+        == aoc.expand_inputs(day, "inputs/*.txt")
+        == [inputs / "a.txt", inputs / "b.txt"]
+    )
+
+    results = aoc.run_batch([day], [1, 2], "inputs", jobs=1)
+    assert [(r.input_path.name, r.part) for r in results] == [("a.txt", 1), ("a.txt", 2), ("b.txt", 1), ("b.txt", 2)]
+    assert [r.answer for r in results if r.part == 1] == [3, 10]
+    assert all(isinstance(r.error, ValueError) for r in results if r.part == 2)
+
+
+def test_run_part_with_parse(tmp_path):
+    day = make_day(
+        tmp_path,
+        """
+        import os
+
+        def parse(buf):
+            return [int(line) for line in buf.split()]
+
+        def part1(numbers):
+            assert not os.path.exists("input.txt")
+            return sum(numbers)
+
+        def part2(numbers):
+            return max(numbers)
+        """,
+        day=7,
+    )
+    result = aoc.run_part(day, 1, day.resolve_input("sample.txt"))
+    assert result.error is None
+    assert result.answer == 6
+    assert 0 < result.parse_time <= result.wall_time
+    assert aoc.run_part(day, 2, day.resolve_input("sample.txt")).answer == 3
+
+
+def test_template_runs(tmp_path):
+    day = make_day(tmp_path, (aoc.REPO_ROOT / "template.py").read_text(), day=8)
+    assert [aoc.run_part(day, part, day.resolve_input("sample.txt")).answer for part in (1, 2)] == [0, 0]
+
+
+@pytest.mark.parametrize("concurrent_parts", (True, False))
+def test_run_day_parses_once(tmp_path, concurrent_parts):
+    day = make_day(
+        tmp_path,
+        """
+        import os
+
+        import utils
+
+        def parse(buf):
+            with open(os.path.join(os.path.dirname(__file__), "parsed.log"), "a") as log:
+                log.write("parsed\\n")
+            return [int(line) for line in buf.split()]
+
+        def part1(numbers):
+            return (sum(numbers), os.getpid(), utils.memory_budget(1.0)())
+
+        def part2(numbers):
+            return (max(numbers), os.getpid(), utils.memory_budget(1.0)())
+        """,
+        day=9 if concurrent_parts else 10,
+    )
+    results, wall_time = aoc.run_day(day, day.resolve_input("sample.txt"), concurrent_parts=concurrent_parts)
+    assert [r.answer[0] for r in results] == [6, 3]
+    assert (day.directory / "parsed.log").read_text() == "parsed\n"
+    assert all(r.parse_time == results[0].parse_time for r in results)
+    assert results[0].parse_time <= wall_time
+    pids = {r.answer[1] for r in results}
+    # the parts running side by side share the memory
+    budgets = {r.answer[2] for r in results}
+    if concurrent_parts:
+        assert len(pids) == 2 and os.getpid() not in pids
+        assert budgets == {utils.physical_memory() // 2}
+    else:
+        assert pids == {os.getpid()}
+        assert budgets == {utils.physical_memory()}
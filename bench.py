@@ -0,0 +1,396 @@
+"""Benchmark the solutions on the bundled samples and compare against a stored baseline.
+
+Every part of every selected day is run ``--repeat`` times on each ``*sample*.txt`` of its directory (and on
+``input.txt`` too with ``--private``). The median and 95th percentile of the wall time are stored in a JSON
+baseline with ``--save``; without it the timings are compared with the baseline and any part that got slower by
+more than ``--threshold`` percent (or whose answer changed) fails the run.
+
+With ``--scaling`` the days that can generate their own inputs (a ``generate_input(scale, rng)`` function next to
+the parts, following the day's input format) are run on random inputs ``--scales`` times the size of the real one
+instead. The exponent ``k`` of ``time ~ size**k`` fitted over those runs shows which parts won't keep up with
+bigger data. A scale whose run would take longer than ``--time-limit`` (judging by the runs so far) is skipped.
+
+``--parsing`` is a micro-benchmark of the bulk input parsing in `utils` (`utils.ints` and friends) against the
+per-line regexes and ``literal_eval`` calls the days used before, on random lines in the days' formats.
+
+Examples::
+
+    python bench.py --save                    # record the baseline
+    python bench.py 2024 --threshold 15       # check the 2024 days against it
+    python bench.py --scaling --scales 0.1 1 10
+    python bench.py --parsing
+"""
+
+import argparse
+import ast
+import json
+import math
+import random
+import re
+import statistics
+import sys
+import tempfile
+import timeit
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import aoc
+import cache
+import utils
+
+DEFAULT_BASELINE = aoc.REPO_ROOT / "bench_baseline.json"
+BASELINE_VERSION = 1
+SAMPLE_GLOB = "*sample*.txt"
+PRIVATE_INPUT = "input.txt"
+GENERATOR = "generate_input"
+DEFAULT_SCALES = (1.0, 10.0, 100.0)
+SCALING_SEED = 2022
+PARSING_LINES = 10_000
+
+
+@dataclass
+class Measurement:
+    median: float
+    p95: float
+    repeats: int
+    answer: str | None = None
+    error: str | None = None
+
+
+@dataclass
+class ScalingPoint:
+    scale: float
+    # of the generated input, in bytes
+    size: int
+    wall_time: float
+
+
+@dataclass
+class Scaling:
+    key: str
+    points: list[ScalingPoint]
+    # the scales that weren't run because they would take too long
+    skipped: list[float]
+    error: str | None = None
+
+    @property
+    def exponent(self) -> float | None:
+        return fit_exponent([p.size for p in self.points], [p.wall_time for p in self.points])
+
+
+@dataclass
+class Regression:
+    key: str
+    reason: str
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def benchmark_key(day: aoc.Day, part: int, input_path: Path) -> str:
+    return f"{day.name} part{part} {input_path.name}"
+
+
+def benchmark_inputs(day: aoc.Day, private: bool = False) -> list[Path]:
+    inputs = sorted(day.directory.glob(SAMPLE_GLOB))
+    if private and (private_input := day.directory / PRIVATE_INPUT).is_file():
+        inputs.append(private_input)
+    return inputs
+
+
+def measure(day: aoc.Day, part: int, input_path: Path, repeats: int) -> Measurement:
+    """Run a part `repeats` times, each time on a freshly imported module so that module level caches stay cold."""
+    times = []
+    answer = error = None
+    for _ in range(repeats):
+        day.unload()
+        result = aoc.run_part(day, part, input_path)
+        if result.error is not None:
+            error = repr(result.error)
+            times.append(result.wall_time)
+            break
+        times.append(result.wall_time)
+        answer = None if result.answer is None else str(result.answer)
+    return Measurement(
+        median=statistics.median(times),
+        p95=percentile(times, 95),
+        repeats=len(times),
+        answer=answer,
+        error=error,
+    )
+
+
+def run_benchmarks(days: Iterable[aoc.Day], repeats: int, private: bool = False, verbose: bool = False):
+    measurements: dict[str, Measurement] = {}
+    for day in days:
+        for input_path in benchmark_inputs(day, private):
+            for part in (1, 2):
+                key = benchmark_key(day, part, input_path)
+                try:
+                    measurement = measure(day, part, input_path, repeats)
+                except LookupError:
+                    continue
+                except Exception as e:
+                    measurement = Measurement(0.0, 0.0, 0, error=repr(e))
+                measurements[key] = measurement
+                if verbose:
+                    print(format_measurement(key, measurement), file=sys.stderr)
+    return measurements
+
+
+def fit_exponent(sizes: Sequence[float], times: Sequence[float]) -> float | None:
+    """Fit ``time = c * size**k`` by least squares on the logarithms and return ``k``.
+
+    None when there aren't at least two different sizes to fit.
+    """
+    xs = [math.log(size) for size in sizes]
+    ys = [math.log(max(time, 1e-9)) for time in times]
+    if len(set(xs)) < 2:
+        return None
+    mean_x = statistics.fmean(xs)
+    mean_y = statistics.fmean(ys)
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+
+
+def measure_scaling(
+    day: aoc.Day, part: int, scales: Sequence[float], time_limit: float, seed: int = SCALING_SEED
+) -> Scaling:
+    """Run a part once on a generated input of each scale, smallest first.
+
+    A scale is skipped (together with all the larger ones) when the runs so far predict it would take longer than
+    `time_limit` seconds; the prediction assumes at least linear growth.
+    """
+    generate = getattr(day.load(), GENERATOR)
+    scaling = Scaling(f"{day.name} part{part}", [], [])
+    scales = sorted(scales)
+    with tempfile.TemporaryDirectory(prefix="aoc-scaling-") as scratch:
+        for i, scale in enumerate(scales):
+            if scaling.points:
+                last = scaling.points[-1]
+                exponent = max(1.0, scaling.exponent or 1.0)
+                if last.wall_time * (scale / last.scale) ** exponent > time_limit:
+                    scaling.skipped = scales[i:]
+                    break
+            input_path = Path(scratch) / f"scaled_{scale:g}x.txt"
+            input_path.write_text(generate(scale, random.Random(seed)))
+            day.unload()
+            result = aoc.run_part(day, part, input_path)
+            if result.error is not None:
+                scaling.error = repr(result.error)
+                break
+            scaling.points.append(ScalingPoint(scale, input_path.stat().st_size, result.wall_time))
+    return scaling
+
+
+def run_scaling(days: Iterable[aoc.Day], scales: Sequence[float], time_limit: float, verbose: bool = False):
+    results = []
+    for day in days:
+        # a look at the source instead of importing every day (some print or compute things when imported)
+        if not re.search(rf"^def {GENERATOR}\(", day.path.read_text(), re.MULTILINE):
+            continue
+        for part in (1, 2):
+            try:
+                scaling = measure_scaling(day, part, scales, time_limit)
+            except LookupError:
+                continue
+            results.append(scaling)
+            if verbose:
+                print(format_scaling(scaling), file=sys.stderr)
+    return results
+
+
+def format_scaling(scaling: Scaling) -> str:
+    points = "  ".join(f"{p.scale:g}x {aoc.format_duration(p.wall_time):>9}" for p in scaling.points)
+    skipped = "".join(f"  {scale:g}x {'skipped':>9}" for scale in scaling.skipped)
+    exponent = scaling.exponent
+    fitted = "exponent    ?" if exponent is None else f"exponent {exponent:4.2f}"
+    error = f"  ERROR {scaling.error}" if scaling.error else ""
+    return f"{scaling.key:20} {fitted}  {points}{skipped}{error}"
+
+
+def _coordinate(rng: random.Random) -> int:
+    return rng.randint(-4_000_000, 4_000_000)
+
+
+def _packet(rng: random.Random, depth: int = 0) -> list:
+    return [rng.randint(0, 10) if depth > 2 or rng.random() < 0.6 else _packet(rng, depth + 1) for _ in range(4)]
+
+
+_SENSOR_RE = re.compile(
+    r"Sensor at x=(?P<sx>-?\d+), y=(?P<sy>-?\d+): closest beacon is at x=(?P<bx>-?\d+), y=(?P<by>-?\d+)"
+)
+_ROBOT_RE = re.compile(r"p=(?P<px>-?\d+),(?P<py>-?\d+) v=(?P<vx>-?\d+),(?P<vy>-?\d+)")
+
+
+# name: (a random line in the day's format, the old per-line parsing, the bulk parsing of the whole input)
+PARSING_CASES: dict[str, tuple[Callable[[random.Random], str], Callable[[str], object], Callable[[bytes], object]]] = {
+    "2022/15 sensors": (
+        lambda rng: "Sensor at x={}, y={}: closest beacon is at x={}, y={}".format(*(_coordinate(rng) for _ in "ssbb")),
+        lambda text: [[int(m[g]) for g in ("sx", "sy", "bx", "by")] for m in map(_SENSOR_RE.match, text.splitlines())],
+        utils.ints,
+    ),
+    "2024/14 robots": (
+        lambda rng: f"p={rng.randint(0, 100)},{rng.randint(0, 102)} v={rng.randint(-99, 99)},{rng.randint(-99, 99)}",
+        lambda text: [[int(m[g]) for g in ("px", "py", "vx", "vy")] for m in map(_ROBOT_RE.match, text.splitlines())],
+        utils.ints,
+    ),
+    "2023/22 bricks": (
+        lambda rng: "{},{},{}~{},{},{}".format(*(rng.randint(0, 300) for _ in range(6))),
+        lambda text: [[ast.literal_eval(end) for end in line.split("~")] for line in text.splitlines()],
+        utils.ints,
+    ),
+    "2022/13 packets": (
+        lambda rng: json.dumps(_packet(rng), separators=(",", ":")),
+        lambda text: [ast.literal_eval(line) for line in text.splitlines()],
+        lambda data: json.loads(b"[" + b",".join(data.splitlines()) + b"]"),
+    ),
+}
+
+
+def benchmark_parsing(lines: int = PARSING_LINES, repeats: int = 5) -> list[tuple[str, float, float]]:
+    """Return the best time of the per-line and of the bulk parsing of `lines` random lines, for each case."""
+    results = []
+    rng = random.Random(SCALING_SEED)
+    for name, (make_line, per_line, bulk) in PARSING_CASES.items():
+        text = "\n".join(make_line(rng) for _ in range(lines)) + "\n"
+        data = text.encode()
+        per_line_time = min(timeit.repeat(lambda: per_line(text), number=1, repeat=repeats))
+        bulk_time = min(timeit.repeat(lambda: bulk(data), number=1, repeat=repeats))
+        results.append((name, per_line_time, bulk_time))
+    return results
+
+
+def format_parsing(name: str, per_line_time: float, bulk_time: float) -> str:
+    return (
+        f"{name:20} per line {aoc.format_duration(per_line_time):>10}  bulk {aoc.format_duration(bulk_time):>10}"
+        f"  {per_line_time / bulk_time:5.1f}x faster"
+    )
+
+
+def load_baseline(path: Path) -> dict[str, Measurement]:
+    with open(path) as baseline_file:
+        data = json.load(baseline_file)
+    if data.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{path}: unsupported baseline version {data.get('version')}")
+    return {key: Measurement(**value) for key, value in data["results"].items()}
+
+
+def save_baseline(path: Path, measurements: dict[str, Measurement], previous: dict[str, Measurement] | None = None):
+    """Store the measurements, keeping the entries of the previous baseline that weren't re-run."""
+    results = dict(previous or {})
+    results.update(measurements)
+    data = {"version": BASELINE_VERSION, "results": {key: asdict(results[key]) for key in sorted(results)}}
+    with open(path, "w") as baseline_file:
+        json.dump(data, baseline_file, indent=2)
+        baseline_file.write("\n")
+
+
+def find_regressions(
+    baseline: dict[str, Measurement],
+    current: dict[str, Measurement],
+    threshold: float,
+    noise_floor: float = 0.0,
+) -> list[Regression]:
+    """Compare current measurements with the baseline.
+
+    :param threshold: allowed slowdown of the median in percent.
+    :param noise_floor: slowdowns smaller than this many seconds are never reported.
+    """
+    regressions = []
+    for key, now in current.items():
+        if (before := baseline.get(key)) is None:
+            continue
+        if now.error and not before.error:
+            regressions.append(Regression(key, f"now fails with {now.error}"))
+            continue
+        if now.error or before.error:
+            continue
+        if before.answer != now.answer:
+            regressions.append(Regression(key, f"answer changed from {before.answer!r} to {now.answer!r}"))
+        slowdown = now.median - before.median
+        if slowdown > noise_floor and slowdown > before.median * threshold / 100:
+            pct = math.inf if before.median == 0 else slowdown / before.median * 100
+            regressions.append(
+                Regression(
+                    key,
+                    f"median {aoc.format_duration(before.median)} -> {aoc.format_duration(now.median)} (+{pct:.0f}%)",
+                )
+            )
+    return regressions
+
+
+def format_measurement(key: str, m: Measurement) -> str:
+    if m.error:
+        return f"{key:40} ERROR {m.error}"
+    return (
+        f"{key:40} median {aoc.format_duration(m.median):>10}  p95 {aoc.format_duration(m.p95):>10}"
+        f"  x{m.repeats}  {m.answer}"
+    )
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("days", nargs="*", help="YEAR or YEAR/DAY selectors, all days if not given")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="runs per part and input")
+    parser.add_argument("--private", action="store_true", help=f"also run on {PRIVATE_INPUT} where present")
+    parser.add_argument("-b", "--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("-t", "--threshold", type=float, default=10.0, help="allowed slowdown in percent")
+    parser.add_argument("--noise-floor", type=float, default=0.002, help="ignore slowdowns smaller than this (seconds)")
+    parser.add_argument(
+        "--cache", action="store_true", help="let the days use their on-disk cache (warm runs after the first one)"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="print each result as soon as it's measured")
+    scaling = parser.add_argument_group("scaling")
+    scaling.add_argument("--scaling", action="store_true", help="fit complexity exponents on generated inputs")
+    scaling.add_argument(
+        "--scales", type=float, nargs="+", default=DEFAULT_SCALES, help="input sizes relative to the real input"
+    )
+    scaling.add_argument(
+        "--time-limit", type=float, default=60.0, help="skip the scales predicted to take longer (seconds)"
+    )
+    parser.add_argument(
+        "--parsing", action="store_true", help=f"micro-benchmark the input parsing on {PARSING_LINES:,} lines"
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    arguments = make_parser().parse_args(argv)
+    # measure the computations, not the cache
+    cache.ENABLED = arguments.cache
+    if arguments.parsing:
+        for result in benchmark_parsing(repeats=arguments.repeat):
+            print(format_parsing(*result))
+        return 0
+    days = aoc.select_days(aoc.discover(), arguments.days)
+    if arguments.scaling:
+        for scaling in run_scaling(days, arguments.scales, arguments.time_limit, arguments.verbose):
+            print(format_scaling(scaling))
+        return 0
+    measurements = run_benchmarks(days, arguments.repeat, arguments.private, arguments.verbose)
+    for key, measurement in measurements.items():
+        print(format_measurement(key, measurement))
+
+    baseline = load_baseline(arguments.baseline) if arguments.baseline.is_file() else None
+    if arguments.save:
+        save_baseline(arguments.baseline, measurements, baseline)
+        print(f"Baseline saved to {arguments.baseline}")
+        return 0
+    if baseline is None:
+        print(f"No baseline at {arguments.baseline}, run with --save first", file=sys.stderr)
+        return 0
+
+    regressions = find_regressions(baseline, measurements, arguments.threshold, arguments.noise_floor)
+    for regression in regressions:
+        print(f"REGRESSION {regression.key}: {regression.reason}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import textwrap
+
+import pytest
+
+import aoc
+import bench
+from bench import Measurement
+
+
+@pytest.mark.parametrize(
+    ("samples", "pct", "expected"),
+    (
+        ([1.0], 95, 1.0),
+        ([3.0, 1.0, 2.0], 50, 2.0),
+        ([float(i) for i in range(1, 21)], 95, 19.0),
+        ([float(i) for i in range(1, 21)], 100, 20.0),
+    ),
+)
+def test_percentile(samples, pct, expected):
+    assert bench.percentile(samples, pct) == expected
+
+
+def test_find_regressions():
+    baseline = {
+        "same": Measurement(1.0, 1.1, 5, "42"),
+        "slower": Measurement(1.0, 1.1, 5, "42"),
+        "tiny": Measurement(0.0001, 0.0001, 5, "1"),
+        "answer": Measurement(1.0, 1.0, 5, "42"),
+        "broken": Measurement(1.0, 1.0, 5, "42"),
+        "was broken": Measurement(0.0, 0.0, 1, error="ValueError()"),
+    }
+    current = {
+        "same": Measurement(1.05, 1.1, 5, "42"),
+        "slower": Measurement(1.5, 1.6, 5, "42"),
+        "tiny": Measurement(0.0005, 0.0005, 5, "1"),
+        "answer": Measurement(1.0, 1.0, 5, "43"),
+        "broken": Measurement(0.1, 0.1, 1, error="KeyError()"),
+        "was broken": Measurement(1.0, 1.0, 5, "7"),
+        "new": Measurement(9.0, 9.0, 5, "7"),
+    }
+    regressions = bench.find_regressions(baseline, current, threshold=10, noise_floor=0.001)
+    assert [r.key for r in regressions] == ["slower", "answer", "broken"]
+
+
+def test_baseline_round_trip(tmp_path):
+    path = tmp_path / "baseline.json"
+    bench.save_baseline(path, {"a": Measurement(1.0, 2.0, 3, "x")}, previous={"b": Measurement(0.5, 0.5, 1, "y")})
+    assert bench.load_baseline(path) == {"a": Measurement(1.0, 2.0, 3, "x"), "b": Measurement(0.5, 0.5, 1, "y")}
+
+
+@pytest.mark.parametrize(("exponent", "constant"), ((1.0, 1e-6), (2.0, 3e-9), (0.5, 1.0)))
+def test_fit_exponent(exponent, constant):
+    sizes = [100, 1000, 10_000]
+    assert bench.fit_exponent(sizes, [constant * size**exponent for size in sizes]) == pytest.approx(exponent)
+    assert bench.fit_exponent([100], [1.0]) is None
+
+
+def test_measure_scaling_skips_the_slow_scales(tmp_path):
+    day_dir = tmp_path / "2099" / "01"
+    day_dir.mkdir(parents=True)
+    (day_dir / "main.py").write_text(textwrap.dedent("""
+            import time
+
+            def generate_input(scale, rng):
+                return "".join(f"{rng.randint(0, 9)}\\n" for _ in range(round(100 * scale)))
+
+            def part1(input_file):
+                lines = input_file.readlines()
+                time.sleep(len(lines) / 1000)
+                return len(lines)
+            """))
+    day = aoc.Day(2099, 1, day_dir / "main.py")
+    scaling = bench.measure_scaling(day, 1, [10, 0.1, 1], time_limit=0.5)
+    assert scaling.error is None
+    assert [(p.scale, p.size) for p in scaling.points] == [(0.1, 20), (1, 200)]
+    assert scaling.skipped == [10]
+    assert scaling.exponent == pytest.approx(1, abs=0.3)
+    assert bench.format_scaling(scaling).startswith("2099/01 part1        exponent ")
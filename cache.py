@@ -0,0 +1,153 @@
+"""Content-addressed on-disk cache for the expensive intermediates of the solutions.
+
+An entry is keyed by a hash of its name, the version of the code computing it and the data it is computed from
+(usually the parsed input), so a changed input or a bumped version simply misses and nothing is ever invalidated
+by hand. Two kinds of entries:
+
+- `cached` pickles any object, for the small and irregular ones (dicts of spans, paths, ...),
+- `cached_arrays` stores flat numeric `array.array` s in a raw binary file that is mapped back with ``mmap``:
+  a warm run neither recomputes nor deserializes a large table, the pages are read when they are touched.
+  `cached_graph` stores a `utils.Graph` that way.
+
+The entries live in ``.cache/`` at the repo root (``AOC_CACHE_DIR`` to move it) and ``AOC_CACHE=0`` or setting
+`ENABLED` to ``False`` turns the cache off. Deleting the directory is always safe.
+"""
+
+import hashlib
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+from array import array
+from collections.abc import Callable
+from pathlib import Path
+
+import utils
+
+CACHE_DIR = Path(os.environ.get("AOC_CACHE_DIR", Path(__file__).resolve().parent / ".cache"))
+ENABLED = os.environ.get("AOC_CACHE", "1") != "0"
+
+ARRAYS_MAGIC = b"AOCARR01"
+# magic, number of arrays; then per array: name (32 bytes, NUL padded), typecode, offset and length (in items)
+_HEADER = struct.Struct("<8sI")
+_ENTRY = struct.Struct("<32scQQ")
+# the data of each array starts at a multiple of this, so that it can be cast to any item size in place
+ALIGNMENT = 8
+
+
+def digest(*parts) -> str:
+    """Hash the parts: bytes as they are, strings as UTF-8 and anything else by its ``repr``."""
+    h = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode()
+        elif not isinstance(part, (bytes, bytearray, memoryview)):
+            part = repr(part).encode()
+        h.update(len(part).to_bytes(8, "little"))
+        h.update(part)
+    return h.hexdigest()
+
+
+def entry_path(name: str, version: int, key, suffix: str) -> Path:
+    return CACHE_DIR / f"{digest(name, version, key)}{suffix}"
+
+
+def _write_atomically(path: Path, write: Callable) -> None:
+    """Write through a temporary file, so that a concurrent or killed run never leaves half an entry behind."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as cache_file:
+            write(cache_file)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def cached(name: str, version: int, key, compute: Callable):
+    """Return the pickled result of `compute` for `key`, computing and storing it first if needed.
+
+    :param name: what is cached, unique within the repo (e.g. ``"2022/16 distances"``).
+    :param version: bump it whenever the code computing the value changes.
+    :param key: the data the value is computed from, see `digest`.
+    """
+    if not ENABLED:
+        return compute()
+    path = entry_path(name, version, key, ".pickle")
+    try:
+        with open(path, "rb") as cache_file:
+            return pickle.load(cache_file)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass
+    value = compute()
+    _write_atomically(path, lambda cache_file: pickle.dump(value, cache_file, pickle.HIGHEST_PROTOCOL))
+    return value
+
+
+def write_arrays(cache_file, arrays: dict[str, array]) -> None:
+    entries = []
+    offset = _HEADER.size + _ENTRY.size * len(arrays)
+    for name, values in arrays.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        entries.append(_ENTRY.pack(name.encode(), values.typecode.encode(), offset, len(values)))
+        offset += len(values) * values.itemsize
+    cache_file.write(_HEADER.pack(ARRAYS_MAGIC, len(arrays)))
+    cache_file.write(b"".join(entries))
+    position = _HEADER.size + _ENTRY.size * len(arrays)
+    for values in arrays.values():
+        padding = -position % ALIGNMENT
+        cache_file.write(bytes(padding))
+        values.tofile(cache_file)
+        position += padding + len(values) * values.itemsize
+
+
+def map_arrays(path: Path) -> dict[str, memoryview]:
+    """Map a file written by `write_arrays`, each array is a read-only typed ``memoryview`` into the mapping."""
+    with open(path, "rb") as cache_file:
+        # an empty file can't be mapped, but it isn't a valid entry either
+        mapping = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+    data = memoryview(mapping)
+    magic, count = _HEADER.unpack_from(data)
+    if magic != ARRAYS_MAGIC:
+        raise ValueError(f"{path}: not a cached arrays file")
+    arrays = {}
+    for i in range(count):
+        name, typecode, offset, length = _ENTRY.unpack_from(data, _HEADER.size + i * _ENTRY.size)
+        typecode = typecode.decode()
+        values = data[offset : offset + length * array(typecode).itemsize].cast(typecode)
+        if len(values) != length:
+            raise ValueError(f"{path}: truncated")
+        arrays[name.rstrip(b"\0").decode()] = values
+    return arrays
+
+
+def cached_arrays(name: str, version: int, key, compute: Callable[[], dict[str, array]]) -> dict:
+    """Like `cached` for a dict of flat arrays (names up to 32 bytes), which come back mapped from the cache.
+
+    Only the first computation returns the arrays themselves, the warm runs get read-only ``memoryview`` s. Both
+    index, slice and iterate the same way.
+    """
+    if not ENABLED:
+        return compute()
+    path = entry_path(name, version, key, ".arrays")
+    try:
+        return map_arrays(path)
+    except (OSError, ValueError, TypeError, struct.error):
+        pass
+    arrays = compute()
+    assert all(len(name.encode()) <= 32 for name in arrays), "array names are limited to 32 bytes"
+    _write_atomically(path, lambda cache_file: write_arrays(cache_file, arrays))
+    return arrays
+
+
+def cached_graph(name: str, version: int, key, compute: Callable[[], utils.Graph]) -> utils.Graph:
+    """`cached_arrays` for the compressed sparse row arrays of a graph."""
+
+    def compute_arrays():
+        graph = compute()
+        return {"offsets": graph.offsets, "targets": graph.targets, "weights": graph.weights}
+
+    arrays = cached_arrays(name, version, key, compute_arrays)
+    return utils.Graph(len(arrays["offsets"]) - 1, arrays["offsets"], arrays["targets"], arrays["weights"])
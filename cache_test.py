@@ -0,0 +1,64 @@
+from array import array
+
+import pytest
+
+import cache
+import utils
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", tmp_path)
+    monkeypatch.setattr(cache, "ENABLED", True)
+    return tmp_path
+
+
+def test_digest_separates_the_parts():
+    assert cache.digest("ab", "c") != cache.digest("a", "bc")
+    assert cache.digest(b"x", 1) == cache.digest("x", 1)
+
+
+def test_cached_is_keyed_by_version_and_key():
+    calls = []
+
+    def compute(value):
+        calls.append(value)
+        return {"value": value}
+
+    assert cache.cached("test", 1, "input", lambda: compute(1)) == {"value": 1}
+    assert cache.cached("test", 1, "input", lambda: compute(2)) == {"value": 1}
+    assert cache.cached("test", 1, "changed input", lambda: compute(3)) == {"value": 3}
+    assert cache.cached("test", 2, "input", lambda: compute(4)) == {"value": 4}
+    assert calls == [1, 3, 4]
+
+
+def test_cached_arrays_are_mapped_back(cache_dir):
+    arrays = {"bytes": array("b", [1, -2, 3]), "longs": array("q", [2**40, -1]), "empty": array("i")}
+    assert cache.cached_arrays("test", 1, "key", lambda: arrays) is arrays
+    mapped = cache.cached_arrays("test", 1, "key", lambda: pytest.fail("not cached"))
+    assert {name: list(values) for name, values in mapped.items()} == {
+        "bytes": [1, -2, 3],
+        "longs": [2**40, -1],
+        "empty": [],
+    }
+    assert all(isinstance(values, memoryview) and values.readonly for values in mapped.values())
+
+    # a damaged entry is recomputed
+    (path,) = cache_dir.glob("*.arrays")
+    path.write_bytes(path.read_bytes()[:20])
+    assert cache.cached_arrays("test", 1, "key", lambda: {"x": array("i", [7])})["x"] == array("i", [7])
+
+
+def test_cached_graph():
+    graph = utils.Graph.from_edges(3, [(0, 1, 5), (1, 2, 1), (0, 2, 9)])
+    cache.cached_graph("test", 1, "key", lambda: graph)
+    mapped = cache.cached_graph("test", 1, "key", lambda: pytest.fail("not cached"))
+    assert list(mapped.edges_from(0)) == [(1, 5), (2, 9)]
+    assert list(mapped.dijkstra([0]).distance) == [0, 5, 6]
+
+
+def test_disabled_cache_always_computes(cache_dir, monkeypatch):
+    monkeypatch.setattr(cache, "ENABLED", False)
+    assert cache.cached("test", 1, "key", lambda: 1) == 1
+    assert cache.cached("test", 1, "key", lambda: 2) == 2
+    assert not list(cache_dir.iterdir())
@@ -0,0 +1,203 @@
+"""Output and progress bars that only pay for rich and tqdm when somebody is watching.
+
+Importing rich and tqdm takes longer than many of the days take to solve, so the days print through this module:
+
+- `print` goes through rich (markup, highlighting) when stdout is a terminal or `VERBOSE` is on and is a plain
+  ``write`` with the markup stripped otherwise,
+- `tqdm`/`trange` return real progress bars when stderr is a terminal or `VERBOSE` is on and a do-nothing stand-in
+  otherwise,
+- `Progress` is for the hot loops: a tick only bumps an int, the bar is refreshed in batches,
+- `counters` are named totals (states expanded, rows scanned, ...) that the runner reports for each part.
+
+rich and tqdm are imported on the first call that needs them.
+"""
+
+import builtins
+import math
+import re
+import sys
+import time
+from collections import Counter
+
+# set by the runner (`aoc.py run -v`), forces rich and the progress bars even when the output isn't a terminal
+VERBOSE = False
+
+# reset by the runner before each part
+counters: Counter[str] = Counter()
+
+RICH_STYLES = (
+    "bold|dim|italic|underline|strike|blink|reverse|not|on|default|"
+    "black|red|green|yellow|blue|magenta|cyan|white|gray|grey|purple|orange|bright_\\w+|#[0-9a-fA-F]{6}"
+)
+# only the tags made of style names, so that e.g. an f-string'ed `[x]` or `[0]` is printed as is
+MARKUP_RE = re.compile(rf"\[/?(?:(?:{RICH_STYLES})\b ?)*\]")
+
+
+def _is_terminal(stream) -> bool:
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+def use_rich(file=None) -> bool:
+    return VERBOSE or _is_terminal(file if file is not None else sys.stdout)
+
+
+def strip_markup(text: str) -> str:
+    return MARKUP_RE.sub("", text)
+
+
+def print(*objects, sep: str = " ", end: str = "\n", file=None, flush: bool = False) -> None:
+    if use_rich(file):
+        import rich
+
+        rich.print(*objects, sep=sep, end=end, file=file, flush=flush)
+        return
+    file = file if file is not None else sys.stdout
+    file.write(strip_markup(sep.join(str(o) for o in objects)) + end)
+    if flush:
+        file.flush()
+
+
+def pprint(obj, file=None) -> None:
+    if use_rich(file):
+        import rich.console
+        import rich.pretty
+
+        rich.pretty.pprint(obj, console=None if file is None else rich.console.Console(file=file))
+        return
+    import pprint
+
+    pprint.pprint(obj, stream=file)
+
+
+class NullProgress:
+    """Stands in for a tqdm progress bar: iterates over the wrapped iterable and counts the updates."""
+
+    def __init__(self, iterable=None, desc=None, total=None, **kwargs):
+        self.iterable = iterable
+        self.desc = desc
+        self.total = total
+        self.n = 0
+
+    def __iter__(self):
+        return iter(self.iterable)
+
+    def __len__(self):
+        return self.total if self.total is not None else len(self.iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def update(self, n: int = 1) -> None:
+        self.n += n
+
+    def reset(self, total=None) -> None:
+        self.n = 0
+        if total is not None:
+            self.total = total
+
+    def set_description(self, desc=None, refresh=True) -> None:
+        self.desc = desc
+
+    def set_postfix(self, *args, **kwargs) -> None:
+        pass
+
+    def refresh(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    @staticmethod
+    def write(s: str, file=None, end: str = "\n") -> None:
+        builtins.print(s, file=file, end=end)
+
+
+def tqdm(iterable=None, *args, **kwargs):
+    if VERBOSE or _is_terminal(kwargs.get("file") or sys.stderr):
+        import tqdm
+
+        return tqdm.tqdm(iterable, *args, **kwargs)
+    return NullProgress(iterable, *args, **kwargs)
+
+
+def trange(*args, **kwargs):
+    return tqdm(range(*args), **kwargs)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add to a named counter. Meant to be called once per loop, not once per iteration."""
+    counters[name] += n
+
+
+class Progress:
+    """Progress of a hot loop that costs next to nothing when nobody is watching.
+
+    `tick` only adds to `n`; every `every` ticks the time is checked and the bar (see `tqdm`) is refreshed if
+    `interval` seconds passed since the last refresh. Without a bar the check never happens. Iterating over a
+    Progress ticks once per item. On `close` the total is added to the `counter` of the same name, if given.
+    """
+
+    def __init__(
+        self,
+        iterable=None,
+        desc: str | None = None,
+        total: int | None = None,
+        every: int = 1024,
+        interval: float = 0.1,
+        counter: str | None = None,
+    ):
+        self.iterable = iterable
+        self.n = 0
+        self.every = every
+        self.interval = interval
+        self.counter = counter
+        if total is None and hasattr(iterable, "__len__"):
+            total = len(iterable)
+        self.bar = tqdm(desc=desc, total=total)
+        self._next_check = every if not isinstance(self.bar, NullProgress) else math.inf
+        self._refreshed = time.monotonic()
+        self._closed = False
+
+    def tick(self, n: int = 1) -> None:
+        self.n += n
+        if self.n >= self._next_check:
+            self._sample()
+
+    def _sample(self) -> None:
+        self._next_check = self.n + self.every
+        now = time.monotonic()
+        if now - self._refreshed >= self.interval:
+            self.bar.update(self.n - self.bar.n)
+            self._refreshed = now
+
+    def __iter__(self):
+        try:
+            for item in self.iterable:
+                self.n += 1
+                if self.n >= self._next_check:
+                    self._sample()
+                yield item
+        finally:
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self.n != self.bar.n:
+            self.bar.update(self.n - self.bar.n)
+        self.bar.close()
+        if self.counter:
+            count(self.counter, self.n)
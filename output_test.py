@@ -0,0 +1,70 @@
+import io
+
+import pytest
+
+import output
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    (
+        ("[red]End (1, 2) not reachable![/red]", "End (1, 2) not reachable!"),
+        ("[bold bright_magenta]*[/bold bright_magenta] [/]", "* "),
+        ("grid[y][x] = [0, 1]", "grid[y][x] = [0, 1]"),
+    ),
+)
+def test_strip_markup(text, expected):
+    assert output.strip_markup(text) == expected
+
+
+def test_print_without_a_terminal_is_plain(monkeypatch):
+    monkeypatch.setattr(output, "VERBOSE", False)
+    stream = io.StringIO()
+    output.print("[yellow]value[/yellow]", 42, file=stream)
+    assert stream.getvalue() == "value 42\n"
+
+
+def test_progress_without_a_terminal_is_a_no_op(monkeypatch):
+    monkeypatch.setattr(output, "VERBOSE", False)
+    monkeypatch.setattr("sys.stderr", io.StringIO())
+    progress = output.tqdm(total=3)
+    assert isinstance(progress, output.NullProgress)
+    with progress:
+        progress.update(2)
+    assert progress.n == 2
+    assert list(output.trange(1, 4, desc="steps")) == [1, 2, 3]
+
+
+def test_progress_ticks_and_counts(monkeypatch):
+    monkeypatch.setattr(output, "VERBOSE", False)
+    monkeypatch.setattr("sys.stderr", io.StringIO())
+    monkeypatch.setattr(output, "counters", output.Counter())
+    with output.Progress(total=10, counter="ticks") as progress:
+        for _ in range(10):
+            progress.tick()
+    for item in output.Progress(range(100), counter="items"):
+        if item == 41:
+            break
+    assert output.counters == {"ticks": 10, "items": 42}
+
+
+class RecordingBar:
+    def __init__(self, **kwargs):
+        self.n = 0
+        self.updates = []
+
+    def update(self, n):
+        self.n += n
+        self.updates.append(n)
+
+    def close(self):
+        pass
+
+
+def test_progress_refreshes_the_bar_in_batches(monkeypatch):
+    monkeypatch.setattr(output, "tqdm", RecordingBar)
+    progress = output.Progress(total=5500, every=1000, interval=0)
+    for _ in range(5500):
+        progress.tick()
+    progress.close()
+    assert progress.bar.updates == [1000] * 5 + [500]
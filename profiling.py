@@ -0,0 +1,145 @@
+"""Profile a part: cProfile statistics, collapsed stacks for a flame graph and the top allocation sites.
+
+`profile(prefix)` writes three files next to each other:
+
+- ``PREFIX.pstats``: cProfile's statistics, for ``python -m pstats`` or snakeviz,
+- ``PREFIX.collapsed.txt``: sampled call stacks in the collapsed ("folded") format, one ``a;b;c count`` line per
+  distinct stack, which speedscope and flamegraph.pl load as they are,
+- ``PREFIX.tracemalloc.txt``: the allocation sites holding the most memory around the peak of the part.
+
+The stacks are sampled with a profiling timer signal, so that has to happen in the main thread of a Unix process.
+Both the 2024 ``main()`` (``--profile PREFIX``) and the runner (``aoc.py run --profile DIR``) use it.
+"""
+
+import contextlib
+import os
+import signal
+import sys
+import time
+from collections import Counter
+
+SAMPLING_INTERVAL = 0.001
+TRACEMALLOC_TOP = 25
+# how often (in CPU seconds) the sampler checks the traced memory, and how much it has to grow for a new snapshot:
+# a snapshot copies every traced block, taking them too often makes a profiled run crawl
+PEAK_CHECK_INTERVAL = 0.25
+PEAK_GROWTH = 1.25
+
+
+class StackSampler:
+    """Count the call stacks seen by a ``SIGPROF`` timer every `interval` seconds of CPU time.
+
+    While tracemalloc is tracing, the sampler also keeps a snapshot of the traced memory near its peak: the memory
+    of a part is mostly freed by the time it returns.
+    """
+
+    def __init__(self, interval: float = SAMPLING_INTERVAL):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self.next_peak_check = 0.0
+        self.peak_snapshot = None
+        self.peak_size = 0
+        self._names = {}
+        self._previous_handler = None
+
+    def _sample(self, signum, frame) -> None:
+        self.samples += 1
+        if time.process_time() >= self.next_peak_check:
+            self._check_peak()
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            if (name := self._names.get(code)) is None:
+                name = self._names[code] = (
+                    f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                )
+            names.append(name)
+            frame = frame.f_back
+        self.stacks[";".join(reversed(names))] += 1
+
+    def _check_peak(self) -> None:
+        import tracemalloc
+
+        self.next_peak_check = time.process_time() + PEAK_CHECK_INTERVAL
+        if tracemalloc.is_tracing() and (size := tracemalloc.get_traced_memory()[0]) > self.peak_size * PEAK_GROWTH:
+            self.peak_size = size
+            self.peak_snapshot = tracemalloc.take_snapshot()
+
+    def start(self) -> None:
+        self._previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self._previous_handler or signal.SIG_DFL)
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as collapsed:
+            for stack, samples in sorted(self.stacks.items()):
+                collapsed.write(f"{stack} {samples}\n")
+
+
+def write_tracemalloc_top(snapshot, path: str, peak: int, top: int = TRACEMALLOC_TOP) -> None:
+    import tracemalloc
+
+    # the profilers' own allocations; filtering the statistics is much cheaper than `Snapshot.filter_traces`
+    # going over every block
+    ignored_files = {__file__, tracemalloc.__file__}
+    statistics = [
+        stat
+        for stat in snapshot.statistics("lineno")
+        if stat.traceback[0].filename not in ignored_files and not stat.traceback[0].filename.startswith("<frozen")
+    ]
+    total = sum(stat.size for stat in statistics)
+    with open(path, "w") as report:
+        report.write(f"peak traced memory {peak / 1024**2:.1f} MiB\n")
+        report.write(f"snapshot: {total / 1024**2:.1f} MiB in {len(statistics)} allocation sites, top {top}:\n")
+        for stat in statistics[:top]:
+            frame = stat.traceback[0]
+            report.write(f"{stat.size / 1024:12.1f} KiB {stat.count:10} blocks  {frame.filename}:{frame.lineno}\n")
+
+
+@contextlib.contextmanager
+def profile(prefix: str | os.PathLike, tracemalloc_top: int = TRACEMALLOC_TOP):
+    """Profile the body of the ``with`` and write the ``prefix.*`` files (see the module's docstring).
+
+    The profilers slow the code down noticeably (tracemalloc most of all), so don't trust the timings of a
+    profiled run.
+    """
+    import cProfile
+    import tracemalloc
+
+    prefix = os.fspath(prefix)
+    os.makedirs(os.path.dirname(os.path.abspath(prefix)), exist_ok=True)
+    sampler = StackSampler() if hasattr(signal, "setitimer") else None
+    profiler = cProfile.Profile()
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    if sampler is not None:
+        sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        if sampler is not None:
+            sampler.stop()
+        size, peak = tracemalloc.get_traced_memory()
+        if sampler is not None and sampler.peak_snapshot is not None and sampler.peak_size > size:
+            snapshot = sampler.peak_snapshot
+        else:
+            snapshot = tracemalloc.take_snapshot()
+        if not was_tracing:
+            tracemalloc.stop()
+        profiler.dump_stats(f"{prefix}.pstats")
+        if sampler is not None:
+            sampler.write_collapsed(f"{prefix}.collapsed.txt")
+        write_tracemalloc_top(snapshot, f"{prefix}.tracemalloc.txt", peak, tracemalloc_top)
+        print(f"Profile written to {prefix}.*", file=sys.stderr)
+
+
+def profile_if(prefix: str | os.PathLike | None):
+    """`profile` when given a prefix, otherwise do nothing."""
+    return profile(prefix) if prefix else contextlib.nullcontext()
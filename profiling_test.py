@@ -0,0 +1,28 @@
+import pstats
+
+import profiling
+
+
+def busy() -> list[list[int]]:
+    blocks = []
+    total = 0
+    for i in range(300_000):
+        total += i * i
+        if i % 1000 == 0:
+            blocks.append(list(range(1000)))
+    return blocks
+
+
+def test_profile_writes_all_three_files(tmp_path):
+    prefix = tmp_path / "profiles" / "busy"
+    with profiling.profile(prefix):
+        blocks = busy()
+    del blocks
+
+    assert any(function == "busy" for _, _, function in pstats.Stats(f"{prefix}.pstats").stats)
+    stacks = (tmp_path / "profiles" / "busy.collapsed.txt").read_text().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+    assert any("busy (profiling_test.py:" in line for line in stacks)
+    report = (tmp_path / "profiles" / "busy.tracemalloc.txt").read_text()
+    assert report.startswith("peak traced memory")
+    assert "profiling_test.py:" in report
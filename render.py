@@ -0,0 +1,197 @@
+"""Draw the grids of the days as whole frames of text instead of a rich `print` per cell.
+
+A frame is built row by row with ``str.translate`` through a `Palette`, which maps each cell character to the
+character already wrapped in its ANSI colour codes, and `show` writes it with a single ``write``. Like `output.print`
+the colours are only there when somebody is watching (a terminal, `output.VERBOSE` or the live viewer), otherwise
+the frames are plain text.
+
+Where the frames go is up to `show`: a `FrameWriter` on stdout by default, which can also redraw only the lines
+that changed since the previous frame (``aoc.py run --animate``), or a `FrameQueue` feeding ``textual_app.py``,
+the live viewer.
+"""
+
+import queue
+import re
+import shutil
+import sys
+import time
+from collections.abc import Callable, Iterable
+
+import output
+
+RESET = "\x1b[0m"
+_ATTRIBUTES = {"bold": 1, "dim": 2, "italic": 3, "underline": 4, "blink": 5, "reverse": 7, "strike": 9}
+_COLOURS = {"black": 0, "red": 1, "green": 2, "yellow": 3, "blue": 4, "magenta": 5, "cyan": 6, "white": 7}
+# the rich names the days use that aren't one of the 8 basic colours, as 256 colour palette indexes
+_EXTRA_COLOURS = {"gray": 244, "grey": 244, "purple": 129, "orange": 208}
+_HEX_COLOUR_RE = re.compile(r"#([0-9a-fA-F]{2})([0-9a-fA-F]{2})([0-9a-fA-F]{2})")
+
+
+def _colour_codes(name: str, background: bool) -> list[str]:
+    base = 40 if background else 30
+    if name in _COLOURS:
+        return [str(base + _COLOURS[name])]
+    if name.startswith("bright_") and name[7:] in _COLOURS:
+        return [str(base + 60 + _COLOURS[name[7:]])]
+    if name in _EXTRA_COLOURS:
+        return [str(base + 8), "5", str(_EXTRA_COLOURS[name])]
+    if matches := _HEX_COLOUR_RE.fullmatch(name):
+        return [str(base + 8), "2", *(str(int(component, 16)) for component in matches.groups())]
+    raise ValueError(f"unknown colour {name!r}")
+
+
+def sgr(style: str) -> str:
+    """The ANSI escape sequence of a rich style like ``"bold red on white"``."""
+    codes = []
+    words = iter(style.split())
+    for word in words:
+        if word in _ATTRIBUTES:
+            codes.append(str(_ATTRIBUTES[word]))
+        elif word == "on":
+            codes.extend(_colour_codes(next(words), background=True))
+        else:
+            codes.extend(_colour_codes(word, background=False))
+    return f"\x1b[{';'.join(codes)}m" if codes else ""
+
+
+class Palette:
+    """How each cell character is drawn: its style (see `sgr`) and, optionally, another glyph in its place.
+
+    The translation tables are computed once, painting a row is a single ``str.translate``.
+    """
+
+    def __init__(self, styles: dict[str, str], glyphs: dict[str, str] | None = None):
+        glyphs = glyphs or {}
+        self.plain = {ord(c): glyph for c, glyph in glyphs.items()}
+        self.coloured = dict(self.plain)
+        for c, style in styles.items():
+            self.coloured[ord(c)] = f"{sgr(style)}{glyphs.get(c, c)}{RESET}"
+
+    def paint(self, row: str, colour: bool = True) -> str:
+        return row.translate(self.coloured if colour else self.plain)
+
+
+def use_colour() -> bool:
+    return isinstance(_sink, FrameQueue) or output.use_rich()
+
+
+def render(
+    rows: Iterable[str | bytes],
+    palette: Palette,
+    ruler: bool = True,
+    first_row: int = 0,
+    first_column: int = 0,
+    colour: bool | None = None,
+) -> str:
+    """Build a frame from the rows: each row painted and numbered, under a ruler with the last digit of the columns.
+
+    :param first_row: the number of the first row.
+    :param first_column: the number of the first column, the ruler shows the last digit of the negative ones too.
+    :param colour: ANSI colours or plain text, `use_colour` decides by default.
+    """
+    colour = use_colour() if colour is None else colour
+    rows = [row if isinstance(row, str) else bytes(row).decode() for row in rows]
+    lines = [f"{y:3}: {palette.paint(row, colour)}" for y, row in enumerate(rows, first_row)]
+    if ruler and rows:
+        lines.insert(0, "     " + "".join(str(abs(x) % 10) for x in range(first_column, first_column + len(rows[0]))))
+    return "\n".join(lines) + "\n"
+
+
+class FrameWriter:
+    """Write frames to a stream, each with one ``write``.
+
+    With `diff` (and a terminal to redraw on) the frames are drawn in place at the top of the screen: only the lines
+    that changed since the previous frame are rewritten and whatever the day prints in between goes below the frame
+    until the next one. `max_fps` then also drops the frames coming faster than that - an animation doesn't need
+    them, `flush` draws the last one if it was dropped. Without a terminal every frame is written in full, one after
+    another.
+    """
+
+    def __init__(self, file=None, diff: bool = False, max_fps: float | None = None):
+        self.file = file
+        self.diff = diff
+        self.min_interval = 1 / max_fps if max_fps else 0.0
+        self._previous: list[str] | None = None
+        self._last_write = -float("inf")
+        self._pending: str | None = None
+
+    def __call__(self, frame: str) -> None:
+        file = self.file if self.file is not None else sys.stdout
+        if not (self.diff and output._is_terminal(file)):
+            file.write(frame)
+            return
+        now = time.monotonic()
+        if now - self._last_write < self.min_interval:
+            self._pending = frame
+            return
+        self._last_write = now
+        self._pending = None
+        lines = frame.splitlines()
+        previous, self._previous = self._previous, lines
+        if len(lines) >= shutil.get_terminal_size().lines:
+            # a frame taller than the screen can't be drawn over, it scrolls
+            self._previous = None
+            file.write(frame)
+        elif previous is None or len(previous) != len(lines):
+            file.write(f"\x1b[H\x1b[2J{frame}")
+        else:
+            changed = [
+                f"\x1b[{row};1H{new}\x1b[K" for row, (old, new) in enumerate(zip(previous, lines), 1) if old != new
+            ]
+            # the cursor goes below the frame, clearing what was printed there since the previous one
+            file.write(f"{''.join(changed)}\x1b[{len(lines) + 1};1H\x1b[J")
+        file.flush()
+
+    def flush(self) -> None:
+        if self._pending is not None:
+            self._last_write = -float("inf")
+            self(self._pending)
+
+
+class FrameQueue:
+    """Send frames to another process (the live viewer) through a ``multiprocessing`` queue.
+
+    At most `fps` frames a second are sent, the ones in between are dropped and so is a frame the queue has no room
+    for, so the solver never waits for the viewer. `flush` sends the last frame if it was held back.
+    """
+
+    def __init__(self, queue, fps: float = 30):
+        self.queue = queue
+        self.interval = 1 / fps
+        self._next_send = 0.0
+        self._pending: str | None = None
+
+    def __call__(self, frame: str) -> None:
+        now = time.monotonic()
+        if now < self._next_send:
+            self._pending = frame
+            return
+        self._next_send = now + self.interval
+        self._pending = None
+        self._send(frame)
+
+    def _send(self, frame: str) -> None:
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            pass
+
+    def flush(self) -> None:
+        if self._pending is not None:
+            self._send(self._pending)
+            self._pending = None
+
+
+# where `show` sends the frames, see `set_sink`
+_sink: Callable[[str], None] = FrameWriter()
+
+
+def set_sink(sink: Callable[[str], None]) -> Callable[[str], None]:
+    """Send the frames to `sink` from now on, return the previous one."""
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def show(frame: str) -> None:
+    _sink(frame)
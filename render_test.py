@@ -0,0 +1,90 @@
+import io
+import queue
+
+import pytest
+
+import render
+
+
+@pytest.mark.parametrize(
+    ("style", "expected"),
+    (
+        ("red", "\x1b[31m"),
+        ("bold bright_magenta", "\x1b[1;95m"),
+        ("gray", "\x1b[38;5;244m"),
+        ("white on #ff8000", "\x1b[37;48;2;255;128;0m"),
+        ("", ""),
+    ),
+)
+def test_sgr(style, expected):
+    assert render.sgr(style) == expected
+
+
+def test_sgr_unknown_colour():
+    with pytest.raises(ValueError):
+        render.sgr("bold chartreuse")
+
+
+def test_render_plain_and_coloured():
+    palette = render.Palette({"#": "blue", "@": "red"}, glyphs={"#": "\N{FULL BLOCK}"})
+    rows = [b"#.@", "..."]
+    assert render.render(rows, palette, colour=False) == "     012\n  0: \N{FULL BLOCK}.@\n  1: ...\n"
+    assert render.render(rows, palette, ruler=False, first_row=-1, colour=True) == (
+        f" -1: \x1b[34m\N{FULL BLOCK}{render.RESET}.\x1b[31m@{render.RESET}\n  0: ...\n"
+    )
+    assert render.render(["..."], palette, first_column=-2, colour=False).startswith("     210\n")
+
+
+class FakeTerminal(io.StringIO):
+    def isatty(self) -> bool:
+        return True
+
+
+def test_frame_writer_redraws_only_changed_lines():
+    terminal = FakeTerminal()
+    writer = render.FrameWriter(terminal, diff=True)
+    writer("a\nb\nc\n")
+    writer("a\nB\nc\n")
+    assert terminal.getvalue() == "\x1b[H\x1b[2Ja\nb\nc\n" + "\x1b[2;1HB\x1b[K" + "\x1b[4;1H\x1b[J"
+
+    terminal = FakeTerminal()
+    writer = render.FrameWriter(terminal, diff=True, max_fps=1e-3)
+    writer("a\n")
+    writer("b\n")
+    writer("c\n")
+    writer.flush()
+    assert terminal.getvalue() == "\x1b[H\x1b[2Ja\n" + "\x1b[1;1Hc\x1b[K\x1b[2;1H\x1b[J"
+
+    stream = io.StringIO()
+    writer = render.FrameWriter(stream, diff=True)
+    writer("a\n")
+    writer("b\n")
+    assert stream.getvalue() == "a\nb\n"
+
+
+def test_frame_queue_never_blocks():
+    frames = queue.Queue(maxsize=1)
+    sink = render.FrameQueue(frames, fps=1e-3)
+    sink("first")
+    # too soon after the first one, held back until `flush`
+    sink("second")
+    sink("third")
+    assert frames.get_nowait() == "first"
+    sink.flush()
+    assert frames.get_nowait() == "third"
+
+    sink = render.FrameQueue(frames, fps=1e9)
+    sink("fits")
+    sink("dropped, the queue is full")
+    assert frames.get_nowait() == "fits"
+    assert frames.empty()
+
+
+def test_show_goes_to_the_sink():
+    shown = []
+    previous = render.set_sink(shown.append)
+    try:
+        render.show("frame")
+    finally:
+        render.set_sink(previous)
+    assert shown == ["frame"]
@@ -0,0 +1,149 @@
+"""Whole-grid updates on NumPy boolean arrays, for the days that are cellular automata at heart.
+
+A layer is a 2-D ``bool`` array indexed ``[y, x]``, one per kind of thing on the grid (elves, rocks, a blizzard
+heading one way, the cells reached so far, ...). A round of a simulation is then a few shifts, ``&``/``|`` and
+sums of whole layers instead of a Python loop over the cells:
+
+- `look` and `push` shift a layer by an offset, the cells shifted in from outside the grid are ``False``,
+- `count_neighbours`, `any_neighbour` and `spread` combine the shifts for a set of offsets,
+- `move_agents` moves the agents of a layer by their first allowed offset, cancelling the moves that collide,
+- `tilt` slides the movable cells of a layer as far as they go in a direction.
+
+NumPy is optional, the days only use this module when `AVAILABLE` is true and keep their loops otherwise. It's
+all plain CPU NumPy.
+"""
+
+from collections.abc import Iterable, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - the days fall back to their loops
+    np = None
+
+AVAILABLE = np is not None
+
+OFFSETS4 = ((0, -1), (1, 0), (0, 1), (-1, 0))
+OFFSETS8 = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def layer(rows: Iterable[str | bytes], cells: str) -> "np.ndarray":
+    """The layer of the rows' cells that are one of `cells`."""
+    rows = [row.encode() if isinstance(row, str) else bytes(row) for row in rows]
+    grid = np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), -1)
+    return np.isin(grid, np.frombuffer(cells.encode(), dtype=np.uint8))
+
+
+def look(mask: "np.ndarray", dx: int, dy: int) -> "np.ndarray":
+    """Each cell gets the value of its neighbour at ``(x + dx, y + dy)``."""
+    height, width = mask.shape
+    shifted = np.zeros_like(mask)
+    if abs(dx) < width and abs(dy) < height:
+        shifted[max(-dy, 0) : height - max(dy, 0), max(-dx, 0) : width - max(dx, 0)] = mask[
+            max(dy, 0) : height + min(dy, 0), max(dx, 0) : width + min(dx, 0)
+        ]
+    return shifted
+
+
+def push(mask: "np.ndarray", dx: int, dy: int) -> "np.ndarray":
+    """Move every cell by ``(dx, dy)``, what moves out of the grid is lost."""
+    return look(mask, -dx, -dy)
+
+
+def count_neighbours(mask: "np.ndarray", offsets: Sequence[tuple[int, int]] = OFFSETS8) -> "np.ndarray":
+    """The number of neighbours at `offsets` of each cell that are set."""
+    counts = np.zeros(mask.shape, dtype=np.uint8)
+    for dx, dy in offsets:
+        counts += look(mask, dx, dy)
+    return counts
+
+
+def any_neighbour(mask: "np.ndarray", offsets: Sequence[tuple[int, int]] = OFFSETS8) -> "np.ndarray":
+    """Whether any of the neighbours at `offsets` of each cell is set."""
+    found = np.zeros_like(mask)
+    for dx, dy in offsets:
+        found |= look(mask, dx, dy)
+    return found
+
+
+def spread(mask: "np.ndarray", offsets: Sequence[tuple[int, int]] = OFFSETS4) -> "np.ndarray":
+    """The cells set and the ones they reach with one of the `offsets` (one step of a flood fill)."""
+    reached = mask.copy()
+    for dx, dy in offsets:
+        reached |= push(mask, dx, dy)
+    return reached
+
+
+def with_margin(mask: "np.ndarray", margin: int = 1) -> tuple["np.ndarray", int, int]:
+    """Make sure no set cell is closer than `margin` to the edge, growing the grid when needed.
+
+    For the simulations on an unbounded plane. Returns the layer and how many columns and rows were added on its
+    left and top (so that the caller can keep its coordinates), the grid grows by a quarter at least so that it
+    isn't copied every round.
+    """
+    ys, xs = np.nonzero(mask)
+    if not len(ys):
+        return mask, 0, 0
+    height, width = mask.shape
+    if ys.min() >= margin and xs.min() >= margin and ys.max() < height - margin and xs.max() < width - margin:
+        return mask, 0, 0
+    grow_y = max(margin, height // 4)
+    grow_x = max(margin, width // 4)
+    return np.pad(mask, ((grow_y, grow_y), (grow_x, grow_x))), grow_x, grow_y
+
+
+def move_agents(agents: "np.ndarray", moves: Iterable[tuple[int, int, "np.ndarray"]]) -> tuple["np.ndarray", int]:
+    """Move each agent by the first of the `moves` it may make, unless another agent moves to the same cell.
+
+    :param moves: ``(dx, dy, allowed)`` in the order of preference, `allowed` being the layer of the agents that may
+        move by ``(dx, dy)`` - to a cell that is free or whose agent leaves it.
+    :return: the new layer of agents and how many of them moved. The agents moved out of the grid are lost, see
+        `with_margin`.
+    """
+    undecided = agents.copy()
+    proposals = []
+    arrivals = np.zeros(agents.shape, dtype=np.uint8)
+    for dx, dy, allowed in moves:
+        proposing = undecided & allowed
+        undecided &= ~proposing
+        proposals.append((dx, dy, proposing))
+        arrivals += push(proposing, dx, dy)
+    # the cells exactly one agent wants to move to
+    free = arrivals == 1
+    moved = agents.copy()
+    count = 0
+    for dx, dy, proposing in proposals:
+        going = proposing & look(free, dx, dy)
+        moved &= ~going
+        count += int(np.count_nonzero(going))
+        moved |= push(going, dx, dy)
+    return moved, count
+
+
+# the views turning a direction into north and back, `tilt` only ever slides to the north
+_TOWARDS_NORTH = {
+    (0, -1): (lambda a: a, lambda a: a),
+    (0, 1): (lambda a: a[::-1], lambda a: a[::-1]),
+    (-1, 0): (lambda a: a.T, lambda a: a.T),
+    (1, 0): (lambda a: a.T[::-1], lambda a: a[::-1].T),
+}
+
+
+def tilt(movable: "np.ndarray", blocked: "np.ndarray", dx: int, dy: int) -> "np.ndarray":
+    """Slide the movable cells by ``(dx, dy)`` until they hit a blocked cell, another movable one or the edge.
+
+    Every run of cells between two blocked ones keeps its number of movable cells, they just pile up at its end
+    - which is worked out for all the runs at once from cumulative sums, the cells never move one by one.
+    """
+    view, back = _TOWARDS_NORTH[dx, dy]
+    movable, blocked = view(movable), view(blocked)
+    height = movable.shape[0]
+    rows = np.arange(height)[:, None]
+    # the first and last row of the run of each cell
+    first = np.maximum.accumulate(np.where(blocked, rows + 1, 0), axis=0)
+    last = np.minimum.accumulate(np.where(blocked, rows - 1, height - 1)[::-1], axis=0)[::-1]
+    # the number of movable cells above each row, with a row of zeros in front
+    above = np.zeros((height + 1, movable.shape[1]), dtype=np.intp)
+    np.cumsum(movable, axis=0, out=above[1:])
+    in_run = np.take_along_axis(above, last + 1, axis=0) - np.take_along_axis(above, first, axis=0)
+    tilted = ~blocked & (rows - first < in_run)
+    return np.ascontiguousarray(back(tilted))
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import stencil  # noqa: E402
+
+
+def test_look_and_push():
+    mask = stencil.layer(["#..", "...", "..#"], "#")
+    assert stencil.push(mask, 1, 0).tolist() == [[False, True, False], [False] * 3, [False] * 3]
+    assert stencil.look(mask, 1, 1)[1, 1]
+    assert not stencil.look(mask, 5, 0).any()
+    assert stencil.count_neighbours(mask)[1, 1] == 2
+    assert stencil.spread(mask).sum() == 2 + 4
+
+
+def test_move_agents_cancels_collisions():
+    agents = stencil.layer(["#.#", "...", ".#."], "#")
+    # the two at the top both want to go to the middle of the top row, the one at the bottom wants to go up or left
+    moves = [
+        (1, 0, stencil.layer(["#..", "...", "..."], "#")),
+        (-1, 0, stencil.layer(["..#", "...", "..."], "#")),
+        (0, -1, stencil.layer(["...", "...", ".#."], "#")),
+        (-1, 0, agents),
+    ]
+    moved, count = stencil.move_agents(agents, moves)
+    assert count == 1
+    assert moved.tolist() == stencil.layer(["#.#", ".#.", "..."], "#").tolist()
+
+
+def test_with_margin():
+    mask = stencil.layer(["#...", "....", "....", "...."], "#")
+    grown, left, top = stencil.with_margin(mask)
+    assert grown[top, left]
+    assert grown.sum() == 1
+    assert stencil.with_margin(grown)[0] is grown
+
+
+def tilt_cell_by_cell(rows: list[str], dx: int, dy: int) -> list[str]:
+    grid = [list(row) for row in rows]
+    moved = True
+    while moved:
+        moved = False
+        for y, row in enumerate(grid):
+            for x, cell in enumerate(row):
+                if cell == "O" and 0 <= y + dy < len(grid) and 0 <= x + dx < len(row) and grid[y + dy][x + dx] == ".":
+                    grid[y + dy][x + dx], row[x] = cell, "."
+                    moved = True
+    return ["".join(row) for row in grid]
+
+
+@pytest.mark.parametrize("direction", stencil.OFFSETS4)
+def test_tilt(direction):
+    generator = random.Random(14)
+    for _ in range(100):
+        width, height = generator.randint(1, 8), generator.randint(1, 8)
+        rows = ["".join(generator.choice(".O#") for _ in range(width)) for _ in range(height)]
+        tilted = stencil.tilt(stencil.layer(rows, "O"), stencil.layer(rows, "#"), *direction)
+        assert tilted.tolist() == stencil.layer(tilt_cell_by_cell(rows, *direction), "O").tolist(), rows
@@ -1,30 +1,32 @@
-import re
-import dataclasses
-from typing import NamedTuple
-from collections.abc import Iterable, Sequence
-import functools
-import itertools
-import tqdm
-from rich import print
+"""Advent of Code YEAR, day DD.
 
+`parse` gets the whole input as bytes and returns what both parts need, `part1`/`part2` return their answers.
+Keep the module level imports light, the runner (``python aoc.py run YEAR/DD``) imports the module to time it.
+"""
 
-def part1():
-    value = 0
 
-    for line in open("input.txt").readlines():
-        line = line.strip()
+def parse(buf: bytes):
+    return [line for line in buf.decode().splitlines() if line.strip()]
+
 
-    print(f"The value is {value}")
+def part1(parsed) -> int:
+    value = 0
+    for line in parsed:
+        pass
+    return value
 
-################################################################################
 
-def part2():
+def part2(parsed) -> int:
     value = 0
+    for line in parsed:
+        pass
+    return value
 
-    for line in open("input.txt").readlines():
-        line = line.strip()
 
-    print(f"The value is {value}")
+if __name__ == "__main__":
+    import sys
 
-if __name__ == '__main__':
-    part1()
+    with open(sys.argv[1] if len(sys.argv) > 1 else "input.txt", "rb") as input_file:
+        parsed = parse(input_file.read())
+    print(f"Part 1: {part1(parsed)}")
+    print(f"Part 2: {part2(parsed)}")
@@ -0,0 +1,138 @@
+"""Watch a day's visualization live, in a terminal app.
+
+The solver runs in its own process (with ``VERBOSE`` on) and sends its frames (see `render.show`) through a
+queue, at most `--fps` of them a second, dropping the rest. The app only ever shows the latest frame, so neither
+side waits for the other and the simulation runs at the speed it would run without anybody watching.
+
+Needs textual (``pip install textual``), which the solutions themselves don't.
+
+Examples::
+
+    python textual_app.py 2024/06 --input sample.txt
+    python textual_app.py 2024/14 --part 2 --fps 10
+"""
+
+import argparse
+import contextlib
+import multiprocessing
+import os
+import queue
+import sys
+from pathlib import Path
+
+import aoc
+import render
+
+DEFAULT_FPS = 30
+# frames waiting for the app; a solver drawing faster than the app reads drops the ones that don't fit
+QUEUE_SIZE = 4
+
+
+class SolverDone:
+    """Sent after the last frame: the answer, or the error the part ended with."""
+
+    def __init__(self, answer: str | None, error: str | None):
+        self.answer = answer
+        self.error = error
+
+
+def run_solver(day: aoc.Day, part: int, input_path: Path, frames, fps: float) -> None:
+    """Run the part with its frames going to the `frames` queue, the body of the solver process."""
+    sink = render.FrameQueue(frames, fps)
+    render.set_sink(sink)
+    # the rest of the verbose output would draw over the app
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), contextlib.redirect_stderr(devnull):
+        result = aoc.run_part(day, part, input_path, verbose=True)
+    sink.flush()
+    error = None if result.error is None else f"{type(result.error).__name__}: {result.error}"
+    frames.put(SolverDone(None if result.answer is None else str(result.answer), error))
+
+
+def make_app(title: str, frames, fps: float):
+    """The app showing the frames from the queue; textual is imported here so that the rest works without it."""
+    from rich.text import Text
+    from textual.app import App, ComposeResult
+    from textual.containers import ScrollableContainer
+    from textual.widgets import Footer, Header, Static
+
+    class FrameViewer(App):
+        BINDINGS = [("q", "quit", "Quit"), ("p", "pause", "Pause")]
+
+        def __init__(self):
+            super().__init__()
+            self.title = title
+            self.paused = False
+
+        def compose(self) -> ComposeResult:
+            yield Header()
+            yield ScrollableContainer(Static(id="frame"))
+            yield Footer()
+
+        def on_mount(self) -> None:
+            self.set_interval(1 / fps, self.poll_frames)
+
+        def poll_frames(self) -> None:
+            latest = None
+            with contextlib.suppress(queue.Empty):
+                while True:
+                    message = frames.get_nowait()
+                    if isinstance(message, SolverDone):
+                        self.sub_title = f"error: {message.error}" if message.error else f"answer: {message.answer}"
+                    else:
+                        latest = message
+            if latest is not None and not self.paused:
+                self.query_one("#frame", Static).update(Text.from_ansi(latest))
+
+        def action_pause(self) -> None:
+            self.paused = not self.paused
+
+    return FrameViewer()
+
+
+def make_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("day", help="YEAR/DAY")
+    parser.add_argument("-p", "--part", type=int, choices=[1, 2], default=1)
+    parser.add_argument(
+        "-i",
+        "--input",
+        default=aoc.DEFAULT_INPUT,
+        help=f"relative to the day's directory (default {aoc.DEFAULT_INPUT})",
+    )
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS, help="frames sent by the solver per second")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    arguments = make_parser().parse_args(argv)
+    days = aoc.select_days(aoc.discover(), [arguments.day])
+    if len(days) != 1:
+        print(f"{arguments.day}: no such day", file=sys.stderr)
+        return 2
+    day = days[0]
+    input_path = day.resolve_input(arguments.input)
+    if not input_path.is_file():
+        print(f"{input_path}: no such input", file=sys.stderr)
+        return 2
+    try:
+        import textual  # noqa: F401
+    except ImportError:
+        print("The viewer needs textual: pip install textual", file=sys.stderr)
+        return 1
+
+    frames = multiprocessing.Queue(QUEUE_SIZE)
+    solver = multiprocessing.Process(
+        target=run_solver, args=(day, arguments.part, input_path, frames, arguments.fps), daemon=True
+    )
+    solver.start()
+    try:
+        make_app(f"{day.name} part {arguments.part}", frames, arguments.fps).run()
+    finally:
+        if solver.is_alive():
+            solver.terminate()
+        solver.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
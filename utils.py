@@ -1,7 +1,21 @@
+import bisect
+import contextlib
+import enum
+import functools
+import gc
 import heapq
-from collections import defaultdict
+import itertools
+import math
+import mmap
+import os
+import re
+import sys
+import time
+from array import array
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Sequence
 from dataclasses import dataclass, field
-from typing import Iterable, NamedTuple
+from typing import Generic, NamedTuple, TypeVar
 
 
 class Point(NamedTuple):
@@ -13,21 +27,17 @@ class Point(NamedTuple):
             return NotImplemented
         return Point(self.x + other.x, self.y + other.y)
 
-    def __eq__(self, other):
-        if not (isinstance(other, MutablePoint) or isinstance(other, Point)):
-            return NotImplemented
-        return self.x == other.x and self.y == other.y
-
-    def __ne__(self, other):
-        if not (isinstance(other, MutablePoint) or isinstance(other, Point)):
-            return NotImplemented
-        return not self == other
+    # no __eq__/__hash__ overrides: comparing and hashing stay the C tuple ones, comparing with a MutablePoint is
+    # handled by MutablePoint.__eq__
 
     def distance(self, other):
         if not (isinstance(other, Point) or isinstance(other, MutablePoint)):
             raise NotImplementedError(f"Can't take distance of Point and {type(other)}")
         return abs(self.x - other.x) + abs(self.y - other.y)
 
+    def pack(self) -> int:
+        return pack(self.x, self.y)
+
 
 class Point3d(NamedTuple):
     x: int
@@ -62,6 +72,9 @@ class MutablePoint:
             return NotImplemented
         return not self == other
 
+    def freeze(self) -> Point:
+        return Point(self.x, self.y)
+
 
 @dataclass
 class MutablePoint3d:
@@ -111,53 +124,811 @@ DIRECTION_TO_VECTOR = {
 }
 
 
-class Edge(NamedTuple):
-    target: Point3d
-    weight: int
+# Packed coordinates: the position (x, y) is the int ``(y + COORDINATE_BIAS) * COORDINATE_STRIDE + x + COORDINATE_BIAS``.
+# Sets and dicts of those hash and compare as plain ints, and moving by (dx, dy) is adding ``pack_offset(dx, dy)``.
+# The coordinates have to stay within +-COORDINATE_BIAS, which keeps the keys below 2**30 - a single "digit" int.
+# Use `Point` (via `unpack`) only for parsing and display.
+COORDINATE_STRIDE = 1 << 15
+COORDINATE_BIAS = COORDINATE_STRIDE // 2
+
+
+def pack(x: int, y: int) -> int:
+    return (y + COORDINATE_BIAS) * COORDINATE_STRIDE + x + COORDINATE_BIAS
+
+
+def unpack(key: int) -> Point:
+    y, x = divmod(key, COORDINATE_STRIDE)
+    return Point(x - COORDINATE_BIAS, y - COORDINATE_BIAS)
+
+
+def pack_offset(dx: int, dy: int) -> int:
+    return dy * COORDINATE_STRIDE + dx
+
+
+# up, right, down, left - the same order as Grid.offsets4
+OFFSETS4 = (pack_offset(0, -1), pack_offset(1, 0), pack_offset(0, 1), pack_offset(-1, 0))
+# clockwise from up
+OFFSETS8 = tuple(
+    pack_offset(dx, dy) for dx, dy in ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1))
+)
+
+
+def neighbours(key: int, offsets: Iterable[int] = OFFSETS4) -> list[int]:
+    return [key + offset for offset in offsets]
+
+
+def shifted(keys: Iterable[int], offset: int) -> set[int]:
+    """Move all the positions by the same (packed) offset."""
+    return {key + offset for key in keys}
+
+
+def bounding_box(keys: Iterable[int]) -> tuple[Point, Point]:
+    """Return the top left and bottom right corners (inclusive) of the positions."""
+    points = [unpack(key) for key in keys]
+    xs = [p.x for p in points]
+    ys = [p.y for p in points]
+    return Point(min(xs), min(ys)), Point(max(xs), max(ys))
+
+
+# `ints` blanks out everything but digits (and minus signs) with one `bytes.translate` and splits what's left
+_KEEP_SIGNED = b"0123456789-"
+_SIGNED_TABLE = bytes(c if c in _KEEP_SIGNED else ord(" ") for c in range(256))
+_UNSIGNED_TABLE = bytes(c if c in _KEEP_SIGNED[:-1] else ord(" ") for c in range(256))
+# the slow path when that leaves a "-" that isn't a sign: it is a minus sign unless it follows a digit, so "2-4"
+# (a range) is 2 and 4 but "x=-3" is -3
+INTEGERS_RE = re.compile(rb"(?:(?<!\d)-)?\d+")
+BLANK_LINE_RE = re.compile(rb"\r?\n(?:[ \t]*\r?\n)+")
+
+
+def read_input(source, use_mmap: bool = False, comment: bytes | None = None) -> bytes | mmap.mmap:
+    """Read a whole input as bytes.
+
+    :param source: a path, or an open file - text (as the 2024 parts get it) or binary.
+    :param use_mmap: map the file instead of reading it, for inputs too big to copy; the regex based helpers below
+        work on the mapping just as well.
+    :param comment: drop everything from this marker to the end of its line (the 2024 samples use ``#``) and the
+        lines that are only a comment altogether, the result is a copy then.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as input_file:
+            return read_input(input_file, use_mmap, comment)
+    if use_mmap:
+        fileno = source.buffer.fileno() if hasattr(source, "buffer") else source.fileno()
+        data = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) if os.fstat(fileno).st_size else b""
+    else:
+        data = source.buffer.read() if hasattr(source, "buffer") else source.read()
+        data = data.encode() if isinstance(data, str) else data
+    if comment is not None:
+        # a line that is all comment goes with its newline, it mustn't leave a blank line that splits a block
+        data = re.sub(rb"(?m)^[ \t]*" + re.escape(comment) + rb"[^\n]*(?:\n|\Z)", b"", data)
+        data = re.sub(re.escape(comment) + rb"[^\n]*", b"", data)
+    return data
+
+
+def ints(data, signed: bool = True) -> array:
+    """Return all the integers in the data (bytes or anything with the buffer protocol) in one pass.
+
+    With ``signed=False`` a "-" is never a sign.
+    """
+    data = data if isinstance(data, bytes) else bytes(data)
+    if not signed:
+        return array("q", map(int, data.translate(_UNSIGNED_TABLE).split()))
+    try:
+        return array("q", map(int, data.translate(_SIGNED_TABLE).split()))
+    except ValueError:
+        return array("q", map(int, INTEGERS_RE.findall(data)))
+
+
+def blocks(data) -> list[bytes]:
+    """Split the data into the blocks separated by blank lines."""
+    return [stripped for block in BLANK_LINE_RE.split(bytes(data)) if (stripped := block.strip())]
+
+
+def read_grid(data, border: str = "\0") -> "Grid":
+    """`Grid.from_bytes` of the data, see `read_input`."""
+    return Grid.from_bytes(data, border)
+
+
+class Grid:
+    """A 2D grid of single byte cells stored row by row in one flat bytearray.
+
+    The grid is surrounded by a one cell wide border of `border` cells, so the neighbours of any inner cell can be
+    read without bounds checks - walking off the grid just reads the border value. Cells are addressed by their
+    index in the flat array (see `index`), and ``index + offset`` for an offset from `offsets4` (up, right, down,
+    left - turning right is ``(d + 1) % 4``) or `offsets8` is a neighbour.
+
+    `snapshot` shares the cells until either grid is written to through `__setitem__`/`set`/`writable_cells`.
+    Hot loops may read ``grid.cells`` directly but should write only to what `writable_cells` returned.
+    """
+
+    __slots__ = ("width", "height", "stride", "border", "cells", "offsets4", "offsets8", "_shared")
+
+    def __init__(self, width: int, height: int, fill: str = ".", border: str = "\0"):
+        self.width = width
+        self.height = height
+        self.stride = width + 2
+        self.border = ord(border)
+        row = bytes((self.border,)) + fill.encode() * width + bytes((self.border,))
+        self.cells = bytearray(bytes((self.border,)) * self.stride) + bytearray(row * height)
+        self.cells += bytes((self.border,)) * self.stride
+        self._shared = False
+        self._set_offsets()
 
+    def _set_offsets(self):
+        stride = self.stride
+        self.offsets4 = (-stride, 1, stride, -1)
+        self.offsets8 = (-stride, -stride + 1, 1, stride + 1, stride, stride - 1, -1, -stride - 1)
 
-@dataclass(order=True)
-class Node:
-    """A graph node class for use with the Dijkstra algorithm."""
+    @classmethod
+    def from_lines(cls, lines: Iterable[str | bytes], border: str = "\0") -> "Grid":
+        """Create a grid from lines of text, empty lines are skipped."""
+        rows = [line.strip() for line in lines]
+        rows = [row.encode() if isinstance(row, str) else bytes(row) for row in rows if row]
+        width = len(rows[0]) if rows else 0
+        assert all(len(row) == width for row in rows), "all rows have to have the same length"
+        grid = cls(width, len(rows), border=border)
+        for y, row in enumerate(rows):
+            start = grid.index(0, y)
+            grid.cells[start : start + width] = row
+        return grid
 
-    coordinates: Point3d
-    links: list[Edge] = field(default_factory=list, repr=False, init=False, compare=False)
+    @classmethod
+    def from_bytes(cls, data, border: str = "\0") -> "Grid":
+        """Create a grid from a whole input at once (a grid's rows never contain whitespace)."""
+        rows = bytes(data).split()
+        width = len(rows[0]) if rows else 0
+        assert all(len(row) == width for row in rows), "all rows have to have the same length"
+        grid = cls(0, 0, border=border)
+        grid.width = width
+        grid.height = len(rows)
+        grid.stride = width + 2
+        edge = bytes((grid.border,))
+        grid.cells = bytearray(edge * (grid.stride + 1) + (edge * 2).join(rows) + edge * (grid.stride + 1))
+        grid._set_offsets()
+        return grid
 
-    # def __lt__(self, other):
-    #     if not isinstance(other, Node):
-    #         return NotImplemented
-    #     return self.coordinates < other.coordinates
+    def index(self, x: int, y: int) -> int:
+        return (y + 1) * self.stride + x + 1
+
+    def coordinates(self, index: int) -> tuple[int, int]:
+        """Return ``(x, y)`` of a cell index."""
+        y, x = divmod(index, self.stride)
+        return x - 1, y - 1
+
+    def inside(self, index: int) -> bool:
+        y, x = divmod(index, self.stride)
+        return 0 < x <= self.width and 0 < y <= self.height
+
+    def __getitem__(self, xy: tuple[int, int]) -> str:
+        return chr(self.cells[self.index(*xy)])
+
+    def __setitem__(self, xy: tuple[int, int], value: str) -> None:
+        self.set(self.index(*xy), ord(value))
+
+    def set(self, index: int, value: int) -> None:
+        self.writable_cells()[index] = value
+
+    def writable_cells(self) -> bytearray:
+        """Return the cells for writing, copying them first if they are shared with a snapshot."""
+        if self._shared:
+            self.cells = bytearray(self.cells)
+            self._shared = False
+        return self.cells
+
+    def snapshot(self) -> "Grid":
+        """Return a copy of the grid that shares the cells until one of them is modified."""
+        copy = object.__new__(Grid)
+        for attribute in Grid.__slots__:
+            setattr(copy, attribute, getattr(self, attribute))
+        self._shared = copy._shared = True
+        return copy
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Grid):
+            return NotImplemented
+        return self.width == other.width and self.height == other.height and self.cells == other.cells
 
     def __hash__(self) -> int:
-        return hash(self.coordinates)
+        return hash(bytes(self.cells))
 
+    def find(self, value: str) -> int | None:
+        """Return the index of the first cell with the value (None if there's none)."""
+        index = self.cells.find(ord(value))
+        return None if index == -1 else index
 
-def dijkstra(nodes: Iterable[Node], start: Node, end_nodes: Iterable[Node]) -> dict[Point3d, Node]:
-    """Implementation of Dijkstra graph path finding algorithm.
+    def find_all(self, value: str) -> list[int]:
+        indexes = []
+        cells, needle = self.cells, ord(value)
+        index = cells.find(needle)
+        while index != -1:
+            indexes.append(index)
+            index = cells.find(needle, index + 1)
+        return indexes
 
-    Actually finds a route from the start node to all reachable nodes.
+    def row(self, y: int) -> bytes:
+        start = self.index(0, y)
+        return bytes(self.cells[start : start + self.width])
 
-    :param nodes: an iterable of all the nodes in the graph.
-    :param start: the start node.
-    :param end_nodes: an iterable of end nodes.
-    :returns: a mapping of node to its parent (predecesor on the path).
+    def column(self, x: int) -> bytes:
+        start = self.index(x, 0)
+        return bytes(self.cells[start : start + self.height * self.stride : self.stride])
+
+    def rows(self) -> list[str]:
+        return [self.row(y).decode() for y in range(self.height)]
+
+    def __str__(self) -> str:
+        return "\n".join(self.rows())
+
+    def transpose(self) -> "Grid":
+        return Grid.from_lines([self.column(x) for x in range(self.width)], border=chr(self.border))
+
+    def rotate(self) -> "Grid":
+        """Return the grid rotated 90 degrees clockwise."""
+        return Grid.from_lines([self.column(x)[::-1] for x in range(self.width)], border=chr(self.border))
+
+    def components(self, ignore: bytes | None = None) -> "Components":
+        """Label the areas of equal cells connected up, down, left or right, see `label_components`.
+
+        :param ignore: the cell values that aren't labelled, the border by default.
+        """
+        return label_components(self.cells, self.offsets4, bytes((self.border,)) if ignore is None else ignore)
+
+
+class VoxelGrid:
+    """A 3D `Grid`: one flat bytearray of cells with a one cell wide border around them on every side.
+
+    The cell (x, y, z) is at `index`, ``index + offset`` for an offset from `offsets6` is one of its six neighbours.
     """
-    graph = {node.coordinates: node for node in nodes}
-    distance = defaultdict(lambda: 99_999_999)
-    distance[start.coordinates] = 0
-    parent: dict[Point3d, Node] = {start.coordinates: None}
-    queue: list[tuple[int, Node]] = [(0, start)]
-    for end_node in end_nodes:
-        heapq.heappush(queue, (9999_9999_9999_9999, end_node))
+
+    __slots__ = ("width", "height", "depth", "border", "cells", "offsets6", "_strides")
+
+    def __init__(self, width: int, height: int, depth: int, fill: str = ".", border: str = "\0"):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.border = ord(border)
+        y_stride = width + 2
+        z_stride = y_stride * (height + 2)
+        self._strides = (y_stride, z_stride)
+        self.cells = bytearray(bytes((self.border,)) * z_stride * (depth + 2))
+        row = fill.encode() * width
+        for z in range(depth):
+            for y in range(height):
+                start = self.index(0, y, z)
+                self.cells[start : start + width] = row
+        self.offsets6 = (-1, 1, -y_stride, y_stride, -z_stride, z_stride)
+
+    def index(self, x: int, y: int, z: int) -> int:
+        y_stride, z_stride = self._strides
+        return (z + 1) * z_stride + (y + 1) * y_stride + x + 1
+
+    def coordinates(self, index: int) -> tuple[int, int, int]:
+        y_stride, z_stride = self._strides
+        z, rest = divmod(index, z_stride)
+        y, x = divmod(rest, y_stride)
+        return x - 1, y - 1, z - 1
+
+    def __getitem__(self, xyz: tuple[int, int, int]) -> str:
+        return chr(self.cells[self.index(*xyz)])
+
+    def __setitem__(self, xyz: tuple[int, int, int], value: str) -> None:
+        self.cells[self.index(*xyz)] = ord(value)
+
+    def components(self, ignore: bytes | None = None) -> "Components":
+        """Label the volumes of equal cells connected through their faces, see `label_components`."""
+        return label_components(self.cells, self.offsets6, bytes((self.border,)) if ignore is None else ignore)
+
+
+class UnionFind:
+    """Disjoint sets of the ints ``0..n - 1`` kept in two flat arrays.
+
+    `find` halves the paths it walks and `union` hangs the smaller tree under the bigger one, which keeps both
+    practically constant time.
+    """
+
+    __slots__ = ("parent", "size")
+
+    def __init__(self, n: int):
+        self.parent = array("i", range(n))
+        self.size = array("i", [1]) * n
+
+    def find(self, a: int) -> int:
+        parent = self.parent
+        while (up := parent[a]) != a:
+            parent[a] = a = parent[up]
+        return a
+
+    def union(self, a: int, b: int) -> bool:
+        """Join the sets of a and b, return False if they already were one."""
+        a, b = self.find(a), self.find(b)
+        if a == b:
+            return False
+        size = self.size
+        if size[a] < size[b]:
+            a, b = b, a
+        self.parent[b] = a
+        size[a] += size[b]
+        return True
+
+    def connected(self, a: int, b: int) -> bool:
+        return self.find(a) == self.find(b)
+
+    def set_size(self, a: int) -> int:
+        return self.size[self.find(a)]
+
+
+class Components(NamedTuple):
+    # the component of every cell, -1 for the ignored ones
+    labels: array
+    # per component: the number of its cells, the number of its cells' sides facing other cells (the perimeter in
+    # 2D, the surface in 3D) and the index of its first cell (its value is the value of the whole component)
+    sizes: list[int]
+    boundaries: list[int]
+    first_cells: list[int]
+
+
+def label_components(cells, offsets: Sequence[int], ignore: bytes = b"\0") -> Components:
+    """Label the connected components of equal cells of a flat grid in linear time.
+
+    Two cells are connected if they are an offset apart and have the same value. The first pass joins every cell
+    with its equal neighbours before it (the negative offsets) in a `UnionFind`, the second numbers the components
+    in the order of their first cells and sums up their sizes and boundaries. Every labelled cell needs all its
+    neighbours inside the array, which the border of `Grid` and `VoxelGrid` takes care of.
+
+    :param offsets: the neighbours, in pairs of opposite offsets.
+    :param ignore: the cell values that belong to no component.
+    """
+    ignored = set(ignore)
+    union_find = UnionFind(len(cells))
+    parent, size, find, union = union_find.parent, union_find.size, union_find.find, union_find.union
+    backward = [offset for offset in offsets if offset < 0]
+    # the number of equal neighbours before each cell: each such pair hides two sides from the boundary
+    joins = bytearray(len(cells))
+    for index, value in enumerate(cells):
+        if value in ignored:
+            continue
+        for offset in backward:
+            if cells[index + offset] == value:
+                joins[index] += 1
+                if joins[index] == 1:
+                    # nothing was joined with this cell yet, it simply goes under the neighbour's root
+                    root = find(index + offset)
+                    parent[index] = root
+                    size[root] += 1
+                else:
+                    union(index, index + offset)
+
+    labels = array("i", [-1]) * len(cells)
+    sizes, boundaries, first_cells = [], [], []
+    sides = len(offsets)
+    for index, value in enumerate(cells):
+        if value in ignored:
+            continue
+        if (up := parent[index]) < index:
+            # the parent was labelled already
+            label = labels[up]
+        elif (label := labels[root := find(index)]) < 0:
+            label = labels[root] = len(sizes)
+            sizes.append(0)
+            boundaries.append(0)
+            first_cells.append(index)
+        labels[index] = label
+        sizes[label] += 1
+        boundaries[label] += sides - 2 * joins[index]
+    return Components(labels, sizes, boundaries, first_cells)
+
+
+INFINITY = 2**62
+NO_PARENT = -1
+
+
+class ShortestPaths(NamedTuple):
+    """Result of a shortest path search over integer node ids.
+
+    ``distance[node]`` is ``INFINITY`` and ``parent[node]`` is ``NO_PARENT`` for nodes that weren't reached (the
+    sources have no parent either). When the search stopped early the distances of nodes that weren't settled yet
+    are only upper bounds.
+    """
+
+    distance: array
+    parent: array
+
+    def reached(self, node: int) -> bool:
+        return self.distance[node] != INFINITY
+
+    def path_to(self, node: int) -> list[int]:
+        """Return the nodes from a source to `node` (inclusive), empty if `node` wasn't reached."""
+        if self.distance[node] == INFINITY:
+            return []
+        path = [node]
+        parent = self.parent
+        while (node := parent[node]) != NO_PARENT:
+            path.append(node)
+        path.reverse()
+        return path
+
+
+class Graph:
+    """A directed, weighted graph with the nodes numbered ``0..num_nodes - 1``.
+
+    The edges are stored in compressed sparse row arrays: the edges leaving node ``u`` go to
+    ``targets[offsets[u]:offsets[u + 1]]`` and have the matching ``weights``. Use `GraphBuilder` to create one.
+    """
+
+    __slots__ = ("num_nodes", "offsets", "targets", "weights")
+
+    def __init__(self, num_nodes: int, offsets: array, targets: array, weights: array):
+        assert len(offsets) == num_nodes + 1
+        assert len(targets) == len(weights) == offsets[-1]
+        self.num_nodes = num_nodes
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+
+    @classmethod
+    def from_edges(cls, num_nodes: int, edges: Iterable[tuple[int, int, int]]) -> "Graph":
+        """Create a graph from ``(source, target, weight)`` triples."""
+        builder = GraphBuilder(num_nodes)
+        for source, target, weight in edges:
+            builder.add_edge(source, target, weight)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return self.num_nodes
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def edges_from(self, node: int) -> Iterable[tuple[int, int]]:
+        """Return ``(target, weight)`` pairs of the edges leaving the node."""
+        start, end = self.offsets[node], self.offsets[node + 1]
+        return zip(self.targets[start:end], self.weights[start:end])
+
+    def reversed(self) -> "Graph":
+        """Return the graph with all the edges pointing the other way."""
+        builder = GraphBuilder(self.num_nodes)
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        for source in range(self.num_nodes):
+            for i in range(offsets[source], offsets[source + 1]):
+                builder.add_edge(targets[i], source, weights[i])
+        return builder.build()
+
+    def dijkstra(self, sources: Iterable[int], targets: Iterable[int] = (), all_targets: bool = True) -> ShortestPaths:
+        """Implementation of Dijkstra graph path finding algorithm.
+
+        Without `targets` finds the routes from the sources to all reachable nodes. With them the search stops as
+        soon as all of them (or with ``all_targets=False``: any of them) are settled.
+
+        :param sources: the start nodes, all at distance 0.
+        :param targets: nodes at which the search may stop.
+        :returns: flat distance and parent (predecessor on the path) arrays.
+        """
+        num_nodes = self.num_nodes
+        distance = array("q", [INFINITY]) * num_nodes
+        parent = array("i", [NO_PARENT]) * num_nodes
+        settled = bytearray(num_nodes)
+        is_target = bytearray(num_nodes)
+        for target in targets:
+            is_target[target] = 1
+        targets_left = sum(is_target) if all_targets else min(1, sum(is_target))
+
+        queue = []
+        for source in sources:
+            distance[source] = 0
+            queue.append((0, source))
+        heapq.heapify(queue)
+
+        offsets, edge_targets, weights = self.offsets, self.targets, self.weights
+        heappush, heappop = heapq.heappush, heapq.heappop
+        while queue:
+            dist, u = heappop(queue)
+            if settled[u]:
+                continue
+            settled[u] = 1
+            if is_target[u]:
+                targets_left -= 1
+                if targets_left == 0:
+                    break
+            for i in range(offsets[u], offsets[u + 1]):
+                v = edge_targets[i]
+                if (new_distance := dist + weights[i]) < distance[v]:
+                    distance[v] = new_distance
+                    parent[v] = u
+                    heappush(queue, (new_distance, v))
+
+        return ShortestPaths(distance, parent)
+
+
+class GraphBuilder:
+    """Collects edges in flat arrays and turns them into a `Graph`."""
+
+    def __init__(self, num_nodes: int = 0):
+        self.num_nodes = num_nodes
+        self.sources = array("i")
+        self.targets = array("i")
+        self.weights = array("i")
+
+    def add_node(self) -> int:
+        """Add a new node and return its id."""
+        self.num_nodes += 1
+        return self.num_nodes - 1
+
+    def add_edge(self, source: int, target: int, weight: int = 1) -> None:
+        self.sources.append(source)
+        self.targets.append(target)
+        self.weights.append(weight)
+
+    def build(self) -> Graph:
+        """Sort the edges by source (counting sort, keeps the insertion order of each node's edges)."""
+        num_nodes = self.num_nodes
+        offsets = array("i", [0]) * (num_nodes + 1)
+        for source in self.sources:
+            offsets[source + 1] += 1
+        for node in range(num_nodes):
+            offsets[node + 1] += offsets[node]
+        position = offsets[:-1]
+        num_edges = len(self.sources)
+        targets = array("i", [0]) * num_edges
+        weights = array("i", [0]) * num_edges
+        for source, target, weight in zip(self.sources, self.targets, self.weights):
+            i = position[source]
+            targets[i] = target
+            weights[i] = weight
+            position[source] = i + 1
+        return Graph(num_nodes, offsets, targets, weights)
+
+
+State = TypeVar("State")
+Neighbours = Callable[[State], Iterable[tuple[State, int]]]
+
+
+@dataclass
+class SearchResult(Generic[State]):
+    """Result of a search over implicit states.
+
+    The states are known to the result only by their encoded int keys: ``distance`` and ``parent`` hold an entry
+    for each state that was reached (`NO_PARENT` for the start states). If the search was given a goal, ``goal``
+    is the first goal state that was settled (None if there wasn't one).
+    """
+
+    distance: dict[int, int]
+    parent: dict[int, int]
+    goal: State | None = None
+    goal_key: int | None = None
+
+    @property
+    def cost(self) -> int | None:
+        """Distance to the goal."""
+        return None if self.goal_key is None else self.distance[self.goal_key]
+
+    def path_to(self, key: int) -> list[int]:
+        """Return the keys of the states from a start to `key` (inclusive), empty if it wasn't reached."""
+        if key not in self.distance:
+            return []
+        path = [key]
+        parent = self.parent
+        while (key := parent[key]) != NO_PARENT:
+            path.append(key)
+        path.reverse()
+        return path
+
+
+def _init_search(starts: Iterable[State], encode: Callable[[State], int]):
+    distance: dict[int, int] = {}
+    parent: dict[int, int] = {}
+    start_entries = []
+    for start in starts:
+        key = encode(start)
+        distance[key] = 0
+        parent[key] = NO_PARENT
+        start_entries.append((key, start))
+    return distance, parent, start_entries
+
+
+def dijkstra_search(
+    starts: Iterable[State],
+    neighbours: Neighbours,
+    encode: Callable[[State], int],
+    is_goal: Callable[[State], bool] | None = None,
+) -> SearchResult[State]:
+    """Dijkstra's algorithm over states generated on demand.
+
+    Only the states reachable from `starts` are ever created, `neighbours` yields ``(state, weight)`` pairs and
+    `encode` turns a state into a unique int key. Without `is_goal` all reachable states are settled.
+    """
+    distance, parent, start_entries = _init_search(starts, encode)
+    queue = [(0, key, state) for key, state in start_entries]
+    heapq.heapify(queue)
+    heappush, heappop = heapq.heappush, heapq.heappop
     while queue:
-        unused_dist, u = heapq.heappop(queue)
-        for link in u.links:
-            if (new_distance := distance[u.coordinates] + link.weight) < distance[link.target]:
-                distance[link.target] = new_distance
-                parent[link.target] = u
-                heapq.heappush(queue, (distance[link.target], graph[link.target]))
+        dist, key, state = heappop(queue)
+        if dist > distance[key]:
+            continue
+        if is_goal is not None and is_goal(state):
+            return SearchResult(distance, parent, state, key)
+        for neighbour, weight in neighbours(state):
+            neighbour_key = encode(neighbour)
+            if (new_distance := dist + weight) < distance.get(neighbour_key, INFINITY):
+                distance[neighbour_key] = new_distance
+                parent[neighbour_key] = key
+                heappush(queue, (new_distance, neighbour_key, neighbour))
+    return SearchResult(distance, parent)
 
-    return parent
+
+def astar_search(
+    starts: Iterable[State],
+    neighbours: Neighbours,
+    encode: Callable[[State], int],
+    is_goal: Callable[[State], bool],
+    heuristic: Callable[[State], int],
+) -> SearchResult[State]:
+    """A* search, `heuristic` must never overestimate the remaining distance to a goal."""
+    distance, parent, start_entries = _init_search(starts, encode)
+    queue = [(heuristic(state), 0, key, state) for key, state in start_entries]
+    heapq.heapify(queue)
+    heappush, heappop = heapq.heappush, heapq.heappop
+    while queue:
+        unused_estimate, dist, key, state = heappop(queue)
+        if dist > distance[key]:
+            continue
+        if is_goal(state):
+            return SearchResult(distance, parent, state, key)
+        for neighbour, weight in neighbours(state):
+            neighbour_key = encode(neighbour)
+            if (new_distance := dist + weight) < distance.get(neighbour_key, INFINITY):
+                distance[neighbour_key] = new_distance
+                parent[neighbour_key] = key
+                heappush(queue, (new_distance + heuristic(neighbour), new_distance, neighbour_key, neighbour))
+    return SearchResult(distance, parent)
+
+
+def zero_one_bfs(
+    starts: Iterable[State],
+    neighbours: Neighbours,
+    encode: Callable[[State], int],
+    is_goal: Callable[[State], bool] | None = None,
+) -> SearchResult[State]:
+    """Shortest paths when every weight is 0 or 1, using a deque instead of a heap."""
+    distance, parent, start_entries = _init_search(starts, encode)
+    queue = deque((0, key, state) for key, state in start_entries)
+    popleft, append, appendleft = queue.popleft, queue.append, queue.appendleft
+    while queue:
+        dist, key, state = popleft()
+        if dist > distance[key]:
+            continue
+        if is_goal is not None and is_goal(state):
+            return SearchResult(distance, parent, state, key)
+        for neighbour, weight in neighbours(state):
+            neighbour_key = encode(neighbour)
+            if (new_distance := dist + weight) < distance.get(neighbour_key, INFINITY):
+                distance[neighbour_key] = new_distance
+                parent[neighbour_key] = key
+                if weight:
+                    append((new_distance, neighbour_key, neighbour))
+                else:
+                    appendleft((new_distance, neighbour_key, neighbour))
+    return SearchResult(distance, parent)
+
+
+def dial_search(
+    starts: Iterable[State],
+    neighbours: Neighbours,
+    encode: Callable[[State], int],
+    max_weight: int,
+    is_goal: Callable[[State], bool] | None = None,
+) -> SearchResult[State]:
+    """Dial's algorithm: Dijkstra with a circular bucket queue, for small non-negative integer weights.
+
+    All the weights have to be at most `max_weight`, then only ``max_weight + 1`` buckets are needed.
+    """
+    distance, parent, start_entries = _init_search(starts, encode)
+    num_buckets = max_weight + 1
+    buckets: list[list[tuple[int, State]]] = [[] for _ in range(num_buckets)]
+    buckets[0].extend(start_entries)
+    queued = len(start_entries)
+    dist = 0
+    while queued:
+        bucket = buckets[dist % num_buckets]
+        while bucket:
+            key, state = bucket.pop()
+            queued -= 1
+            if dist > distance[key]:
+                continue
+            if is_goal is not None and is_goal(state):
+                return SearchResult(distance, parent, state, key)
+            for neighbour, weight in neighbours(state):
+                neighbour_key = encode(neighbour)
+                if (new_distance := dist + weight) < distance.get(neighbour_key, INFINITY):
+                    distance[neighbour_key] = new_distance
+                    parent[neighbour_key] = key
+                    buckets[new_distance % num_buckets].append((neighbour_key, neighbour))
+                    queued += 1
+        dist += 1
+    return SearchResult(distance, parent)
+
+
+# Bitsets: a set of small non-negative ints is the int with those bits set, so it hashes and compares as one int
+# and union/intersection/difference are ``|``/``&``/``& ~``. `BitSet` numbers names (valves, computers, ...) so
+# that sets of them can be kept that way, the helpers below work on the masks.
+
+
+class BitSet:
+    """Interns names to bits: the sets of the names are then int masks.
+
+    The bits are given out in the order the names are first seen, `mask` turns names into a mask and `names` back.
+    The hot loops can look the single bit masks up in `masks` directly.
+    """
+
+    def __init__(self, names: Iterable = ()):
+        # name -> 1 << its index
+        self.masks: dict = {}
+        self.order: list = []
+        for name in names:
+            self.bit(name)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __contains__(self, name) -> bool:
+        return name in self.masks
+
+    def bit(self, name) -> int:
+        """The mask of the single name, interning it if it's new."""
+        if (mask := self.masks.get(name)) is None:
+            mask = self.masks[name] = 1 << len(self.order)
+            self.order.append(name)
+        return mask
+
+    def index(self, name) -> int:
+        return self.masks[name].bit_length() - 1
+
+    def mask(self, names: Iterable) -> int:
+        mask = 0
+        for name in names:
+            mask |= self.bit(name)
+        return mask
+
+    @property
+    def full(self) -> int:
+        """The mask of all the names interned so far."""
+        return (1 << len(self.order)) - 1
+
+    def names(self, mask: int) -> list:
+        return [self.order[index] for index in iter_bits(mask)]
+
+
+def popcount(mask: int) -> int:
+    return mask.bit_count()
+
+
+def lowest_bit(mask: int) -> int:
+    """The index of the lowest set bit, -1 for an empty mask."""
+    return (mask & -mask).bit_length() - 1
+
+
+def iter_bits(mask: int) -> Iterator[int]:
+    """The indexes of the set bits, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def submasks(mask: int) -> Iterator[int]:
+    """All the subsets of the mask, from the mask itself down to 0."""
+    sub = mask
+    while True:
+        yield sub
+        if not sub:
+            return
+        sub = (sub - 1) & mask
+
+
+def supersets(mask: int, universe: int) -> Iterator[int]:
+    """All the supersets of the mask within the universe, from the universe down to the mask itself."""
+    for extra in submasks(universe & ~mask):
+        yield mask | extra
 
 
 # Klika – podgraf, w którym każde dwa wierzchołki są połączone krawędzią.
@@ -165,42 +936,111 @@ def dijkstra(nodes: Iterable[Node], start: Node, end_nodes: Iterable[Node]) -> d
 # jest największa (najliczniejsza), jeśli nie ma w grafie kliki o większej liczbie wierzchołków.
 # https://en.wikipedia.org/wiki/Clique_(graph_theory)
 # https://en.wikipedia.org/wiki/Bron%E2%80%93Kerbosch_algorithm
-# The recursion is initiated by setting R and X to be the empty set and P to be the vertex set of the graph.
-def bron_kerbosch(r: set[str], p: set[str], x: set[str], graph: dict[str, set[str]]) -> list[set[str]]:
+# The sets of vertexes are int masks (see `BitSet`), `neighbours[v]` is the mask of the neighbours of the vertex v.
+def bron_kerbosch(r: int, p: int, x: int, neighbours: Sequence[int]) -> Iterator[int]:
     """
-    Bron-Kerbosch algorithm to find maximal cliques in an undirected graph.
+    Bron-Kerbosch algorithm with Tomita pivoting: yield the maximal cliques of an undirected graph.
 
-    :param R: Current clique (set of nodes in the clique found so far).
-    :param P: Candidates to extend the clique.
-    :param X: Excluded nodes (nodes that should not be considered for extension).
-    :param graph: The graph as a dictionary where the keys are node identifiers and the values are sets of neighboring nodes.
+    Every maximal clique contains the pivot (the vertex of ``p | x`` with the most neighbours in p) or one of its
+    non-neighbours, so only those are branched on.
+
+    :param r: Current clique (set of nodes in the clique found so far).
+    :param p: Candidates to extend the clique.
+    :param x: Excluded nodes (nodes that should not be considered for extension).
+    :param neighbours: The mask of the neighbours of every vertex.
+    """
+    if not p:
+        if not x:
+            yield r
+        return
+    pivot_neighbours = max((neighbours[u] for u in iter_bits(p | x)), key=lambda mask: (mask & p).bit_count())
+    for vertex in iter_bits(p & ~pivot_neighbours):
+        v = 1 << vertex
+        yield from bron_kerbosch(r | v, p & neighbours[vertex], x & neighbours[vertex], neighbours)
+        p &= ~v
+        x |= v
+
+
+def degeneracy_order(neighbours: Sequence[int]) -> list[int]:
+    """Order the vertexes by repeatedly taking the one with the fewest neighbours among those left.
+
+    Every vertex then has at most d neighbours later in the order, where d (the degeneracy) is small for sparse
+    graphs, so a clique search started from each vertex in turn only ever looks at d candidates.
     """
-    results = []
-    if len(p) == 0 and len(x) == 0:
-        return [r]
-    p, orig_p = set(p), p
-    x = set(x)
-    for vertex in orig_p:  # don't modify while being iterated over
-        v = {vertex}
-        result = bron_kerbosch(r | v, p & graph[vertex], x & graph[vertex], graph=graph)
-        if result:
-            results.extend(result)
-        p -= v
+    degree = [mask.bit_count() for mask in neighbours]
+    queue = [(d, v) for v, d in enumerate(degree)]
+    heapq.heapify(queue)
+    removed = 0
+    order = []
+    while queue:
+        d, v = heapq.heappop(queue)
+        if removed >> v & 1 or d != degree[v]:
+            continue
+        order.append(v)
+        removed |= 1 << v
+        for u in iter_bits(neighbours[v] & ~removed):
+            degree[u] -= 1
+            heapq.heappush(queue, (degree[u], u))
+    return order
+
+
+def maximal_cliques(neighbours: Sequence[int]) -> Iterator[int]:
+    """Yield the maximal cliques (as masks), `bron_kerbosch` from every vertex in the degeneracy order."""
+    p, x = (1 << len(neighbours)) - 1, 0
+    for vertex in degeneracy_order(neighbours):
+        v = 1 << vertex
+        yield from bron_kerbosch(v, p & neighbours[vertex], x & neighbours[vertex], neighbours)
+        p &= ~v
         x |= v
-    return results
 
 
-def find_maximal_cliques(graph):
+def maximum_clique_mask(neighbours: Sequence[int]) -> int:
+    """Return a largest clique (as a mask).
+
+    Branch and bound over the degeneracy order: a branch is dropped as soon as the clique so far plus all its
+    candidates can't beat the best clique found, which cuts off most of the vertexes of a sparse graph right away.
     """
-    Function to initiate Bron-Kerbosch algorithm.
+    best, best_size = 0, 0
+
+    def expand(r: int, size: int, p: int) -> None:
+        nonlocal best, best_size
+        if size > best_size:
+            best, best_size = r, size
+        while p and size + p.bit_count() > best_size:
+            v = p & -p
+            expand(r | v, size + 1, p & neighbours[v.bit_length() - 1])
+            p ^= v
+
+    later = (1 << len(neighbours)) - 1
+    for vertex in degeneracy_order(neighbours):
+        v = 1 << vertex
+        later &= ~v
+        candidates = neighbours[vertex] & later
+        if candidates.bit_count() + 1 > best_size:
+            expand(v, 1, candidates)
+    return best
+
+
+def _clique_graph(graph: dict) -> tuple[BitSet, list[int]]:
+    bits = BitSet(graph)
+    return bits, [bits.mask(graph[node]) for node in bits.order]
+
+
+def find_maximal_cliques(graph: dict) -> Iterator[set]:
+    """
+    Yield the maximal cliques of the graph, see `maximal_cliques`.
 
     :param graph: The graph as a dictionary where the keys are node identifiers and the values are sets of neighboring nodes.
     """
-    P = set(graph.keys())  # All nodes are candidates initially
-    X = set()  # No nodes are excluded initially
-    R = set()  # No nodes in the clique initially
+    bits, neighbours = _clique_graph(graph)
+    for clique in maximal_cliques(neighbours):
+        yield set(bits.names(clique))
 
-    return bron_kerbosch(R, P, X, graph)
+
+def maximum_clique(graph: dict) -> set:
+    """Return a largest clique of the graph (given as for `find_maximal_cliques`), see `maximum_clique_mask`."""
+    bits, neighbours = _clique_graph(graph)
+    return set(bits.names(maximum_clique_mask(neighbours)))
 
 
 def range_intersection(range_a: tuple[int, int], range_b: tuple[int, int]):
@@ -248,3 +1088,548 @@ def range_intersection(range_a: tuple[int, int], range_b: tuple[int, int]):
         after = None
 
     return before, intersection, after
+
+
+class RuntimeProfile(NamedTuple):
+    """How the garbage collector is set up inside `runtime_profile`."""
+
+    # `gc.set_threshold` arguments, None keeps the current ones
+    threshold: tuple[int, int, int] | None
+    # move everything allocated so far (the parsed input) to the permanent generation, so collections skip it
+    freeze: bool
+    enabled: bool = True
+
+
+RUNTIME_PROFILES = {
+    # searches and simulations allocating lots of objects that mostly live until the end: a young collection every
+    # 250k allocations instead of 700, so that it's the rare short pause instead of the constant overhead. gen1 and
+    # gen2 count the collections of the generation below them: 50 of each keeps the older generations (which only
+    # grow in these days) collected a few times per run, the full collections are also held back by CPython until
+    # the long lived objects grew by a quarter
+    "search": RuntimeProfile(threshold=(250_000, 50, 50), freeze=True),
+    # building a big acyclic structure in one go: no collections at all until the end of the ``with``
+    "build": RuntimeProfile(threshold=None, freeze=True, enabled=False),
+}
+
+
+@dataclass
+class GcPauses:
+    """Garbage collections seen by `record_gc_pauses`."""
+
+    collections: int = 0
+    # in seconds
+    total: float = 0.0
+    longest: float = 0.0
+    _started: float | None = field(default=None, repr=False)
+
+    def callback(self, phase: str, info: dict) -> None:
+        if phase == "start":
+            self._started = time.perf_counter()
+        elif self._started is not None:
+            pause = time.perf_counter() - self._started
+            self._started = None
+            self.collections += 1
+            self.total += pause
+            self.longest = max(self.longest, pause)
+
+
+@contextlib.contextmanager
+def record_gc_pauses():
+    """Yield a `GcPauses` counting the collections (through `gc.callbacks`) that happen inside the ``with``."""
+    pauses = GcPauses()
+    gc.callbacks.append(pauses.callback)
+    try:
+        yield pauses
+    finally:
+        gc.callbacks.remove(pauses.callback)
+
+
+@contextlib.contextmanager
+def runtime_profile(name: str = "search"):
+    """Set the garbage collector up for the body of the ``with`` (see `RUNTIME_PROFILES`), restore it afterwards.
+
+    Enter it after parsing the input, so that a freezing profile freezes the parsed data. Yields the `GcPauses` of
+    the body.
+    """
+    profile = RUNTIME_PROFILES[name]
+    threshold, enabled = gc.get_threshold(), gc.isenabled()
+    # an outer profile's freeze is its to undo
+    freeze = profile.freeze and gc.get_freeze_count() == 0
+    if freeze:
+        gc.freeze()
+    if profile.threshold is not None:
+        gc.set_threshold(*profile.threshold)
+    if not profile.enabled:
+        gc.disable()
+    try:
+        with record_gc_pauses() as pauses:
+            yield pauses
+    finally:
+        gc.set_threshold(*threshold)
+        if enabled:
+            gc.enable()
+        if freeze:
+            gc.unfreeze()
+
+
+@dataclass
+class MemoStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: int = 0
+    # the most entries held at once since the stats were reset (caches are often cleared before they're looked at)
+    peak_entries: int = 0
+    # estimated from the size of the first cached entry, see `Memo`
+    approximate_bytes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        calls = self.hits + self.misses
+        return self.hits / calls if calls else 0.0
+
+
+def _deep_sizeof(value, depth: int = 4) -> int:
+    if isinstance(value, int) and -5 <= value <= 256 or isinstance(value, tuple) and not value or value is None:
+        # shared by everyone
+        return 0
+    size = sys.getsizeof(value)
+    if depth and isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(_deep_sizeof(item, depth - 1) for item in value)
+    elif depth and isinstance(value, dict):
+        size += sum(_deep_sizeof(k, depth - 1) + _deep_sizeof(v, depth - 1) for k, v in value.items())
+    return size
+
+
+# the cost of a dict slot (hash, key and value pointers) plus the slack of a table that grows by doubling
+_DICT_ENTRY_OVERHEAD = 72
+
+
+# when the size of the physical memory can't be found out
+FALLBACK_PHYSICAL_MEMORY = 4 * 1024**3
+# how many parts run side by side, each in a process of its own (set by the runner in its workers): they share the
+# memory, see `memory_budget`
+CONCURRENT_PARTS = 1
+
+
+def physical_memory() -> int:
+    """The size of the physical memory in bytes (`FALLBACK_PHYSICAL_MEMORY` where ``sysconf`` can't tell)."""
+    try:
+        return os.sysconf("SC_PHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (AttributeError, ValueError, OSError):
+        return FALLBACK_PHYSICAL_MEMORY
+
+
+def memory_budget(fraction: float) -> Callable[[], int]:
+    """A `memoize` ``max_bytes`` of `fraction` of the physical memory, looked up only when the cache is used.
+
+    The parts running at the same time (`CONCURRENT_PARTS`) get an equal share of it each.
+    """
+    return lambda: int(physical_memory() * fraction) // max(1, CONCURRENT_PARTS)
+
+
+class Memo:
+    """The caches and counters behind a `memoize`d function, available as its ``memo`` attribute.
+
+    With ``context=True`` the first argument is the context (a blueprint, a set of patterns...): every context gets
+    its own cache keyed by the remaining arguments, so a solver can pass its input down the recursion instead of
+    storing it in a module global, and can drop a context's cache with `cache_clear(context)` when it's done.
+
+    `max_bytes` bounds the (estimated) memory used by the cached entries. Rather than measuring every entry, the size
+    of an entry (following containers a few levels deep) is sampled each time the number of entries doubles and the
+    average is used for all of them. When the budget is exceeded the oldest quarter of the entries of the cache that is
+    being written to is dropped. `max_bytes` can also be a function returning the budget (e.g. `memory_budget`),
+    called each time the size is resampled. `max_entries` is a plain bound on the number of entries.
+    """
+
+    __slots__ = (
+        "caches",
+        "max_bytes",
+        "max_entries",
+        "limit",
+        "entry_size",
+        "samples",
+        "entries",
+        "peak_entries",
+        "hits",
+        "misses",
+        "evictions",
+    )
+
+    def __init__(self, max_bytes: int | Callable[[], int] | None = None, max_entries: int | None = None):
+        self.caches: dict = {}
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.limit = max_entries
+        self.entry_size = self.samples = 0
+        self.entries = self.peak_entries = 0
+        self.hits = self.misses = self.evictions = 0
+
+    def added(self, cache: dict, key, value) -> None:
+        """Account for a new entry (called by the wrapper on a miss)."""
+        self.entries += 1
+        if not self.entries & (self.entries - 1):
+            # resample the entry size whenever the number of entries doubles
+            self.samples += 1
+            size = _deep_sizeof(key) + _deep_sizeof(value) + _DICT_ENTRY_OVERHEAD
+            self.entry_size += (size - self.entry_size) // self.samples
+            if self.max_bytes is not None:
+                max_bytes = self.max_bytes() if callable(self.max_bytes) else self.max_bytes
+                by_size = max(1, max_bytes // self.entry_size)
+                self.limit = by_size if self.max_entries is None else min(by_size, self.max_entries)
+        if self.limit is not None and self.entries > self.limit:
+            self.evict(cache)
+
+    def evict(self, cache: dict) -> None:
+        """Drop the oldest quarter of `cache`, in place: a copy of the rest would need memory just when it's short."""
+        self.peak_entries = max(self.peak_entries, self.entries)
+        drop = max(1, len(cache) // 4)
+        for key in list(itertools.islice(cache, drop)):
+            del cache[key]
+        self.entries -= drop
+        self.evictions += drop
+
+    def cache_clear(self, *context) -> None:
+        """Forget everything, or only the given context's cache."""
+        self.peak_entries = max(self.peak_entries, self.entries)
+        if context:
+            self.entries -= len(self.caches.pop(context[0], ()))
+        else:
+            # the wrapper of a function without a context holds on to its only cache, so it's emptied in place
+            shared = self.caches.get(None)
+            for cache in self.caches.values():
+                cache.clear()
+            self.caches.clear()
+            if shared is not None:
+                self.caches[None] = shared
+            self.entries = 0
+            self.entry_size = self.samples = 0
+            self.limit = self.max_entries
+
+    def reset_stats(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+        self.peak_entries = self.entries
+
+    def stats(self) -> MemoStats:
+        return MemoStats(
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+            entries=self.entries,
+            peak_entries=max(self.peak_entries, self.entries),
+            approximate_bytes=self.entries * self.entry_size,
+        )
+
+
+_MISSING = object()
+
+
+def memoize(
+    function=None,
+    *,
+    context: bool = False,
+    max_bytes: int | Callable[[], int] | None = None,
+    max_entries: int | None = None,
+):
+    """Memoize a function of hashable positional arguments, see `Memo` for the options.
+
+    Usable both as ``@memoize`` and ``@memoize(context=True, max_bytes=...)``. The wrapper has the `Memo` as its
+    ``memo`` attribute, and its ``stats()``, ``cache_clear()`` and ``reset_stats()`` methods.
+    """
+    if function is None:
+        return functools.partial(memoize, context=context, max_bytes=max_bytes, max_entries=max_entries)
+    memo = Memo(max_bytes, max_entries)
+    caches = memo.caches
+
+    # the lookups are inlined in two variants, this wrapper is on the hot path of every memoized recursion
+    if context:
+
+        def wrapper(context_key, *key):
+            cache = caches.get(context_key)
+            if cache is None:
+                cache = caches[context_key] = {}
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                memo.hits += 1
+                return value
+            memo.misses += 1
+            value = function(context_key, *key)
+            size = len(cache)
+            cache[key] = value
+            if len(cache) != size:
+                # the recursion might have cached the same key already
+                memo.added(cache, key, value)
+            return value
+
+    else:
+        cache = caches[None] = {}
+
+        def wrapper(*key):
+            value = cache.get(key, _MISSING)
+            if value is not _MISSING:
+                memo.hits += 1
+                return value
+            memo.misses += 1
+            value = function(*key)
+            size = len(cache)
+            cache[key] = value
+            if len(cache) != size:
+                memo.added(cache, key, value)
+            return value
+
+    functools.update_wrapper(wrapper, function)
+    wrapper.memo = memo
+    wrapper.stats = memo.stats
+    wrapper.cache_clear = memo.cache_clear
+    wrapper.reset_stats = memo.reset_stats
+    return wrapper
+
+
+class Cycle(NamedTuple):
+    # the number of steps before the states start repeating
+    start: int
+    period: int
+
+
+class FastForward(NamedTuple):
+    # a state with the same fingerprint as the state after the requested number of steps
+    state: object
+    # the metric of the state after the requested number of steps, None without a metric
+    value: object
+    # None when the target is reached before a cycle is found
+    cycle: Cycle | None
+
+
+def find_cycle(
+    start: Callable[[], State],
+    step: Callable[[State], State],
+    fingerprint: Callable[[State], object] | None = None,
+    limit: int | None = None,
+) -> Cycle | None:
+    """Find the cycle of a simulation with Brent's algorithm, which keeps just two fingerprints in memory.
+
+    `start` returns the initial state (it's called several times and must return a fresh, equal state each time) and
+    `step` returns the next state, it may modify and return its argument. `fingerprint` has to capture everything
+    that determines the future of the simulation and return a value that isn't modified later (by default the state
+    itself is used, which then must not be modified in place). Returns None if no cycle was found in `limit` steps.
+    """
+    fingerprint = fingerprint or (lambda state: state)
+
+    # phase 1: find the period - the hare goes ahead, the tortoise jumps to it whenever the distance doubles
+    state = start()
+    tortoise = fingerprint(state)
+    state = step(state)
+    hare_steps = power = period = 1
+    while tortoise != (hare := fingerprint(state)):
+        if hare_steps == limit:
+            return None
+        if power == period:
+            tortoise = hare
+            power *= 2
+            period = 0
+        state = step(state)
+        hare_steps += 1
+        period += 1
+
+    # phase 2: find where the cycle starts - two states a period apart advance until they match
+    tortoise_state = start()
+    hare_state = start()
+    for _ in range(period):
+        hare_state = step(hare_state)
+    cycle_start = 0
+    while fingerprint(tortoise_state) != fingerprint(hare_state):
+        tortoise_state = step(tortoise_state)
+        hare_state = step(hare_state)
+        cycle_start += 1
+    return Cycle(cycle_start, period)
+
+
+def fast_forward(
+    start: Callable[[], State],
+    step: Callable[[State], State],
+    steps: int,
+    fingerprint: Callable[[State], object] | None = None,
+    metric: Callable[[State], int] | None = None,
+) -> FastForward:
+    """Return the state (and a metric of it) after `steps` steps of a simulation that eventually cycles.
+
+    The arguments are the same as for `find_cycle`. Once the cycle is known, the simulation jumps over as many
+    whole periods as it can. The metric at the target is extrapolated from its values at the start of the cycle and
+    one period later, which is exact both for metrics that repeat (the load on a platform) and for ones that grow by
+    the same amount every period (the height of a tower).
+    """
+    cycle = find_cycle(start, step, fingerprint, limit=steps)
+    state = start()
+    if cycle is None or steps < cycle.start + cycle.period:
+        for _ in range(steps):
+            state = step(state)
+        return FastForward(state, metric(state) if metric else None, cycle)
+
+    for _ in range(cycle.start):
+        state = step(state)
+    before = metric(state) if metric else 0
+    for _ in range(cycle.period):
+        state = step(state)
+    growth = metric(state) - before if metric else 0
+    # the state is a period into the cycle now
+    periods, remainder = divmod(steps - cycle.start, cycle.period)
+    for _ in range(remainder):
+        state = step(state)
+    return FastForward(state, metric(state) + (periods - 1) * growth if metric else None, cycle)
+
+
+class IntervalSet:
+    """A set of integers stored as sorted, disjoint, non-adjacent half-open intervals ``[start, stop)``.
+
+    The intervals are coalesced on construction (sorting them once, so building from k intervals is O(k log k)) and
+    every operation returns a new, again coalesced, set. Use `from_ranges` for ``(start, length)`` pairs like the
+    ones of `range_intersection`.
+    """
+
+    __slots__ = ("intervals",)
+
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()):
+        coalesced = []
+        for start, stop in sorted(intervals):
+            if start >= stop:
+                continue
+            if coalesced and start <= coalesced[-1][1]:
+                if stop > coalesced[-1][1]:
+                    coalesced[-1] = (coalesced[-1][0], stop)
+            else:
+                coalesced.append((start, stop))
+        self.intervals: list[tuple[int, int]] = coalesced
+
+    @classmethod
+    def _coalesced(cls, intervals: list[tuple[int, int]]) -> "IntervalSet":
+        """Wrap intervals that are already sorted and coalesced."""
+        interval_set = cls.__new__(cls)
+        interval_set.intervals = intervals
+        return interval_set
+
+    @classmethod
+    def from_ranges(cls, ranges: Iterable[tuple[int, int]]) -> "IntervalSet":
+        return cls((start, start + length) for start, length in ranges)
+
+    def to_ranges(self) -> list[tuple[int, int]]:
+        return [(start, stop - start) for start, stop in self.intervals]
+
+    def __iter__(self):
+        return iter(self.intervals)
+
+    def __bool__(self) -> bool:
+        return bool(self.intervals)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return self.intervals == other.intervals
+
+    def __repr__(self) -> str:
+        return f"IntervalSet({self.intervals})"
+
+    def __contains__(self, value: int) -> bool:
+        idx = bisect.bisect_right(self.intervals, (value, math.inf)) - 1
+        return idx >= 0 and value < self.intervals[idx][1]
+
+    def size(self) -> int:
+        """The number of integers in the set."""
+        return sum(stop - start for start, stop in self.intervals)
+
+    def min(self) -> int:
+        return self.intervals[0][0]
+
+    def max(self) -> int:
+        return self.intervals[-1][1] - 1
+
+    def __or__(self, other: "IntervalSet") -> "IntervalSet":
+        # both sides are sorted runs, which sorted() merges in linear time
+        return IntervalSet(self.intervals + other.intervals)
+
+    def __and__(self, other: "IntervalSet") -> "IntervalSet":
+        result = []
+        a, b = self.intervals, other.intervals
+        i = j = 0
+        while i < len(a) and j < len(b):
+            start = max(a[i][0], b[j][0])
+            stop = min(a[i][1], b[j][1])
+            if start < stop:
+                result.append((start, stop))
+            # move past the interval that ends first
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return IntervalSet._coalesced(result)
+
+    def __sub__(self, other: "IntervalSet") -> "IntervalSet":
+        result = []
+        b = other.intervals
+        j = 0
+        for start, stop in self.intervals:
+            # skip the intervals of `other` that end before this one starts
+            while j < len(b) and b[j][1] <= start:
+                j += 1
+            k = j
+            while k < len(b) and b[k][0] < stop:
+                if b[k][0] > start:
+                    result.append((start, b[k][0]))
+                start = max(start, b[k][1])
+                k += 1
+            if start < stop:
+                result.append((start, stop))
+        return IntervalSet._coalesced(result)
+
+    def complement(self, start: int, stop: int) -> "IntervalSet":
+        """The integers of ``[start, stop)`` that aren't in the set."""
+        return IntervalSet._coalesced([(start, stop)] if start < stop else []) - self
+
+    def shift(self, offset: int) -> "IntervalSet":
+        return IntervalSet._coalesced([(start + offset, stop + offset) for start, stop in self.intervals])
+
+
+class IntervalMap:
+    """A piecewise-linear mapping of integers: ``[start, stop)`` is shifted by ``offset``, everything else is kept.
+
+    The pieces mustn't overlap. `map` pushes a whole `IntervalSet` through the mapping at once, splitting its
+    intervals at the boundaries of the pieces.
+    """
+
+    __slots__ = ("pieces", "starts")
+
+    def __init__(self, pieces: Iterable[tuple[int, int, int]] = ()):
+        """:param pieces: ``(start, stop, offset)`` triples."""
+        self.pieces = sorted(pieces)
+        self.starts = [start for start, _, _ in self.pieces]
+        for (_, stop, _), (next_start, _, _) in zip(self.pieces, self.pieces[1:]):
+            assert stop <= next_start, "the pieces of an IntervalMap can't overlap"
+
+    def __getitem__(self, value: int) -> int:
+        idx = bisect.bisect_right(self.starts, value) - 1
+        if idx >= 0 and value < self.pieces[idx][1]:
+            return value + self.pieces[idx][2]
+        return value
+
+    def map(self, intervals: IntervalSet) -> IntervalSet:
+        mapped = []
+        pieces = self.pieces
+        for start, stop in intervals:
+            idx = max(bisect.bisect_right(self.starts, start) - 1, 0)
+            while start < stop:
+                if idx < len(pieces) and pieces[idx][1] <= start:
+                    idx += 1
+                    continue
+                if idx == len(pieces) or stop <= pieces[idx][0]:
+                    # no more pieces under the interval
+                    mapped.append((start, stop))
+                    break
+                piece_start, piece_stop, offset = pieces[idx]
+                if start < piece_start:
+                    # the gap before the piece maps to itself
+                    mapped.append((start, piece_start))
+                    start = piece_start
+                end = min(stop, piece_stop)
+                mapped.append((start + offset, end + offset))
+                start = end
+                idx += 1
+        return IntervalSet(mapped)
@@ -1,6 +1,58 @@
+import functools
+import gc
+import io
+import itertools
+import random
+
 import pytest
 
-from utils import range_intersection
+from utils import (
+    OFFSETS4,
+    OFFSETS8,
+    INFINITY,
+    NO_PARENT,
+    BitSet,
+    Graph,
+    Grid,
+    IntervalMap,
+    IntervalSet,
+    MutablePoint,
+    Point,
+    UnionFind,
+    VoxelGrid,
+    astar_search,
+    blocks,
+    degeneracy_order,
+    dial_search,
+    dijkstra_search,
+    fast_forward,
+    find_cycle,
+    find_maximal_cliques,
+    ints,
+    iter_bits,
+    lowest_bit,
+    maximal_cliques,
+    maximum_clique,
+    maximum_clique_mask,
+    memoize,
+    memory_budget,
+    physical_memory,
+    range_intersection,
+    read_grid,
+    read_input,
+    record_gc_pauses,
+    runtime_profile,
+    bounding_box,
+    neighbours,
+    pack,
+    pack_offset,
+    popcount,
+    shifted,
+    submasks,
+    supersets,
+    unpack,
+    zero_one_bfs,
+)
 
 
 @pytest.mark.parametrize(
@@ -23,3 +75,446 @@ from utils import range_intersection
 )
 def test_range_intersection(range_a, range_b, expected):
     assert expected == range_intersection(range_a, range_b)
+
+
+def test_interval_set_coalesces():
+    intervals = IntervalSet([(5, 8), (0, 2), (2, 3), (7, 10), (12, 12)])
+    assert list(intervals) == [(0, 3), (5, 10)]
+    assert intervals.size() == 8
+    assert IntervalSet.from_ranges([(5, 3), (0, 3)]).to_ranges() == [(0, 3), (5, 3)]
+    assert [x for x in range(-1, 12) if x in intervals] == [0, 1, 2, 5, 6, 7, 8, 9]
+
+
+def test_interval_set_operations():
+    a = IntervalSet([(0, 10), (20, 30)])
+    b = IntervalSet([(5, 25), (40, 45)])
+    assert list(a | b) == [(0, 30), (40, 45)]
+    assert list(a & b) == [(5, 10), (20, 25)]
+    assert list(a - b) == [(0, 5), (25, 30)]
+    assert list(b - a) == [(10, 20), (40, 45)]
+    assert list(a.complement(-5, 35)) == [(-5, 0), (10, 20), (30, 35)]
+    assert list(a.shift(-3)) == [(-3, 7), (17, 27)]
+    assert not a & IntervalSet([(10, 20)])
+
+
+def test_interval_map():
+    # the 2023/05 sample's seed-to-soil map
+    mapping = IntervalMap([(98, 100, -48), (50, 98, 2)])
+    assert [mapping[x] for x in (0, 50, 97, 98, 99, 100)] == [0, 52, 99, 50, 51, 100]
+    assert list(mapping.map(IntervalSet([(40, 60), (95, 105)]))) == [(40, 62), (97, 105)]
+
+
+def make_test_graph() -> Graph:
+    # 0 -1-> 1 -1-> 2 -1-> 3, 0 -5-> 3, 4 is unreachable
+    return Graph.from_edges(5, ((0, 1, 1), (1, 2, 1), (2, 3, 1), (0, 3, 5), (4, 0, 1)))
+
+
+def test_graph_csr_layout():
+    graph = make_test_graph()
+    assert graph.num_nodes == 5
+    assert graph.num_edges == 5
+    assert list(graph.offsets) == [0, 2, 3, 4, 4, 5]
+    assert list(graph.edges_from(0)) == [(1, 1), (3, 5)]
+    assert list(graph.edges_from(3)) == []
+    assert list(graph.reversed().edges_from(0)) == [(4, 1)]
+
+
+def test_dijkstra():
+    paths = make_test_graph().dijkstra([0])
+    assert list(paths.distance) == [0, 1, 2, 3, INFINITY]
+    assert paths.path_to(3) == [0, 1, 2, 3]
+    assert paths.path_to(4) == []
+    assert paths.parent[0] == NO_PARENT
+
+
+def test_dijkstra_stops_at_targets():
+    graph = make_test_graph()
+    paths = graph.dijkstra([0], targets=[1])
+    assert paths.distance[1] == 1
+    # 3 was only seen through the direct, more expensive edge
+    assert paths.distance[3] == 5
+    paths = graph.dijkstra([0], targets=[3, 2], all_targets=False)
+    assert paths.distance[2] == 2
+    assert not paths.reached(4)
+
+
+def test_dijkstra_multiple_sources():
+    paths = make_test_graph().dijkstra([4, 2])
+    assert list(paths.distance) == [1, 2, 0, 1, 0]
+    assert paths.path_to(1) == [4, 0, 1]
+
+
+LINE_LENGTH = 10
+
+
+def line_neighbours(state: int):
+    """States are positions on a line, going right costs 1 and jumping two to the right costs 0 from even ones."""
+    if state + 1 < LINE_LENGTH:
+        yield state + 1, 1
+    if state % 2 == 0 and state + 2 < LINE_LENGTH:
+        yield state + 2, 0
+
+
+@pytest.mark.parametrize(
+    "search",
+    (
+        dijkstra_search,
+        zero_one_bfs,
+        functools.partial(dial_search, max_weight=1),
+        functools.partial(astar_search, heuristic=lambda state: 0),
+    ),
+)
+def test_lazy_searches(search):
+    result = search([0], line_neighbours, encode=lambda state: state, is_goal=lambda state: state == 9)
+    assert result.goal == 9
+    assert result.cost == 1
+    assert result.path_to(9) == [0, 2, 4, 6, 8, 9]
+    assert result.path_to(123) == []
+
+
+@pytest.mark.parametrize("search", (dijkstra_search, zero_one_bfs, functools.partial(dial_search, max_weight=1)))
+def test_lazy_searches_without_goal(search):
+    result = search([1, 5], line_neighbours, encode=lambda state: state * 100)
+    assert result.goal is None
+    assert result.distance == {100: 0, 200: 1, 300: 2, 400: 1, 500: 0, 600: 1, 700: 2, 800: 1, 900: 2}
+    assert result.path_to(900) == [500, 600, 800, 900]
+
+
+def test_dial_search_buckets_wrap_around():
+    def neighbours(state):
+        if state < 20:
+            yield state + 1, 7
+            yield state + 3, 3
+
+    result = dial_search([0], neighbours, encode=int, max_weight=7, is_goal=lambda state: state == 20)
+    assert result.cost == 3 * 6 + 7 * 2
+
+
+def test_astar_search_with_heuristic():
+    def neighbours(state):
+        x, y = state
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if 0 <= nx < 5 and 0 <= ny < 5 and (nx, ny) != (2, 1):
+                yield (nx, ny), 1
+
+    result = astar_search(
+        [(2, 0)],
+        neighbours,
+        encode=lambda state: state[1] * 5 + state[0],
+        is_goal=lambda state: state == (2, 2),
+        heuristic=lambda state: abs(state[0] - 2) + abs(state[1] - 2),
+    )
+    assert result.cost == 4
+
+
+GRID_LINES = ["#.S", "..#", "", "S.."]
+
+
+def test_grid_from_lines():
+    grid = Grid.from_lines(GRID_LINES)
+    assert (grid.width, grid.height) == (3, 3)
+    assert grid.rows() == ["#.S", "..#", "S.."]
+    assert grid[2, 0] == "S"
+    assert grid.column(0) == b"#.S"
+    assert grid.find_all("S") == [grid.index(2, 0), grid.index(0, 2)]
+    assert grid.coordinates(grid.find("#")) == (0, 0)
+    assert grid.find("x") is None
+
+
+def test_grid_from_bytes_matches_from_lines():
+    grid = read_grid("\n".join(GRID_LINES).encode() + b"\n", border="~")
+    expected = Grid.from_lines(GRID_LINES, border="~")
+    assert (grid.width, grid.height, grid.cells) == (expected.width, expected.height, expected.cells)
+    assert grid.offsets8 == expected.offsets8
+
+
+def test_grid_neighbours_stop_at_the_border():
+    grid = Grid.from_lines(GRID_LINES)
+    corner = grid.index(0, 0)
+    assert [grid.cells[corner + offset] for offset in grid.offsets4] == [0, ord("."), ord("."), 0]
+    assert [grid.inside(corner + offset) for offset in grid.offsets8].count(True) == 3
+
+
+def test_grid_snapshot_copies_on_write():
+    grid = Grid.from_lines(GRID_LINES)
+    snapshot = grid.snapshot()
+    assert snapshot == grid and snapshot.cells is grid.cells
+    snapshot[1, 1] = "O"
+    assert grid[1, 1] == "."
+    grid.set(grid.index(0, 0), ord("."))
+    assert snapshot[0, 0] == "#"
+
+
+def test_grid_transpose_and_rotate():
+    grid = Grid.from_lines(["ab", "cd", "ef"])
+    assert grid.transpose().rows() == ["ace", "bdf"]
+    assert grid.rotate().rows() == ["eca", "fdb"]
+    assert grid.rotate().rotate().rotate().rotate() == grid
+
+
+def test_union_find():
+    sets = UnionFind(6)
+    assert sets.union(0, 1) and sets.union(2, 3) and sets.union(1, 3)
+    assert not sets.union(0, 2)
+    assert sets.connected(0, 3) and not sets.connected(0, 4)
+    assert sets.set_size(2) == 4 and sets.set_size(5) == 1
+
+
+def test_grid_components():
+    grid = Grid.from_lines(["AAAA", "BBCD", "BBCC", "EEEC"])
+    components = grid.components()
+    assert [chr(grid.cells[cell]) for cell in components.first_cells] == ["A", "B", "C", "D", "E"]
+    assert components.sizes == [4, 4, 4, 1, 3]
+    assert components.boundaries == [10, 8, 10, 4, 8]
+    assert components.labels[grid.index(3, 3)] == components.labels[grid.index(2, 1)] == 2
+    assert components.labels[0] == -1
+
+
+def test_voxel_grid_components():
+    voxels = VoxelGrid(3, 3, 3)
+    for xyz in [(x, y, z) for x in range(3) for y in range(3) for z in range(3) if (x, y, z) != (1, 1, 1)]:
+        voxels[xyz] = "#"
+    components = voxels.components()
+    # a hollow cube: one pocket of air inside the lava
+    assert components.sizes == [26, 1]
+    assert components.boundaries == [54 + 6, 6]
+    assert voxels.coordinates(components.first_cells[1]) == (1, 1, 1)
+
+
+@pytest.mark.parametrize(("x", "y"), ((0, 0), (5, 7), (-3, 2), (100, -4000)))
+def test_pack_round_trip(x, y):
+    assert unpack(pack(x, y)) == Point(x, y)
+    assert Point(x, y).pack() == pack(x, y)
+    assert unpack(pack(x, y) + pack_offset(-2, 3)) == Point(x - 2, y + 3)
+
+
+def test_packed_neighbours():
+    centre = pack(0, 0)
+    assert [unpack(key) for key in neighbours(centre)] == [(0, -1), (1, 0), (0, 1), (-1, 0)]
+    assert len(set(neighbours(centre, OFFSETS8))) == 8
+    assert set(OFFSETS4) < set(OFFSETS8)
+    assert shifted({pack(1, 1), pack(2, 3)}, pack_offset(-1, -1)) == {pack(0, 0), pack(1, 2)}
+    assert bounding_box([pack(3, -1), pack(-2, 4), pack(0, 0)]) == (Point(-2, -1), Point(3, 4))
+
+
+def test_bitset_interning():
+    bits = BitSet(["AA", "BB"])
+    assert bits.bit("CC") == 0b100
+    assert bits.bit("AA") == 0b1
+    assert bits.index("CC") == 2 and "CC" in bits and "DD" not in bits
+    assert bits.mask(["CC", "AA"]) == 0b101
+    assert bits.names(0b110) == ["BB", "CC"]
+    assert bits.full == 0b111 and len(bits) == 3
+
+
+def test_bit_helpers():
+    assert popcount(0b10110) == 3
+    assert lowest_bit(0b10100) == 2
+    assert lowest_bit(0) == -1
+    assert list(iter_bits(0b10110)) == [1, 2, 4]
+    assert list(iter_bits(1 << 100)) == [100]
+    assert list(submasks(0b101)) == [0b101, 0b100, 0b001, 0]
+    assert list(submasks(0)) == [0]
+    assert sorted(supersets(0b001, 0b111)) == [0b001, 0b011, 0b101, 0b111]
+
+
+def test_find_maximal_cliques():
+    edges = ["ab", "ac", "bc", "bd", "cd", "de"]
+    graph = {}
+    for a, b in edges:
+        graph.setdefault(a, set()).add(b)
+        graph.setdefault(b, set()).add(a)
+    cliques = sorted("".join(sorted(clique)) for clique in find_maximal_cliques(graph))
+    assert cliques == ["abc", "bcd", "de"]
+    assert maximum_clique(graph) in ({"a", "b", "c"}, {"b", "c", "d"})
+
+
+def test_cliques_of_random_graphs():
+    rng = random.Random(23)
+    for n in range(1, 12):
+        neighbours = [0] * n
+        for a, b in itertools.combinations(range(n), 2):
+            if rng.random() < 0.6:
+                neighbours[a] |= 1 << b
+                neighbours[b] |= 1 << a
+        assert sorted(degeneracy_order(neighbours)) == list(range(n))
+        # brute force: the subsets in which every vertex neighbours all the others
+        cliques = [
+            mask
+            for mask in range(1, 1 << n)
+            if all(mask & ~(1 << v) & ~neighbours[v] == 0 for v in range(n) if mask >> v & 1)
+        ]
+        maximal = {c for c in cliques if not any(other != c and other & c == c for other in cliques)}
+        assert sorted(maximal_cliques(neighbours)) == sorted(maximal)
+        assert maximum_clique_mask(neighbours).bit_count() == max(c.bit_count() for c in cliques)
+
+
+def test_point_equality():
+    assert Point(1, 2) == MutablePoint(1, 2)
+    assert MutablePoint(1, 2) == Point(1, 2)
+    assert Point(1, 2) != MutablePoint(2, 1)
+    assert MutablePoint(1, 2).freeze() in {Point(1, 2)}
+
+
+def test_memoize_keeps_a_cache_per_context():
+    calls = []
+
+    @memoize(context=True)
+    def count_ways(coins, amount):
+        calls.append((coins, amount))
+        if amount == 0:
+            return 1
+        return sum(count_ways(coins, amount - coin) for coin in coins if coin <= amount)
+
+    assert count_ways((1, 2), 4) == 5
+    assert count_ways((1, 3), 4) == 3
+    calls_before = len(calls)
+    assert count_ways((1, 2), 4) == 5
+    assert len(calls) == calls_before
+    stats = count_ways.stats()
+    assert stats.entries == stats.misses == 10
+    count_ways.cache_clear((1, 2))
+    assert count_ways.stats().entries == 5
+
+
+def test_memoize_evicts_over_budget():
+    @memoize(max_entries=100)
+    def identity(n):
+        return n
+
+    for n in range(1000):
+        assert identity(n) == n
+    stats = identity.stats()
+    assert stats.entries <= 100
+    assert stats.evictions == 1000 - stats.entries
+    # the newest entries are kept
+    identity.reset_stats()
+    identity(999)
+    assert identity.stats().hits == 1
+    identity.cache_clear()
+    identity(999)
+    assert identity.stats().misses == 1
+    assert identity.stats().entries == 1
+
+
+def test_memoize_memory_budget():
+    @memoize(max_bytes=100_000)
+    def square(n):
+        return n * n
+
+    for n in range(100_000):
+        square(n)
+    assert 0 < square.stats().approximate_bytes <= 100_000
+
+
+def test_memoize_evicts_the_oldest_entries():
+    @memoize(max_bytes=lambda: 100_000)
+    def square(n):
+        return n * n
+
+    for n in range(100_000):
+        square(n)
+    (cache,) = square.memo.caches.values()
+    assert (99_999,) in cache and (0,) not in cache
+    assert list(cache) == sorted(cache)
+    assert 0 < memory_budget(0.5)() <= physical_memory()
+
+
+def squares(x):
+    return (x * x + 1) % 255
+
+
+def test_find_cycle():
+    # 3, 10, 101, 2, 5, 26, 167, 95, 101, ...
+    assert find_cycle(lambda: 3, squares) == (2, 6)
+    assert find_cycle(lambda: 3, squares, limit=5) is None
+
+
+@pytest.mark.parametrize(
+    ("steps", "equivalent_steps"), ((0, 0), (1, 1), (7, 7), (8, 8), (9, 9), (100, 2 + 98 % 6), (10**12, 2 + 2))
+)
+def test_fast_forward_state(steps, equivalent_steps):
+    expected = 3
+    for _ in range(equivalent_steps):
+        expected = squares(expected)
+    assert fast_forward(lambda: 3, squares, steps).state == expected
+
+
+def test_fast_forward_extrapolates_growing_metric():
+    def step(state):
+        # may modify the state in place
+        state[1] += state[0]
+        state[0] = squares(state[0])
+        return state
+
+    def total(steps):
+        state = [3, 0]
+        for _ in range(steps):
+            step(state)
+        return state[1]
+
+    for steps in (5, 50, 555):
+        result = fast_forward(lambda: [3, 0], step, steps, fingerprint=lambda state: state[0], metric=lambda s: s[1])
+        assert result.value == total(steps)
+    assert fast_forward(lambda: [3, 0], step, 10**9, lambda state: state[0], lambda s: s[1]).cycle == (2, 6)
+
+
+@pytest.mark.parametrize(
+    ("data", "signed", "expected"),
+    (
+        (b"Sensor at x=-2, y=18: closest beacon is at x=-2, y=15", True, [-2, 18, -2, 15]),
+        (b"2-4,6-8\n", True, [2, 4, 6, 8]),
+        (b"a - 3 -\n-4", True, [3, -4]),
+        (b"p=0,4 v=3,-3", False, [0, 4, 3, 3]),
+        (b"", True, []),
+    ),
+)
+def test_ints(data, signed, expected):
+    assert ints(data, signed=signed).tolist() == expected
+
+
+def test_read_input_and_blocks(tmp_path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"1,2 # three\n\n\n4\n  \n5,-6\n")
+    assert read_input(path) == read_input(io.StringIO(path.read_text())) == path.read_bytes()
+    with open(path) as text_file:
+        mapped = read_input(text_file, use_mmap=True)
+        assert ints(mapped).tolist() == [1, 2, 4, 5, -6]
+        mapped.close()
+    assert ints(read_input(path, comment=b"#")).tolist() == [1, 2, 4, 5, -6]
+    assert blocks(read_input(path, comment=b"#")) == [b"1,2", b"4", b"5,-6"]
+
+
+def test_comment_lines_dont_split_blocks(tmp_path):
+    # 2024/24: the initial wire values and the gates, with a comment line inside the gates
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"x00: 1\ny00: 0 # a comment\n\nx00 AND y00 -> z00\n# carries\nx00 XOR y00 -> z01\n")
+    assert blocks(read_input(path, comment=b"#")) == [
+        b"x00: 1\ny00: 0",
+        b"x00 AND y00 -> z00\nx00 XOR y00 -> z01",
+    ]
+
+
+def test_runtime_profile_restores_the_collector():
+    threshold = gc.get_threshold()
+    with runtime_profile("search"):
+        assert gc.get_threshold() == (250_000, 50, 50)
+        assert gc.get_freeze_count() > 0
+        with runtime_profile("build") as pauses:
+            assert not gc.isenabled()
+            gc.collect()
+        assert pauses.collections == 1
+        assert gc.isenabled()
+        assert gc.get_freeze_count() > 0
+    assert gc.get_threshold() == threshold
+    assert gc.isenabled()
+    assert gc.get_freeze_count() == 0
+
+
+def test_record_gc_pauses():
+    with record_gc_pauses() as pauses:
+        gc.collect()
+        gc.collect()
+    gc.collect()
+    assert pauses.collections == 2
+    assert pauses.total >= pauses.longest > 0